@@ -0,0 +1,143 @@
+"""
+Cross-worker cache invalidation check against a local Postgres.
+
+Two app instances run in their own processes through the lifespan of app.main, each with its
+own in-process caches and PgListener like two uvicorn workers. The reader caches a catalog
+entry and the writer commits a catalog write, the entry has to be evicted in the reader. Then
+the LISTEN connections are terminated, the reader has to reconnect, flush its caches and still
+get the invalidations of the writer afterwards.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/cache_invalidation.py
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import sys
+import time
+from typing import Dict
+
+from sqlalchemy import text
+
+from app.db.listener import pg_listener
+from app.main import app
+from app.middleware.db_session import get_db_session_context_manager
+from app.util.cache import bump_catalog_version, catalog_cache, get_catalog_version
+
+CHECK_KEY = "check:cache_invalidation"
+STEPS = ("notify", "reconnect", "notify after reconnect")
+
+
+async def _wait_event(event, timeout: float) -> bool:
+    return await asyncio.to_thread(event.wait, timeout)
+
+
+async def _wait_evicted(timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while catalog_cache.get(CHECK_KEY) is not None:
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def _wait_connected(timeout: float) -> None:
+    await asyncio.wait_for(pg_listener.connected.wait(), timeout)
+
+
+def _cache_entry() -> None:
+    catalog_cache.set(CHECK_KEY, "cached", get_catalog_version())
+
+
+async def _terminate_listeners() -> None:
+    async with get_db_session_context_manager(request_name="terminate listeners") as db:
+        await db.execute(
+            text(
+                """
+                SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+                WHERE datname = current_database() AND query LIKE 'LISTEN%'
+                """
+            )
+        )
+
+
+async def reader(events: Dict, results, timeout: float) -> None:
+    async with app.router.lifespan_context(app):
+        await _wait_connected(timeout)
+
+        # 1. 另一個 instance 的寫入要清掉這裡的快取
+        _cache_entry()
+        events["reader_ready"].set()
+        results.put((STEPS[0], await _wait_evicted(timeout)))
+
+        # 2. 重新連線後，斷線期間的通知可能遺失，要清空全部快取
+        _cache_entry()
+        await _terminate_listeners()
+        results.put((STEPS[1], await _wait_evicted(timeout)))
+
+        # 3. 重新連線後仍收得到通知
+        await _wait_connected(timeout)
+        _cache_entry()
+        events["reader_reconnected"].set()
+        results.put((STEPS[2], await _wait_evicted(timeout)))
+
+
+async def writer(events: Dict, timeout: float) -> None:
+    async with app.router.lifespan_context(app):
+        for ready in ("reader_ready", "reader_reconnected"):
+            if not await _wait_event(events[ready], timeout * 2):
+                return
+            async with get_db_session_context_manager(request_name="catalog write") as db:
+                await bump_catalog_version(db)
+                await db.commit()
+
+
+def _run_reader(events: Dict, results, timeout: float) -> None:
+    asyncio.run(reader(events, results, timeout))
+
+
+def _run_writer(events: Dict, timeout: float) -> None:
+    asyncio.run(writer(events, timeout))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the cache invalidation across workers.")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds per step")
+    args = parser.parse_args()
+
+    # spawn, each instance imports the app and gets its own caches
+    context = multiprocessing.get_context("spawn")
+    events = {name: context.Event() for name in ("reader_ready", "reader_reconnected")}
+    results = context.Queue()
+    processes = [
+        context.Process(target=_run_reader, args=(events, results, args.timeout)),
+        context.Process(target=_run_writer, args=(events, args.timeout)),
+    ]
+    for process in processes:
+        process.start()
+
+    # read before joining, a process does not exit until its queued results are consumed
+    passed = {}
+    for _ in STEPS:
+        try:
+            step, evicted = results.get(timeout=args.timeout * 2)
+        except queue.Empty:
+            break
+        passed[step] = evicted
+
+    for process in processes:
+        process.join(args.timeout)
+        if process.is_alive():
+            process.terminate()
+
+    failures = [step for step in STEPS if not passed.get(step)]
+    for step in STEPS:
+        print(f"{step:<26}{'ok' if passed.get(step) else 'FAILED'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
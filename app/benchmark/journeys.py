@@ -0,0 +1,312 @@
+"""
+End-to-end HTTP benchmark of the main user journeys.
+
+Start the server with DB_QUERY_COUNT_HEADER=true against a database filled by
+app/db/seeder/generator.py, then:
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/journeys.py --concurrency 20 --iterations 10 --save-baseline
+./.venv/bin/python app/benchmark/journeys.py --concurrency 20 --iterations 10
+
+The second run compares against the stored baseline and exits with 1 on a regression.
+Checkouts create real orders, run it on a disposable database.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import aiohttp
+from sqlalchemy import select
+
+from app.db.db import engine, session_factory
+from app.db.models.book_bookstore_mapping import BookBookstoreMapping
+from app.enum.user import UserRole
+
+DEFAULT_BASELINE = "app/benchmark/baseline.json"
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+
+
+@dataclass
+class StepStats:
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile, p in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.steps: Dict[str, StepStats] = {}
+
+    def record(self, step: str, elapsed: float, queries: Optional[int], ok: bool):
+        stats = self.steps.setdefault(step, StepStats())
+        stats.latencies.append(elapsed)
+        if queries is not None:
+            stats.queries.append(queries)
+        if not ok:
+            stats.errors += 1
+
+    def summary(self, wall_time: float) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for step, stats in self.steps.items():
+            summary[step] = {
+                "requests": len(stats.latencies),
+                "errors": stats.errors,
+                "p50_ms": percentile(stats.latencies, 50) * 1000,
+                "p95_ms": percentile(stats.latencies, 95) * 1000,
+                "p99_ms": percentile(stats.latencies, 99) * 1000,
+                "throughput_rps": len(stats.latencies) / wall_time,
+                "queries_per_request": (
+                    sum(stats.queries) / len(stats.queries) if stats.queries else None
+                ),
+            }
+        return summary
+
+
+class Client:
+    """One virtual user, redirects are not followed so every step measures one handler."""
+
+    def __init__(self, session: aiohttp.ClientSession, recorder: Recorder):
+        self.session = session
+        self.recorder = recorder
+        self.token: Optional[str] = None
+
+    async def request(self, step: str, method: str, path: str, **kwargs) -> Tuple[int, str]:
+        headers = {"Cookie": f"auth_token={self.token}"} if self.token else {}
+        start_time = time.perf_counter()
+        async with self.session.request(
+            method, path, headers=headers, allow_redirects=False, **kwargs
+        ) as response:
+            body = await response.text()
+            elapsed = time.perf_counter() - start_time
+
+        queries = response.headers.get(QUERY_COUNT_HEADER)
+        location = response.headers.get("Location", "")
+        # errors of the form handlers are reported through the redirect query string
+        ok = response.status < 400 and "error=" not in location
+        self.recorder.record(step, elapsed, int(queries) if queries else None, ok)
+        return response.status, body
+
+    async def login(self, role: str, account: str, password: str):
+        status, body = await self.request(
+            "login",
+            "POST",
+            "/auth/login",
+            json={"role": role, "account": account, "password": password},
+        )
+        if status != 200:
+            raise Exception(f"Failed to login as {role}: {account}, {body}")
+        self.token = json.loads(body)["auth_token"]
+
+
+async def customer_journey(
+    client: Client,
+    account: str,
+    password: str,
+    targets: List[Tuple[UUID, UUID]],
+    iterations: int,
+    rng: random.Random,
+):
+    await client.login(UserRole.CUSTOMER, account, password)
+
+    for _ in range(iterations):
+        book_id, bookstore_id = rng.choice(targets)
+
+        await client.request("home", "GET", "/frontend/customers/home")
+        await client.request(
+            "search", "GET", "/frontend/customers/home", params={"q": f"Book {rng.randrange(100)}"}
+        )
+        await client.request(
+            "add_to_cart",
+            "POST",
+            "/customers/cart-items/create_or_update",
+            data={"book_id": str(book_id), "bookstore_id": str(bookstore_id), "quantity": "1"},
+        )
+        await client.request("view_cart", "GET", "/frontend/customers/carts")
+        await client.request(
+            "checkout_page",
+            "GET",
+            "/frontend/customers/checkout",
+            params={"bookstore_id": str(bookstore_id)},
+        )
+        await client.request(
+            "checkout",
+            "POST",
+            "/customers/orders/create",
+            data={
+                "recipient_name": account,
+                "recipient_address": "Benchmark Road 1",
+                "bookstore_id": str(bookstore_id),
+            },
+        )
+        await client.request("order_history", "GET", "/frontend/customers/orders")
+
+
+async def staff_journey(client: Client, account: str, password: str, iterations: int):
+    await client.login(UserRole.STAFF, account, password)
+
+    for _ in range(iterations):
+        await client.request("staff_orders", "GET", "/frontend/staffs/orders")
+        await client.request("staff_statistics", "GET", "/frontend/staffs/statistics")
+
+
+async def _load_targets(limit: int) -> List[Tuple[UUID, UUID]]:
+    """(book_id, bookstore_id) pairs with enough stock for every checkout of the run."""
+    async with session_factory() as db:
+        query = (
+            select(BookBookstoreMapping.book_id, BookBookstoreMapping.bookstore_id)
+            .where(BookBookstoreMapping.store_quantity >= 100)
+            .order_by(BookBookstoreMapping.book_bookstore_mapping_id)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        targets = [tuple(row) for row in result.all()]
+        await session_factory.remove()
+
+    await engine.dispose()
+    if not targets:
+        raise Exception("No book in stock, run app/db/seeder/generator.py first")
+    return targets
+
+
+async def run_benchmark(args) -> Dict[str, Dict[str, float]]:
+    targets = await _load_targets(limit=1000)
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(base_url=args.base_url, connector=connector) as session:
+        journeys = []
+        staff_users = round(args.concurrency * args.staff_ratio)
+        for i in range(args.concurrency):
+            client = Client(session, recorder)
+            if i < staff_users:
+                account = f"{args.staff_prefix}{i}"
+                journeys.append(staff_journey(client, account, args.password, args.iterations))
+            else:
+                account = f"{args.customer_prefix}{i}"
+                journeys.append(
+                    customer_journey(
+                        client,
+                        account,
+                        args.password,
+                        targets,
+                        args.iterations,
+                        random.Random(rng.random()),
+                    )
+                )
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*journeys)
+        wall_time = time.perf_counter() - start_time
+
+    summary = recorder.summary(wall_time)
+    total_requests = sum(step["requests"] for step in summary.values())
+    print(f"{total_requests} requests in {wall_time:.1f}s ({total_requests / wall_time:.1f} rps)")
+    return summary
+
+
+def print_summary(summary: Dict[str, Dict[str, float]]):
+    print(
+        f"{'step':<18}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'rps':>9}{'queries':>9}"
+    )
+    for step, stats in summary.items():
+        queries = stats["queries_per_request"]
+        print(
+            f"{step:<18}{stats['requests']:>9}{stats['errors']:>8}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['throughput_rps']:>9.1f}"
+            f"{'-' if queries is None else f'{queries:.1f}':>9}"
+        )
+
+
+def compare_with_baseline(
+    summary: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    regressions = []
+    for step, stats in summary.items():
+        if stats["errors"]:
+            regressions.append(f"{step}: {stats['errors']} failed requests")
+
+        base = baseline.get(step)
+        if base is None:
+            continue
+
+        if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{step}: p95 {stats['p95_ms']:.1f}ms > baseline {base['p95_ms']:.1f}ms"
+                f" (+{tolerance:.0%} allowed)"
+            )
+
+        queries, base_queries = stats["queries_per_request"], base.get("queries_per_request")
+        # the number of queries is deterministic, any increase is a regression
+        if queries is not None and base_queries is not None and queries > base_queries + 0.5:
+            regressions.append(
+                f"{step}: {queries:.1f} queries per request > baseline {base_queries:.1f}"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main user journeys over HTTP.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of virtual users")
+    parser.add_argument("--iterations", type=int, default=5, help="journeys per virtual user")
+    parser.add_argument("--staff-ratio", type=float, default=0.2)
+    parser.add_argument("--customer-prefix", default="gen_customer_")
+    parser.add_argument("--staff-prefix", default="gen_staff_")
+    parser.add_argument("--password", default="123")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown")
+    parser.add_argument("--output", default=None, help="write the summary json to this path")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_benchmark(args))
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return
+
+    regressions = compare_with_baseline(summary, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
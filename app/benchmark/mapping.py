@@ -0,0 +1,123 @@
+"""
+Mapping time of ORM instances and rows to the dicts the templates render: pydantic
+Schema.from_orm(obj).dict() against the precomputed attribute getters of RowMapper.
+No database needed, the orders are transient ORM instances and the book rows named tuples
+with the columns of list_books_by_bookstore_id.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/mapping.py --rows 10000
+"""
+
+import argparse
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Any, Callable, List
+from uuid import uuid4
+
+from app.db.models.order import Order
+from app.enum.order import OrderStatus
+from app.router.schema.mapper import book_with_mapping_info_mapper, order_mapper
+from app.router.schema.sqlalchemy import BookWithMappingInfo, OrderSchema
+
+BookRow = namedtuple(
+    "BookRow",
+    (
+        "book_id",
+        "title",
+        "author",
+        "publisher",
+        "isbn",
+        "category",
+        "publish_date",
+        "price",
+        "store_quantity",
+        "book_bookstore_mapping_id",
+        "bookstore_id",
+    ),
+)
+
+
+def build_orders(rows: int) -> List[Order]:
+    bookstore_id = uuid4()
+    return [
+        Order(
+            order_id=uuid4(),
+            order_time=date(2026, 1, 1) - timedelta(days=i % 365),
+            customer_name=f"Generated Customer {i}",
+            customer_phone_number=f"09{i:08d}",
+            customer_email=f"customer{i}@generated.example",
+            status=str(OrderStatus.CLOSED),
+            total_price=500 + i % 1000,
+            shipping_address=f"Generated Street {i}",
+            shipping_fee=60,
+            recipient_name=f"Generated Customer {i}",
+            coupon_id=None,
+            customer_account=f"gen_customer_{i}",
+            bookstore_id=bookstore_id,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_book_rows(rows: int) -> List[BookRow]:
+    bookstore_id = uuid4()
+    return [
+        BookRow(
+            uuid4(),
+            f"Generated Book {i}",
+            f"Author {i}",
+            f"Publisher {i % 200}",
+            f"979-{i:013d}",
+            "程式設計",
+            date(2026, 1, 1) - timedelta(days=i),
+            300,
+            20,
+            uuid4(),
+            bookstore_id,
+        )
+        for i in range(rows)
+    ]
+
+
+def _time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    fn()
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start_time) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark from_orm against RowMapper.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    orders = build_orders(args.rows)
+    books = build_book_rows(args.rows)
+
+    cases = {
+        "orders (ORM instances)": (
+            lambda: [OrderSchema.from_orm(order).dict() for order in orders],
+            lambda: order_mapper.dicts(orders),
+        ),
+        "books (rows)": (
+            lambda: [BookWithMappingInfo.from_orm(book).dict() for book in books],
+            lambda: book_with_mapping_info_mapper.dicts(books),
+        ),
+    }
+
+    print(f"{args.rows} rows")
+    print(f"{'case':<26}{'from_orm ms':>13}{'mapper ms':>11}{'speedup':>9}")
+    for name, (from_orm, mapper) in cases.items():
+        # both sides have to render the same dicts
+        if from_orm() != mapper():
+            raise Exception(f"{name}: the mapper output differs from from_orm")
+        before = _time_ms(from_orm, args.repeat)
+        after = _time_ms(mapper, args.repeat)
+        print(f"{name:<26}{before:>13.1f}{after:>11.1f}{before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
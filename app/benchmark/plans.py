@@ -0,0 +1,523 @@
+"""
+Query plan checks of the db operators.
+
+Every case calls an operator on a seeded database (app/db/seeder/generator.py) inside a
+transaction that is rolled back, captures the sql it emits, and runs EXPLAIN (FORMAT JSON)
+on each statement with the same parameters. A case fails if a plan sequentially scans a
+large table it is not allowed to, if its estimated cost exceeds the budget of the case, or if
+it reads more partitions of a partitioned table than the case allows (partition pruning).
+The plan shapes are kept in a snapshot file and a diff is printed when they change.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/plans.py --update   # write the snapshot
+./.venv/bin/python app/benchmark/plans.py            # check against it
+"""
+
+import argparse
+import asyncio
+import difflib
+import json
+import re
+import sys
+from datetime import date, timedelta
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.db import engine, session_factory
+from app.db.models.book import Book
+from app.db.models.book_bookstore_mapping import BookBookstoreMapping
+from app.db.models.cart_item import CartItem
+from app.db.models.coupon import Coupon
+from app.db.models.order import Order
+from app.db.models.shopping_cart import ShoppingCart
+from app.db.models.staff import Staff
+from app.db.operator import (
+    book,
+    bookbookstoremapping,
+    cart,
+    coupon,
+    customer,
+    order,
+    shopping_cart,
+    staff,
+)
+from app.db.partition import PARTITIONED_TABLES, add_months, month_start
+from app.enum.order import OrderStatus
+from app.enum.user import UserRole
+
+DEFAULT_SNAPSHOT = "app/benchmark/plans.json"
+
+# tables that grow with the business, a sequential scan on them does not scale
+LARGE_TABLES = frozenset(
+    {
+        "book",
+        "book_bookstore_mapping",
+        "customer",
+        "shopping_cart",
+        "cart_item",
+        "order_",
+        "order_item",
+        "coupon",
+    }
+)
+
+
+@dataclass
+class Fixtures:
+    """Existing keys of the seeded database the cases query with."""
+
+    customer_account: str
+    staff_account: str
+    bookstore_id: Any
+    book_id: Any
+    isbn: str
+    category: str
+    mapping_id: Any
+    cart_id: Any
+    cart_item_id: Any
+    order_id: Any
+    order_time: date
+    coupon_id: Any
+
+
+@dataclass
+class PlanCase:
+    name: str
+    call: Callable[[AsyncSession, Fixtures], Awaitable[Any]]
+    max_cost: float
+    # large tables the operator has to read entirely, e.g. unanchored ILIKE searches
+    allow_seq_scan: FrozenSet[str] = field(default_factory=frozenset)
+    # partitions of each partitioned table the plan may read, None does not check pruning
+    max_partitions: Optional[int] = None
+
+
+def _uncached(operator):
+    """The function behind a @cached operator, so the case always reaches the db."""
+    return getattr(operator, "fn", operator)
+
+
+async def _drain(stream) -> None:
+    """Run a streaming operator to the end."""
+    async for _ in stream:
+        pass
+
+
+def _month_of(day: date) -> Tuple[date, date]:
+    """The first and the last day of the month, the bounds of one order partition."""
+    first_day = month_start(day)
+    return first_day, add_months(first_day, 1) - timedelta(days=1)
+
+
+CASES = [
+    PlanCase(
+        "get_customer_by_account",
+        lambda db, f: customer.get_customer_by_account(db, f.customer_account),
+        max_cost=20,
+    ),
+    PlanCase(
+        "get_staff_by_account",
+        lambda db, f: staff.get_staff_by_account(db, f.staff_account),
+        max_cost=20,
+    ),
+    PlanCase("get_book_by_isbn", lambda db, f: book.get_book_by_isbn(db, f.isbn), max_cost=20),
+    PlanCase(
+        "list_books_page",
+        lambda db, f: book.list_books_page(db, ["title", "author"], f.book_id, limit=51),
+        max_cost=100,
+    ),
+    PlanCase("get_category_counts", lambda db, f: book.get_category_counts(db), max_cost=100),
+    PlanCase(
+        "list_books_by_category",
+        lambda db, f: book.list_books_by_category(db, f.category, limit=25),
+        max_cost=1000,
+    ),
+    PlanCase(
+        "list_books_by_category_next_page",
+        lambda db, f: book.list_books_by_category(
+            db,
+            f.category,
+            after=(date(2020, 1, 1), f.book_id),
+            limit=25,
+            bookstore_id=f.bookstore_id,
+        ),
+        max_cost=1000,
+    ),
+    PlanCase(
+        "get_category_counts_by_bookstore",
+        lambda db, f: _uncached(bookbookstoremapping.get_category_counts_by_bookstore)(
+            db, f.category
+        ),
+        max_cost=20000,
+    ),
+    PlanCase(
+        "get_offers_by_book_ids",
+        lambda db, f: bookbookstoremapping.get_offers_by_book_ids(db, [f.book_id]),
+        max_cost=100,
+    ),
+    PlanCase(
+        "list_books_by_bookstore_id",
+        lambda db, f: book.list_books_by_bookstore_id(db, f.bookstore_id),
+        max_cost=20000,
+    ),
+    PlanCase(
+        "search_books_with_bookstore_details",
+        lambda db, f: bookbookstoremapping.search_books_with_bookstore_details(db, "Book 1"),
+        max_cost=100000,
+        allow_seq_scan=frozenset({"book"}),
+    ),
+    PlanCase(
+        "get_new_arrivals_with_bookstore_details",
+        lambda db, f: bookbookstoremapping.get_new_arrivals_with_bookstore_details(db, 20),
+        max_cost=1000,
+    ),
+    PlanCase(
+        "get_book_mapping",
+        lambda db, f: bookbookstoremapping.get_book_mapping(db, f.book_id, f.bookstore_id),
+        max_cost=20,
+    ),
+    PlanCase(
+        "decrease_stock",
+        lambda db, f: bookbookstoremapping.decrease_stock(db, f.mapping_id, 1),
+        max_cost=20,
+    ),
+    PlanCase(
+        "get_cart_item_count",
+        lambda db, f: cart.get_cart_item_count(db, f.customer_account),
+        max_cost=200,
+    ),
+    PlanCase(
+        "get_cart_details",
+        lambda db, f: cart.get_cart_details(db, f.customer_account),
+        max_cost=500,
+    ),
+    PlanCase(
+        "get_cart_by_account",
+        lambda db, f: shopping_cart.get_cart_by_account(db, f.customer_account),
+        max_cost=500,
+    ),
+    PlanCase(
+        "get_cart_item",
+        lambda db, f: shopping_cart.get_cart_item(db, f.cart_id, f.mapping_id),
+        max_cost=50,
+    ),
+    PlanCase(
+        "update_cart_item_quantity",
+        lambda db, f: shopping_cart.update_cart_item_quantity(db, f.cart_item_id, 2),
+        max_cost=20,
+    ),
+    PlanCase(
+        "get_orders_by_customer_account",
+        lambda db, f: order.get_orders_by_customer_account(db, f.customer_account),
+        max_cost=2000,
+    ),
+    PlanCase(
+        "get_orders_by_bookstore_id",
+        lambda db, f: order.get_orders_by_bookstore_id(db, f.bookstore_id),
+        max_cost=50000,
+    ),
+    PlanCase(
+        "get_orders_by_bookstore_id_one_month",
+        lambda db, f: order.get_orders_by_bookstore_id(
+            db, f.bookstore_id, *_month_of(f.order_time)
+        ),
+        max_cost=5000,
+        max_partitions=1,
+    ),
+    PlanCase(
+        "stream_order_items_by_bookstore_id_one_month",
+        lambda db, f: _drain(
+            order.stream_order_items_by_bookstore_id(db, f.bookstore_id, *_month_of(f.order_time))
+        ),
+        max_cost=20000,
+        # the month of order items is read in full and joined to the bookstore's orders
+        allow_seq_scan=frozenset({"order_item"}),
+        max_partitions=1,
+    ),
+    PlanCase(
+        "stream_sales_by_bookstore_id_one_month",
+        lambda db, f: _drain(
+            order.stream_sales_by_bookstore_id(db, f.bookstore_id, *_month_of(f.order_time))
+        ),
+        max_cost=20000,
+        # the month of order items is read in full and joined to the bookstore's orders
+        allow_seq_scan=frozenset({"order_item"}),
+        max_partitions=1,
+    ),
+    PlanCase(
+        "get_open_orders_by_bookstore_id",
+        lambda db, f: order.get_open_orders_by_bookstore_id(db, f.bookstore_id),
+        max_cost=1000,
+    ),
+    PlanCase(
+        "claim_next_order",
+        lambda db, f: order.claim_next_order(
+            db, f.bookstore_id, f.staff_account, timedelta(minutes=30)
+        ),
+        max_cost=1000,
+    ),
+    PlanCase(
+        "transition_orders",
+        lambda db, f: order.transition_orders(
+            db, f.bookstore_id, [f.order_id], OrderStatus.CLOSED, f.staff_account
+        ),
+        # order ids without their order_time, one primary key probe per order_ partition
+        max_cost=500,
+    ),
+    PlanCase(
+        "get_active_admin_coupons",
+        lambda db, f: _uncached(coupon.get_active_admin_coupons)(db),
+        max_cost=1000,
+        allow_seq_scan=frozenset({"coupon"}),
+    ),
+    PlanCase(
+        "get_active_bookstore_coupons",
+        lambda db, f: coupon.get_active_bookstore_coupons(db),
+        max_cost=1000,
+        allow_seq_scan=frozenset({"coupon"}),
+    ),
+    PlanCase(
+        "get_coupon_by_accounts",
+        lambda db, f: coupon.get_coupon_by_accounts(db, [f.staff_account], UserRole.STAFF),
+        max_cost=1000,
+        allow_seq_scan=frozenset({"coupon"}),
+    ),
+    PlanCase(
+        "get_coupon_by_id", lambda db, f: coupon.get_coupon_by_id(db, f.coupon_id), max_cost=20
+    ),
+]
+
+
+async def load_fixtures(db: AsyncSession) -> Fixtures:
+    async def first(query):
+        return (await db.execute(query.limit(1))).scalar()
+
+    cart_item = (
+        await db.execute(
+            select(CartItem.cart_item_id, CartItem.cart_id, ShoppingCart.customer_account)
+            .join(ShoppingCart, ShoppingCart.cart_id == CartItem.cart_id)
+            .limit(1)
+        )
+    ).first()
+    mapping = (
+        await db.execute(
+            select(
+                BookBookstoreMapping.book_bookstore_mapping_id,
+                BookBookstoreMapping.book_id,
+                BookBookstoreMapping.bookstore_id,
+            ).limit(1)
+        )
+    ).one()
+    customer_account = (
+        cart_item.customer_account if cart_item else await first(select(Order.customer_account))
+    )
+    cart_id = (
+        cart_item.cart_id
+        if cart_item
+        else await first(
+            select(ShoppingCart.cart_id).where(ShoppingCart.customer_account == customer_account)
+        )
+    )
+
+    order_row = (
+        await db.execute(
+            select(Order.order_id, Order.order_time)
+            .where(Order.bookstore_id == mapping.bookstore_id)
+            .limit(1)
+        )
+    ).one()
+
+    return Fixtures(
+        customer_account=customer_account,
+        staff_account=await first(
+            select(Staff.account).where(Staff.bookstore_id == mapping.bookstore_id)
+        ),
+        bookstore_id=mapping.bookstore_id,
+        book_id=mapping.book_id,
+        isbn=await first(select(Book.isbn).where(Book.book_id == mapping.book_id)),
+        category=await first(select(Book.category).where(Book.category.is_not(None))),
+        mapping_id=mapping.book_bookstore_mapping_id,
+        cart_id=cart_id,
+        cart_item_id=cart_item.cart_item_id if cart_item else None,
+        order_id=order_row.order_id,
+        order_time=order_row.order_time,
+        coupon_id=await first(select(Coupon.coupon_id)),
+    )
+
+
+def _walk(plan: Dict[str, Any], depth: int = 0):
+    yield plan, depth
+    for child in plan.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+
+def plan_shape(plan: Dict[str, Any]) -> List[str]:
+    """The plan without its estimates, so only real plan changes show up in the diff."""
+    lines = []
+    for node, depth in _walk(plan):
+        line = node["Node Type"]
+        if "Join Type" in node:
+            line = f"{node['Join Type']} {line}"
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        lines.append("  " * depth + line)
+    return lines
+
+
+async def explain_case(
+    db: AsyncSession, case: PlanCase, fixtures: Fixtures
+) -> List[Tuple[str, Dict[str, Any]]]:
+    captured: List[Tuple[str, Any]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            captured.append((statement, parameters))
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _capture)
+    try:
+        async with db.begin_nested():
+            await case.call(db, fixtures)
+            await db.flush()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _capture)
+
+    connection = await db.connection()
+    driver_connection = (await connection.get_raw_connection()).driver_connection
+
+    plans = []
+    for statement, parameters in captured:
+        result = await driver_connection.fetchval(
+            f"EXPLAIN (FORMAT JSON) {statement}", *(parameters or ())
+        )
+        plans.append((statement, json.loads(result)[0]["Plan"]))
+    return plans
+
+
+def partitioned_table(relation: Optional[str]) -> Optional[str]:
+    """The partitioned table of a partition, e.g. order_ for order__2026_10."""
+    for table in PARTITIONED_TABLES:
+        if relation and re.fullmatch(rf"{table}_(\d{{4}}_\d{{2}}|default)", relation):
+            return table
+    return None
+
+
+def check_plan(case: PlanCase, plan: Dict[str, Any]) -> List[str]:
+    violations = []
+    scanned_partitions: Dict[str, set] = {}
+    for node, _ in _walk(plan):
+        relation = node.get("Relation Name")
+        table = partitioned_table(relation)
+        if table is not None:
+            scanned_partitions.setdefault(table, set()).add(relation)
+            relation = table
+        if (
+            node["Node Type"] == "Seq Scan"
+            and relation in LARGE_TABLES
+            and relation not in case.allow_seq_scan
+        ):
+            violations.append(f"sequential scan on {relation}")
+
+    if case.max_partitions is not None:
+        for table, partitions in sorted(scanned_partitions.items()):
+            if len(partitions) > case.max_partitions:
+                violations.append(
+                    f"{len(partitions)} partitions of {table} read > {case.max_partitions}"
+                    f" ({', '.join(sorted(partitions))})"
+                )
+
+    if plan["Total Cost"] > case.max_cost:
+        violations.append(f"estimated cost {plan['Total Cost']:.0f} > budget {case.max_cost:.0f}")
+    return violations
+
+
+async def run_checks(cases: List[PlanCase]) -> Tuple[Dict[str, List[List[str]]], List[str]]:
+    shapes: Dict[str, List[List[str]]] = {}
+    failures: List[str] = []
+
+    async with session_factory() as db:
+        try:
+            fixtures = await load_fixtures(db)
+            for case in cases:
+                try:
+                    plans = await explain_case(db, case, fixtures)
+                except Exception as err:
+                    failures.append(f"{case.name}: failed to explain, {err!r}")
+                    continue
+
+                shapes[case.name] = [plan_shape(plan) for _, plan in plans]
+                for i, (statement, plan) in enumerate(plans):
+                    for violation in check_plan(case, plan):
+                        failures.append(f"{case.name} [statement {i}]: {violation}")
+                    print(f"{case.name} [statement {i}] cost {plan['Total Cost']:.0f}")
+        finally:
+            await db.rollback()
+            await session_factory.remove()
+
+    await engine.dispose()
+    return shapes, failures
+
+
+def diff_shapes(old: Dict[str, List[List[str]]], new: Dict[str, List[List[str]]]) -> List[str]:
+    diff = []
+    for name in sorted(set(old) | set(new)):
+        old_lines = [line for plan in old.get(name, []) for line in plan + ["--"]]
+        new_lines = [line for plan in new.get(name, []) for line in plan + ["--"]]
+        if old_lines != new_lines:
+            diff.extend(
+                difflib.unified_diff(
+                    old_lines, new_lines, fromfile=f"{name} (snapshot)", tofile=name, lineterm=""
+                )
+            )
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plans of the db operators.")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT)
+    parser.add_argument("--update", action="store_true", help="overwrite the plan snapshot")
+    parser.add_argument("--fail-on-change", action="store_true", help="a plan change fails")
+    parser.add_argument("--case", action="append", help="only run these cases")
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if not args.case or case.name in args.case]
+    shapes, failures = asyncio.run(run_checks(cases))
+
+    old_shapes: Optional[Dict[str, List[List[str]]]] = None
+    try:
+        with open(args.snapshot) as f:
+            old_shapes = json.load(f)
+    except FileNotFoundError:
+        print(f"No plan snapshot at {args.snapshot}")
+
+    if old_shapes is not None:
+        checked = {name: old_shapes[name] for name in shapes if name in old_shapes}
+        if not args.case:
+            checked = old_shapes
+        diff = diff_shapes(checked, shapes)
+        if diff:
+            print("PLAN CHANGES:")
+            print("\n".join(diff))
+            if args.fail_on_change and not args.update:
+                failures.append("query plans changed")
+
+    if args.update:
+        with open(args.snapshot, "w") as f:
+            # with --case only the selected cases are replaced
+            json.dump({**(old_shapes if args.case and old_shapes else {}), **shapes}, f, indent=2)
+        print(f"Saved plan snapshot to {args.snapshot}")
+
+    if failures:
+        print("FAILURES:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"{len(cases)} cases passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Serialization time of a large catalog page: the default FastAPI path (pydantic models, .dict(),
+jsonable_encoder, JSONResponse) against the rows rendered by ORJSONResponse as the catalog API
+does. No database needed.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/serialization.py --books 200 --offers 3
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.router.schema.sqlalchemy import BookBookstoreMappingSchema, BookSchema
+
+
+def build_page(books: int, offers: int) -> List[Dict[str, Any]]:
+    """A page of books with their offers, as the catalog API builds it from the rows."""
+    page = []
+    for i in range(books):
+        book_id = uuid4()
+        page.append(
+            {
+                "book_id": book_id,
+                "title": f"Generated Book {i}",
+                "author": f"Author {i}",
+                "publisher": f"Publisher {i % 200}",
+                "isbn": f"979-{i:013d}",
+                "category": "程式設計",
+                "series": None,
+                "publish_date": date(2026, 1, 1) - timedelta(days=i),
+                "offers": [
+                    {
+                        "book_bookstore_mapping_id": uuid4(),
+                        "book_id": book_id,
+                        "bookstore_id": uuid4(),
+                        "price": 300 + j * 10,
+                        "store_quantity": 20,
+                    }
+                    for j in range(offers)
+                ],
+            }
+        )
+    return page
+
+
+def render_default(page: List[Dict[str, Any]]) -> bytes:
+    content = []
+    for book in page:
+        item = BookSchema(**book).dict()
+        item["offers"] = [BookBookstoreMappingSchema(**offer).dict() for offer in book["offers"]]
+        content.append(item)
+    return JSONResponse({"data": jsonable_encoder(content), "next_cursor": None}).body
+
+
+def render_orjson(page: List[Dict[str, Any]]) -> bytes:
+    return ORJSONResponse({"data": page, "next_cursor": None}).body
+
+
+def _per_call_ms(render: Callable[[List[Dict[str, Any]]], bytes], page, calls: int) -> float:
+    render(page)
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        render(page)
+    return (time.perf_counter() - start_time) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the catalog page serialization.")
+    parser.add_argument("--books", type=int, default=200, help="books per page")
+    parser.add_argument("--offers", type=int, default=3, help="offers per book")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    page = build_page(args.books, args.offers)
+    default_ms = _per_call_ms(render_default, page, args.calls)
+    orjson_ms = _per_call_ms(render_orjson, page, args.calls)
+
+    print(f"{'response':<28}{'ms per page':>12}{'bytes':>10}")
+    print(f"{'pydantic + JSONResponse':<28}{default_ms:>12.3f}{len(render_default(page)):>10}")
+    print(f"{'rows + ORJSONResponse':<28}{orjson_ms:>12.3f}{len(render_orjson(page)):>10}")
+    print(f"{default_ms / orjson_ms:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Per-call overhead of the hot operators: a statement built on every call against the prebuilt
+module-level statement, with and without the asyncpg prepared statement cache.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/statements.py --offline      # statement building only
+./.venv/bin/python app/benchmark/statements.py --calls 2000   # against the database
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.models.book import Book
+from app.db.models.book_bookstore_mapping import BookBookstoreMapping
+from app.db.models.bookstore import Bookstore
+from app.db.models.cart_item import CartItem
+from app.db.models.customer import Customer
+from app.db.models.shopping_cart import ShoppingCart
+from app.db.operator import bookbookstoremapping, cart, customer
+
+
+# the statements as the operators built them on every call before
+def _customer_by_account(account):
+    return select(Customer).where(Customer.account == account)
+
+
+def _cart_item_count(customer_account):
+    return (
+        select(func.coalesce(func.sum(CartItem.quantity), 0))
+        .join(ShoppingCart, ShoppingCart.cart_id == CartItem.cart_id)
+        .where(ShoppingCart.customer_account == customer_account)
+    )
+
+
+def _book_mapping(book_id, bookstore_id):
+    return select(BookBookstoreMapping).where(
+        and_(
+            BookBookstoreMapping.book_id == book_id,
+            BookBookstoreMapping.bookstore_id == bookstore_id,
+        )
+    )
+
+
+def _cart_details(customer_account):
+    return (
+        select(
+            CartItem.cart_item_id,
+            CartItem.quantity,
+            Book.book_id,
+            Book.title,
+            Book.author,
+            literal("https://placehold.co/120x160").label("image_url"),
+            Bookstore.bookstore_id,
+            Bookstore.name,
+            BookBookstoreMapping.price,
+            BookBookstoreMapping.store_quantity,
+        )
+        .join(ShoppingCart, ShoppingCart.cart_id == CartItem.cart_id)
+        .join(
+            BookBookstoreMapping,
+            BookBookstoreMapping.book_bookstore_mapping_id == CartItem.book_bookstore_mapping_id,
+        )
+        .join(Book, Book.book_id == BookBookstoreMapping.book_id)
+        .join(Bookstore, Bookstore.bookstore_id == BookBookstoreMapping.bookstore_id)
+        .where(ShoppingCart.customer_account == customer_account)
+    )
+
+
+def _per_call_us(fn: Callable[[], Any], calls: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+
+def run_offline(calls: int) -> List[Tuple[str, float, float]]:
+    """Building the statement and its cache key, what every execute pays before the cache."""
+    account, some_id = "customer_A", uuid4()
+    prebuilt = {
+        "get_customer_by_account": customer._customer_by_account_query,
+        "get_cart_item_count": cart._cart_item_count_query,
+        "get_book_mapping": bookbookstoremapping._book_mapping_query,
+        "get_cart_details": cart._cart_details_query,
+    }
+    rebuilt = {
+        "get_customer_by_account": lambda: _customer_by_account(account),
+        "get_cart_item_count": lambda: _cart_item_count(account),
+        "get_book_mapping": lambda: _book_mapping(some_id, some_id),
+        "get_cart_details": lambda: _cart_details(account),
+    }
+
+    dialect = postgresql.asyncpg.dialect()
+    results = []
+    for name, build in rebuilt.items():
+        build().compile(dialect=dialect)
+        before = _per_call_us(lambda: build()._generate_cache_key(), calls)
+        after = _per_call_us(lambda: prebuilt[name]._generate_cache_key(), calls)
+        results.append((name, before, after))
+    return results
+
+
+async def _time_calls(
+    db: AsyncSession, call: Callable[[AsyncSession], Awaitable[Any]], calls: int
+) -> float:
+    await call(db)
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        await call(db)
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+
+async def run_online(calls: int, cache_sizes: List[int]) -> List[Tuple[str, int, float, float]]:
+    results = []
+    for cache_size in cache_sizes:
+        engine = create_async_engine(
+            settings.DATABASE_URI,
+            pool_size=1,
+            connect_args={"prepared_statement_cache_size": cache_size},
+        )
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            row = (
+                await db.execute(
+                    select(
+                        ShoppingCart.customer_account,
+                        BookBookstoreMapping.book_id,
+                        BookBookstoreMapping.bookstore_id,
+                    ).limit(1)
+                )
+            ).one()
+            account, book_id, bookstore_id = row
+
+            cases: Dict[str, Tuple[Callable, Callable]] = {
+                "get_customer_by_account": (
+                    lambda db: db.execute(_customer_by_account(account)),
+                    lambda db: customer.get_customer_by_account(db, account),
+                ),
+                "get_cart_item_count": (
+                    lambda db: db.execute(_cart_item_count(account)),
+                    lambda db: cart.get_cart_item_count(db, account),
+                ),
+                "get_book_mapping": (
+                    lambda db: db.execute(_book_mapping(book_id, bookstore_id)),
+                    lambda db: bookbookstoremapping.get_book_mapping(db, book_id, bookstore_id),
+                ),
+                "get_cart_details": (
+                    lambda db: db.execute(_cart_details(account)),
+                    lambda db: cart.get_cart_details(db, account),
+                ),
+            }
+            for name, (before, after) in cases.items():
+                results.append(
+                    (
+                        name,
+                        cache_size,
+                        await _time_calls(db, before, calls),
+                        await _time_calls(db, after, calls),
+                    )
+                )
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call overhead of the hot operators.")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--offline", action="store_true", help="no database, statement building")
+    parser.add_argument(
+        "--cache-sizes",
+        type=int,
+        nargs="+",
+        default=[0, settings.DB_PREPARED_STATEMENT_CACHE_SIZE],
+        help="asyncpg prepared_statement_cache_size values to compare",
+    )
+    args = parser.parse_args()
+
+    if args.offline:
+        print(f"{'operator':<26}{'rebuilt us':>12}{'prebuilt us':>13}")
+        for name, before, after in run_offline(args.calls):
+            print(f"{name:<26}{before:>12.1f}{after:>13.1f}")
+        return
+
+    print(f"{'operator':<26}{'stmt cache':>11}{'rebuilt us':>12}{'prebuilt us':>13}")
+    for name, cache_size, before, after in asyncio.run(run_online(args.calls, args.cache_sizes)):
+        print(f"{name:<26}{cache_size:>11}{before:>12.1f}{after:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Insert throughput, primary key index size and WAL volume of random (v4) against time-ordered
+(v7) uuid primary keys.
+
+Each key kind gets a scratch table with a uuid primary key filled by its server default, rows
+are inserted in committed batches. Run it on a disposable database with the migrations
+applied, the scratch tables are dropped at the end unless --keep.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/benchmark/uuid_keys.py --rows 10000000
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List
+
+from app.db.db import engine
+
+KEY_DEFAULTS = {
+    "v4": "gen_random_uuid()",
+    "v7": "uuid_generate_v7()",
+}
+
+
+@dataclass
+class KeyResult:
+    kind: str
+    rows: int
+    seconds: float
+    table_bytes: int
+    index_bytes: int
+    wal_bytes: int
+
+
+def _table(kind: str) -> str:
+    return f"benchmark_uuid_{kind}"
+
+
+async def run_kind(kind: str, rows: int, batch_size: int) -> KeyResult:
+    table = _table(kind)
+    async with engine.connect() as conn:
+        async with conn.begin():
+            await conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+            await conn.exec_driver_sql(
+                f"""
+                CREATE TABLE {table} (
+                    id uuid PRIMARY KEY DEFAULT {KEY_DEFAULTS[kind]},
+                    payload integer NOT NULL,
+                    created_at timestamptz NOT NULL DEFAULT now()
+                )
+                """
+            )
+        async with conn.begin():
+            wal_start = (await conn.exec_driver_sql("SELECT pg_current_wal_lsn()")).scalar()
+
+        start_time = time.perf_counter()
+        inserted = 0
+        while inserted < rows:
+            count = min(batch_size, rows - inserted)
+            async with conn.begin():
+                await conn.exec_driver_sql(
+                    f"INSERT INTO {table} (payload) SELECT g FROM generate_series(1, {count}) g"
+                )
+            inserted += count
+        seconds = time.perf_counter() - start_time
+
+        async with conn.begin():
+            sizes = await conn.exec_driver_sql(
+                f"""
+                SELECT
+                    pg_relation_size('{table}'),
+                    pg_relation_size('{table}_pkey'),
+                    pg_wal_lsn_diff(pg_current_wal_lsn(), '{wal_start}')
+                """
+            )
+            table_bytes, index_bytes, wal_bytes = sizes.one()
+
+    return KeyResult(kind, rows, seconds, table_bytes, index_bytes, int(wal_bytes))
+
+
+async def drop_tables() -> None:
+    async with engine.begin() as conn:
+        for kind in KEY_DEFAULTS:
+            await conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_table(kind)}")
+
+
+async def run_benchmark(args) -> List[KeyResult]:
+    results = []
+    try:
+        for kind in args.kinds:
+            print(f"Inserting {args.rows} rows with {kind} keys...")
+            results.append(await run_kind(kind, args.rows, args.batch_size))
+    finally:
+        if not args.keep:
+            await drop_tables()
+        await engine.dispose()
+    return results
+
+
+def print_results(results: List[KeyResult]):
+    mb = 1024 * 1024
+    print(
+        f"{'key':<6}{'rows':>12}{'seconds':>10}{'rows/s':>12}{'table MB':>10}{'pkey MB':>10}"
+        f"{'WAL MB':>10}"
+    )
+    for r in results:
+        print(
+            f"{r.kind:<6}{r.rows:>12}{r.seconds:>10.1f}{r.rows / r.seconds:>12.0f}"
+            f"{r.table_bytes / mb:>10.1f}{r.index_bytes / mb:>10.1f}{r.wal_bytes / mb:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark v4 against v7 uuid primary keys.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000, help="rows per transaction")
+    parser.add_argument("--kinds", nargs="+", choices=list(KEY_DEFAULTS), default=["v4", "v7"])
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables")
+    args = parser.parse_args()
+
+    print_results(asyncio.run(run_benchmark(args)))
+
+
+if __name__ == "__main__":
+    main()
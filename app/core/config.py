@@ -7,6 +7,10 @@ class Settings(BaseSettings):
     """Extract env variables to app settings."""
 
     LOG_LEVEL = "DEBUG"
+    # json or text
+    LOG_FORMAT = "json"
+    # share of the DEBUG records kept per logger name, e.g. {"logger-0.db_session": 0.01}
+    LOG_DEBUG_SAMPLE_RATES: Dict[str, float] = {}
 
     # jwt
     JWT_SECRET_KEY: str
@@ -25,6 +29,72 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 40
     DB_MAX_OVERFLOW: int = 10
     DB_ECHO: bool = False
+    # connections opened at startup
+    DB_POOL_WARMUP_SIZE: int = 5
+    # ping on every checkout, otherwise idle connections are pinged in the background
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_HEALTH_CHECK_SECONDS: float = 30
+    # raise max_overflow up to the limit while checkouts wait longer than DB_POOL_SLOW_WAIT_MS
+    DB_POOL_ADAPTIVE_OVERFLOW: bool = False
+    DB_POOL_MAX_OVERFLOW_LIMIT: int = 40
+    DB_POOL_ADAPTIVE_STEP: int = 5
+    DB_POOL_ADAPTIVE_INTERVAL_SECONDS: float = 5
+    DB_POOL_SLOW_WAIT_MS: float = 50
+    # asyncpg prepared statements cached per connection, 0 disables the cache (e.g. pgbouncer)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # sqlalchemy compiled statement cache size
+    DB_QUERY_CACHE_SIZE: int = 1000
+    # expose the number of sql statements of a request in the X-DB-Query-Count header
+    DB_QUERY_COUNT_HEADER: bool = False
+
+    # cross-worker cache invalidation through postgres LISTEN/NOTIFY
+    PG_LISTENER_ENABLED: bool = True
+    PG_LISTENER_HEALTH_CHECK_SECONDS: float = 30
+
+    # monitoring
+    # /metrics has no authentication, only enable it where the port is not public
+    METRICS_ENABLED: bool = False
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    # log the route and stack of callbacks blocking the event loop longer than the threshold
+    SLOW_CALLBACK_DEBUG: bool = False
+    SLOW_CALLBACK_THRESHOLD_SECONDS: float = 0.1
+    SLOW_CALLBACK_SAMPLE_RATE: float = 0.1
+    # time every statement, log the ones slower than the threshold
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_MAX_ENTRIES: int = 1000
+    SLOW_QUERY_WINDOW_SECONDS: float = 3600
+
+    # orders
+    # a claimed order not updated within the timeout goes back to the staff queue
+    ORDER_CLAIM_TIMEOUT_MINUTES: float = 30
+    # order_ and order_item are partitioned by month, the empty partitions are created ahead
+    PARTITION_MAINTENANCE_ENABLED: bool = True
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 3600
+
+    # outbox worker delivering the side effects of transactions, e.g. confirmation emails
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 20
+    # fallback when a NOTIFY is missed, new messages wake the worker up right away
+    OUTBOX_POLL_SECONDS: float = 5
+    # a leased message is retried once the lease expires, e.g. if its worker died
+    OUTBOX_LEASE_SECONDS: float = 300
+    OUTBOX_DELIVERY_TIMEOUT_SECONDS: float = 30
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 5
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600
+
+    # stored responses of the POST requests sent with an idempotency key
+    IDEMPOTENCY_KEY_TTL_HOURS: float = 24
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: float = 600
+
+    # mail, log or smtp
+    MAIL_SINK = "log"
+    MAIL_SENDER = "no-reply@bookstore.local"
+    SMTP_HOST = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_TIMEOUT_SECONDS: float = 10
 
     @validator("DATABASE_URI", pre=True)
     def assemble_db_connection(
@@ -0,0 +1,64 @@
+"""
+Archive the monthly partitions of order_ and order_item older than a date.
+
+The partitions are detached and moved to the archive schema, or dropped with --drop.
+Detaching locks the order tables, run it off-peak.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/db/archiver/index.py --before 2025-01-01
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from app.db.db import engine
+from app.db.partition import ARCHIVE_SCHEMA, archive_partitions, month_start
+
+
+async def run_archive(before: date, drop: bool, dry_run: bool):
+    start_time = time.time()
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            archived = await archive_partitions(conn, before, drop=drop)
+            if dry_run:
+                await transaction.rollback()
+            else:
+                await transaction.commit()
+        except Exception:
+            await transaction.rollback()
+            raise
+    await engine.dispose()
+
+    destination = "dropped" if drop else f"moved to schema {ARCHIVE_SCHEMA}"
+    for name in archived:
+        print(f"{name}: {destination}")
+    print(
+        f"{len(archived)} partitions in {time.time() - start_time:.2f}s"
+        f"{', rolled back (dry run)' if dry_run else ''}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive the old order partitions.")
+    parser.add_argument(
+        "--before",
+        type=date.fromisoformat,
+        required=True,
+        help="YYYY-MM-DD, the months ending on or before it are archived",
+    )
+    parser.add_argument("--drop", action="store_true", help="drop instead of moving to archive")
+    parser.add_argument("--dry-run", action="store_true", help="list the partitions and roll back")
+    args = parser.parse_args()
+
+    if args.before > month_start(date.today()):
+        parser.error("--before is after the start of the current month")
+
+    asyncio.run(run_archive(args.before, args.drop, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from asyncio import current_task
 
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
@@ -8,14 +9,31 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, instrument_pool
+from app.monitoring.slow_query import slow_query_log
+
+
+def _create_engine() -> AsyncEngine:
+    engine = create_async_engine(
+        settings.DATABASE_URI,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        echo=settings.DB_ECHO,
+        # compiled sql per statement construct, shared by every connection
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        # server-side prepared statements kept per asyncpg connection
+        connect_args={"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+    )
+    instrument_pool(engine)
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.install(engine.sync_engine)
+    return engine
+
+
+engine = _create_engine()
 
-engine = create_async_engine(
-    settings.DATABASE_URI,
-    pool_pre_ping=True,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    echo=settings.DB_ECHO,
-)
 session_factory = async_scoped_session(
     async_sessionmaker(
         engine,
@@ -31,13 +49,14 @@ session_factory = async_scoped_session(
 async def reset_db_engine():
     global engine
     await engine.dispose()
-    engine = create_async_engine(
-        settings.DATABASE_URI,
-        pool_pre_ping=True,
-        pool_size=settings.DB_POOL_SIZE,
-        max_overflow=settings.DB_MAX_OVERFLOW,
-        echo=settings.DB_ECHO,
-    )
+    engine = _create_engine()
+    # sessions are created by the sessionmaker, it must bind the new engine
+    session_factory.session_factory.configure(bind=engine)
+
+
+def get_engine() -> AsyncEngine:
+    """The current engine, modules importing engine directly keep the one before a reset."""
+    return engine
 
 
 def get_scoped_session() -> async_scoped_session:
@@ -0,0 +1,72 @@
+"""
+Bulk import books of a bookstore from a csv or ndjson file.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/db/importer/index.py --bookstore-id {BOOKSTORE_ID} books.csv
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from uuid import UUID
+
+from app.db.db import engine, session_factory
+from app.util.book_import import IMPORT_FORMATS, guess_import_format, import_books, iter_lines
+
+CHUNK_SIZE = 1024 * 1024
+
+
+async def _iter_file_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+            yield chunk
+
+
+async def run_import(path: str, bookstore_id: UUID, file_format: str, dry_run: bool):
+    start_time = time.time()
+
+    async with session_factory() as db:
+        try:
+            report = await import_books(
+                db=db,
+                bookstore_id=bookstore_id,
+                lines=iter_lines(_iter_file_chunks(path)),
+                file_format=file_format,
+            )
+
+            if dry_run:
+                await db.rollback()
+            else:
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            await session_factory.remove()
+            await engine.dispose()
+
+    elapsed = time.time() - start_time
+    print(json.dumps(report.dict(), ensure_ascii=False, indent=2))
+    print(
+        f"{report.imported_rows} rows in {elapsed:.2f}s"
+        f" ({report.imported_rows / max(elapsed, 1e-9):.0f} rows/s)"
+        f"{', rolled back (dry run)' if dry_run else ''}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import books of a bookstore.")
+    parser.add_argument("path", help="csv (with header) or ndjson file")
+    parser.add_argument("--bookstore-id", type=UUID, required=True)
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="validate and roll back")
+    args = parser.parse_args()
+
+    file_format = args.format or guess_import_format(args.path)
+
+    asyncio.run(run_import(args.path, args.bookstore_id, file_format, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
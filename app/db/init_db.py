@@ -28,7 +28,8 @@ async def init_db(app: FastAPI) -> None:
     else:
         with open(".init_db.lock", "w") as f:
             logger.info(
-                f"Creating database initialization lock file at: {os.path.abspath('.init_db.lock')}"
+                "Creating database initialization lock file at: %s",
+                os.path.abspath(".init_db.lock"),
             )
             f.write("init_db locked")
         try:
@@ -39,8 +40,10 @@ async def init_db(app: FastAPI) -> None:
                 os.remove(".init_db.lock")
             except OSError as e:
                 logger.error(
-                    f"An error occurred while attempting to remove the database initialization"
-                    f" lock file at {os.path.abspath('.init_db.lock')}, error_msg: {e}"
+                    "An error occurred while attempting to remove the database initialization"
+                    " lock file at %s, error_msg: %s",
+                    os.path.abspath(".init_db.lock"),
+                    e,
                 )
             else:
                 logger.info("Remove lock file successfully.")
@@ -55,7 +58,7 @@ async def _install_postgres_extensions():
         async with engine.begin() as conn:
             await conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
     except Exception as e:
-        logger.error(f"database error:{e}")
+        logger.error("database error: %s", e)
         return True
     logger.info("Install extensions successfully.")
 
@@ -66,6 +69,6 @@ async def _migrate_db():
     try:
         await run_async_upgrade()
     except Exception as e:
-        logger.error(f"database error:{e}")
+        logger.error("database error: %s", e)
         return True
     logger.info("DB migrations are successful.")
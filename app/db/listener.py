@@ -0,0 +1,151 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Sequence
+
+import asyncpg
+from sqlalchemy import Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.logging.logger import get_logger
+
+logger = get_logger()
+
+NotificationHandler = Callable[[str], None]
+
+
+async def notify(db: AsyncSession, channel: str, payload: str) -> None:
+    """
+    Send a NOTIFY on the transaction of db.
+    Postgres only delivers it once the transaction commits, and drops it on rollback.
+    """
+    await db.execute(select(func.pg_notify(channel, payload)))
+
+
+async def notify_many(db: AsyncSession, channel: str, payloads: Sequence[str]) -> None:
+    """Like notify, with one NOTIFY per payload sent in a single statement."""
+    if not payloads:
+        return
+    payload_rows = (
+        func.unnest(bindparam("payloads", list(payloads), type_=ARRAY(Text)))
+        .table_valued("payload")
+        .render_derived()
+    )
+    await db.execute(select(func.pg_notify(channel, payload_rows.c.payload)))
+
+
+class PgListener:
+    """
+    One dedicated asyncpg connection per worker that LISTENs on every subscribed channel
+    and dispatches the payloads to in-process handlers.
+
+    The connection is re-established with exponential backoff when it drops. Notifications
+    sent while disconnected are lost, so reconnect handlers run after every connection to
+    let subscribers resynchronise (e.g. flush caches).
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.connected = asyncio.Event()
+
+    def subscribe(self, channel: str, handler: NotificationHandler) -> None:
+        """Channels subscribed after start() are listened on from the next (re)connection."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]) -> None:
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as err:
+                logger.error("Notification handler of channel: %s failed, error: %s", channel, err)
+
+    async def _connect(self) -> asyncpg.Connection:
+        url = make_url(str(settings.DATABASE_URI))
+        return await asyncpg.connect(
+            host=url.host,
+            port=url.port,
+            user=url.username,
+            password=url.password,
+            database=url.database,
+        )
+
+    async def _listen(self, connection: asyncpg.Connection) -> asyncio.Event:
+        """LISTEN on every subscribed channel, the returned event is set when connection closes."""
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+
+        for channel in self._handlers:
+            await connection.add_listener(channel, self._dispatch)
+
+        return closed
+
+    async def _wait_until_closed(self, connection: asyncpg.Connection, closed: asyncio.Event):
+        while not closed.is_set():
+            try:
+                await asyncio.wait_for(
+                    closed.wait(), timeout=settings.PG_LISTENER_HEALTH_CHECK_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # a silently dropped TCP connection never fires the termination listener
+                await connection.fetchval("SELECT 1", timeout=5)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = await self._connect()
+                closed = await self._listen(connection)
+                logger.info("PgListener connected, channels: %s", list(self._handlers))
+                backoff = 1.0
+
+                # only once LISTEN is in place, a notification sent before it is covered by the
+                # flush and one sent after it is delivered. Also on the first connection:
+                # requests may have been served before it.
+                for handler in self._reconnect_handlers:
+                    handler()
+                self.connected.set()
+
+                await self._wait_until_closed(connection, closed)
+                logger.warning("PgListener connection closed, reconnecting.")
+                await asyncio.sleep(backoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.error(
+                    "PgListener connection failed, retry in %.0fs, error: %s", backoff, err
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self.connected.clear()
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+
+
+pg_listener = PgListener()
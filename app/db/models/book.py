@@ -6,7 +6,7 @@ from datetime import date
 from typing import Optional, TYPE_CHECKING, List
 from uuid import UUID
 
-from sqlalchemy import Date, Text, text, String, UniqueConstraint
+from sqlalchemy import Date, Index, Text, func, literal_column, text, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.models.base import Base
@@ -14,6 +14,10 @@ from app.db.models.base import Base
 if TYPE_CHECKING:
     from app.db.models.book_bookstore_mapping import BookBookstoreMapping
 
+# the books without publish date sort as the oldest ones of their category, the keyset of a
+# category page then never compares a null
+UNKNOWN_PUBLISH_DATE = literal_column("DATE '0001-01-01'", Date)
+
 
 class Book(Base):
     """
@@ -21,7 +25,6 @@ class Book(Base):
     """
 
     __tablename__ = "book"
-    __table_args__ = (UniqueConstraint("isbn", name="uc_isbn"),)
 
     book_id: Mapped[UUID] = mapped_column(
         primary_key=True, server_default=text("gen_random_uuid()")
@@ -37,3 +40,17 @@ class Book(Base):
     book_bookstore_mappings: Mapped[List["BookBookstoreMapping"]] = relationship(
         back_populates="book"
     )
+
+    __table_args__ = (
+        UniqueConstraint("isbn", name="uc_isbn"),
+        Index(
+            "ix_book_category_publish_date",
+            category,
+            func.coalesce(publish_date, UNKNOWN_PUBLISH_DATE).desc(),
+            book_id.desc(),
+        ),
+    )
+
+
+# the sort key of ix_book_category_publish_date
+publish_date_sort_key = func.coalesce(Book.publish_date, UNKNOWN_PUBLISH_DATE)
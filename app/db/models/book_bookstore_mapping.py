@@ -5,7 +5,7 @@ Class definition for BookBookstoreMapping
 from typing import TYPE_CHECKING, List
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, Integer, text, CheckConstraint
+from sqlalchemy import ForeignKey, Integer, text, CheckConstraint, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.models.base import Base
@@ -25,7 +25,7 @@ class BookBookstoreMapping(Base):
     __tablename__ = "book_bookstore_mapping"
 
     book_bookstore_mapping_id: Mapped[UUID] = mapped_column(
-        primary_key=True, server_default=text("gen_random_uuid()")
+        primary_key=True, server_default=text("uuid_generate_v7()")
     )
     price: Mapped[int] = mapped_column(Integer, nullable=False)
     store_quantity: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -40,4 +40,5 @@ class BookBookstoreMapping(Base):
     __table_args__ = (
         CheckConstraint(price >= 0, name="price_non_negative"),
         CheckConstraint(store_quantity >= 0, name="store_quantity_non_negative"),
+        UniqueConstraint("book_id", "bookstore_id", name="uc_book_bookstore"),
     )
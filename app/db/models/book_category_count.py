@@ -0,0 +1,20 @@
+"""
+Class definition for BookCategoryCount
+"""
+
+from sqlalchemy import Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+
+class BookCategoryCount(Base):
+    """
+    ORM class for book_category_count, the number of books of every category. Kept up to date by
+    the triggers on book, a category listing reads one row per category instead of every book.
+    """
+
+    __tablename__ = "book_category_count"
+
+    category: Mapped[str] = mapped_column(Text, primary_key=True)
+    book_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -23,7 +23,7 @@ class CartItem(Base):
     __tablename__ = "cart_item"
 
     cart_item_id: Mapped[UUID] = mapped_column(
-        primary_key=True, server_default=text("gen_random_uuid()")
+        primary_key=True, server_default=text("uuid_generate_v7()")
     )
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
 
@@ -0,0 +1,37 @@
+"""
+Class definition for IdempotencyKey
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    ORM class for idempotency_key, the response of a POST request stored under the key sent
+    with it, a retry with the same key gets the stored response instead of running again
+    """
+
+    __tablename__ = "idempotency_key"
+
+    customer_account: Mapped[str] = mapped_column(
+        ForeignKey("customer.account"), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(Text, primary_key=True)
+    endpoint: Mapped[str] = mapped_column(Text, nullable=False)
+    # null until the request that claimed the key commits
+    status_code: Mapped[Optional[int]] = mapped_column(Integer)
+    response_location: Mapped[Optional[str]] = mapped_column(Text)
+    # none_as_null: None is stored as sql NULL, not as the json null
+    response_body: Mapped[Optional[Any]] = mapped_column(JSONB(none_as_null=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (Index("ix_idempotency_key_created_at", created_at),)
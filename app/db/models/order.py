@@ -2,13 +2,23 @@
 Class definition for Order
 """
 
-from datetime import date
+from datetime import date, datetime
 from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID
 
-from sqlalchemy import Date, ForeignKey, Integer, Text, text, CHAR, CheckConstraint
+from sqlalchemy import (
+    CHAR,
+    CheckConstraint,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from app.enum.order import OrderStatus
+from app.enum.order import OPEN_ORDER_STATUSES, OrderStatus
 
 from app.db.models.base import Base
 
@@ -16,6 +26,7 @@ if TYPE_CHECKING:
     from app.db.models.customer import Customer
     from app.db.models.order_item import OrderItem
     from app.db.models.coupon import Coupon
+    from app.db.models.order_status_history import OrderStatusHistory
 
 
 class Order(Base):
@@ -26,9 +37,10 @@ class Order(Base):
     __tablename__ = "order_"
 
     order_id: Mapped[UUID] = mapped_column(
-        primary_key=True, server_default=text("gen_random_uuid()")
+        primary_key=True, server_default=text("uuid_generate_v7()")
     )
-    order_time: Mapped[date] = mapped_column(Date, nullable=False)
+    # the partition key of order_, part of the primary key
+    order_time: Mapped[date] = mapped_column(Date, primary_key=True)
     customer_name: Mapped[str] = mapped_column(Text, nullable=False)
     customer_phone_number: Mapped[str] = mapped_column(CHAR(10), nullable=False)
     customer_email: Mapped[Optional[str]] = mapped_column(Text)
@@ -40,12 +52,37 @@ class Order(Base):
 
     coupon_id: Mapped[Optional[UUID]] = mapped_column(ForeignKey("coupon.coupon_id"))
     customer_account: Mapped[str] = mapped_column(ForeignKey("customer.account"), nullable=False)
+    # every order is placed at a single bookstore, nullable for the orders placed before
+    bookstore_id: Mapped[Optional[UUID]] = mapped_column(ForeignKey("bookstore.bookstore_id"))
+    # the staff handling the order, released by the next status update
+    claimed_by: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("staff.account", ondelete="SET NULL")
+    )
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     customer: Mapped["Customer"] = relationship(back_populates="orders")
     order_items: Mapped[List["OrderItem"]] = relationship(back_populates="order")
     coupon: Mapped["Coupon"] = relationship(back_populates="orders")
+    status_history: Mapped[List["OrderStatusHistory"]] = relationship(
+        back_populates="order",
+        primaryjoin="Order.order_id == foreign(OrderStatusHistory.order_id)",
+        order_by="OrderStatusHistory.changed_at",
+    )
 
     __table_args__ = (
         CheckConstraint(total_price >= 0, name="total_price_non_negative"),
         CheckConstraint(shipping_fee >= 0, name="shipping_fee_non_negative"),
+        # the staff queue only reads open orders, closed ones are left out of the index
+        Index(
+            "ix_order_open",
+            bookstore_id,
+            status,
+            order_time,
+            order_id,
+            postgresql_where=status.in_([str(s) for s in OPEN_ORDER_STATUSES]),
+        ),
+        Index("ix_order_bookstore_id", bookstore_id, order_time),
+        Index("ix_order_customer_account", customer_account, order_time),
+        # monthly partitions, see app/db/partition.py
+        {"postgresql_partition_by": "RANGE (order_time)"},
     )
@@ -2,10 +2,11 @@
 Class definition for OrderItem
 """
 
+from datetime import date
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, Integer, text, CheckConstraint
+from sqlalchemy import Date, ForeignKey, ForeignKeyConstraint, Index, Integer, text, CheckConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.models.base import Base
@@ -23,12 +24,14 @@ class OrderItem(Base):
     __tablename__ = "order_item"
 
     order_item_id: Mapped[UUID] = mapped_column(
-        primary_key=True, server_default=text("gen_random_uuid()")
+        primary_key=True, server_default=text("uuid_generate_v7()")
     )
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     price: Mapped[int] = mapped_column(Integer)
 
-    order_id: Mapped[UUID] = mapped_column(ForeignKey("order_.order_id"))
+    order_id: Mapped[UUID] = mapped_column()
+    # order_time of the order, the partition key of order_item
+    order_time: Mapped[date] = mapped_column(Date, primary_key=True)
     book_bookstore_mapping_id: Mapped[UUID] = mapped_column(
         ForeignKey("book_bookstore_mapping.book_bookstore_mapping_id")
     )
@@ -41,4 +44,8 @@ class OrderItem(Base):
     __table_args__ = (
         CheckConstraint(quantity >= 0, name="quantity_non_negative"),
         CheckConstraint(price >= 0, name="price_non_negative"),
+        ForeignKeyConstraint([order_id, order_time], ["order_.order_id", "order_.order_time"]),
+        Index("ix_order_item_order_id", order_id, order_time),
+        # monthly partitions, see app/db/partition.py
+        {"postgresql_partition_by": "RANGE (order_time)"},
     )
@@ -0,0 +1,46 @@
+"""
+Class definition for OrderStatusHistory
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, Index, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.models.base import Base
+from app.enum.order import OrderStatus
+
+if TYPE_CHECKING:
+    from app.db.models.order import Order
+
+
+class OrderStatusHistory(Base):
+    """
+    ORM class for order_status_history, append-only: one row per status change of an order
+    """
+
+    __tablename__ = "order_status_history"
+
+    history_id: Mapped[UUID] = mapped_column(
+        primary_key=True, server_default=text("uuid_generate_v7()")
+    )
+    # no foreign key, it would keep the partitions of order_ from being detached
+    order_id: Mapped[UUID] = mapped_column(nullable=False)
+    # null for the creation of the order
+    from_status: Mapped[Optional[OrderStatus]] = mapped_column(Text)
+    to_status: Mapped[OrderStatus] = mapped_column(Text, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # the account of the staff who changed the status, null for the customer placing the order.
+    # no foreign key, the history keeps the account after the staff is deleted
+    changed_by: Mapped[Optional[str]] = mapped_column(Text)
+
+    order: Mapped["Order"] = relationship(
+        back_populates="status_history",
+        primaryjoin="Order.order_id == foreign(OrderStatusHistory.order_id)",
+    )
+
+    __table_args__ = (Index("ix_order_status_history_order_id", order_id, changed_at),)
@@ -0,0 +1,48 @@
+"""
+Class definition for OutboxMessage
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, Index, Integer, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+
+class OutboxMessage(Base):
+    """
+    ORM class for outbox_message, side effects written in the transaction that causes them
+    and delivered afterwards by the outbox worker
+    """
+
+    __tablename__ = "outbox_message"
+
+    message_id: Mapped[UUID] = mapped_column(
+        primary_key=True, server_default=text("uuid_generate_v7()")
+    )
+    topic: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # next delivery attempt, pushed forward while a worker holds the message
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # set once the attempts are exhausted, the message is kept for inspection
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_message_pending",
+            available_at,
+            postgresql_where=(delivered_at.is_(None) & failed_at.is_(None)),
+        ),
+    )
@@ -1,13 +1,16 @@
 from uuid import UUID
 from datetime import date
+from typing import Optional, Sequence, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, true, tuple_
 
 from app.db.models.book_bookstore_mapping import BookBookstoreMapping
+from app.db.models.book_category_count import BookCategoryCount
 from app.db.models.bookstore import Bookstore
-from app.db.models.book import Book
+from app.db.models.book import Book, publish_date_sort_key
+from app.util.cache import bump_catalog_version
 
 async def list_books_by_bookstore_id(db: AsyncSession, bookstore_id: UUID):
     query = (
@@ -33,9 +36,71 @@ async def list_books_by_bookstore_id(db: AsyncSession, bookstore_id: UUID):
 
 
 async def get_all_categories(db: AsyncSession):
-    stmt = select(Book.category).distinct()
+    stmt = (
+        select(BookCategoryCount.category)
+        .where(BookCategoryCount.book_count > 0)
+        .order_by(BookCategoryCount.category)
+    )
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_category_counts(db: AsyncSession):
+    """(category, book_count) of every category with books, one row per category is read."""
+    stmt = (
+        select(BookCategoryCount.category, BookCategoryCount.book_count)
+        .where(BookCategoryCount.book_count > 0)
+        .order_by(BookCategoryCount.category)
+    )
     result = await db.execute(stmt)
-    return [row[0] for row in result.all() if row[0]]
+    return list(result.all())
+
+
+async def list_books_by_category(
+    db: AsyncSession,
+    category: str,
+    after: Optional[Tuple[date, UUID]] = None,
+    limit: int = 24,
+    bookstore_id: Optional[UUID] = None,
+):
+    """
+    One page of the books of a category, newest first, with the cheapest offer of each book. The
+    books are read in the order of ix_book_category_publish_date and the next page starts after
+    the (sort_key, book_id) of the last book of this one.
+    Every book of the category is listed, as counted in book_category_count, a book with no
+    offer has a null price and bookstore_id. With bookstore_id only the books it sells are.
+    """
+    offer = select(BookBookstoreMapping.price, BookBookstoreMapping.bookstore_id).where(
+        BookBookstoreMapping.book_id == Book.book_id
+    )
+    if bookstore_id is not None:
+        offer = offer.where(BookBookstoreMapping.bookstore_id == bookstore_id)
+    offer = offer.order_by(BookBookstoreMapping.price).limit(1).lateral("offer")
+
+    query = (
+        select(
+            Book.book_id,
+            Book.title,
+            Book.author,
+            Book.publisher,
+            Book.isbn,
+            Book.category,
+            Book.publish_date,
+            publish_date_sort_key.label("sort_key"),
+            offer.c.price,
+            offer.c.bookstore_id,
+        )
+        .join(offer, true(), isouter=bookstore_id is None)
+        .where(Book.category == category)
+        .order_by(publish_date_sort_key.desc(), Book.book_id.desc())
+        .limit(limit)
+    )
+
+    if after is not None:
+        query = query.where(tuple_(publish_date_sort_key, Book.book_id) < tuple_(*after))
+
+    result = await db.execute(query)
+    return list(result.all())
 
 
 async def get_new_arrivals(db: AsyncSession, limit: int = 5):
@@ -59,6 +124,59 @@ async def search_books(db: AsyncSession, keyword: str):
     
 
 
+# the columns of book a catalog client can pick with fields=, book_id is always read
+BOOK_FIELDS = {
+    "title": Book.title,
+    "author": Book.author,
+    "publisher": Book.publisher,
+    "isbn": Book.isbn,
+    "category": Book.category,
+    "series": Book.series,
+    "publish_date": Book.publish_date,
+}
+
+
+async def list_books_page(
+    db: AsyncSession,
+    fields: Sequence[str],
+    after_book_id: Optional[UUID] = None,
+    limit: int = 50,
+    category: Optional[str] = None,
+    keyword: Optional[str] = None,
+):
+    """
+    One page of books ordered by book_id with only the requested columns. The next page starts
+    after the last book_id of this one (keyset pagination), no OFFSET rows are read and skipped.
+    """
+    query = (
+        select(Book.book_id, *(BOOK_FIELDS[field] for field in fields))
+        .order_by(Book.book_id)
+        .limit(limit)
+    )
+
+    if after_book_id is not None:
+        query = query.where(Book.book_id > after_book_id)
+
+    if category is not None:
+        query = query.where(Book.category == category)
+
+    if keyword:
+        query = query.where(
+            or_(Book.title.ilike(f"%{keyword}%"), Book.author.ilike(f"%{keyword}%"))
+        )
+
+    result = await db.execute(query)
+    return list(result.all())
+
+
+async def get_book_fields(db: AsyncSession, book_id: UUID, fields: Sequence[str]):
+    query = select(Book.book_id, *(BOOK_FIELDS[field] for field in fields)).where(
+        Book.book_id == book_id
+    )
+    result = await db.execute(query)
+    return result.one_or_none()
+
+
 async def get_book_by_isbn(db: AsyncSession, isbn: str):
     query = select(Book).where(Book.isbn == isbn)
     result = await db.execute(query)
@@ -87,5 +205,7 @@ async def create_book(
 
     result = await db.execute(query)
 
+    await bump_catalog_version(db)
+
     return result.scalars().one()
 
@@ -0,0 +1,97 @@
+from typing import List, Tuple
+from uuid import UUID
+
+from sqlalchemy import Boolean, Column, Date, Integer, MetaData, String, Table, Text, func, literal
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.book import Book
+from app.db.models.book_bookstore_mapping import BookBookstoreMapping
+from app.util.cache import bump_catalog_version
+
+# not part of Base.metadata, alembic must not create it
+_staging_metadata = MetaData()
+
+book_import_staging = Table(
+    "book_import_staging",
+    _staging_metadata,
+    Column("line_no", Integer, nullable=False),
+    Column("isbn", String(17), nullable=False),
+    Column("title", Text, nullable=False),
+    Column("author", Text, nullable=False),
+    Column("publisher", Text, nullable=False),
+    Column("category", Text),
+    Column("series", Text),
+    Column("publish_date", Date),
+    Column("price", Integer, nullable=False),
+    Column("store_quantity", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+BOOK_IMPORT_COLUMNS = tuple(c.name for c in book_import_staging.columns)
+
+StagingRecord = Tuple
+
+
+async def create_book_import_staging(db: AsyncSession):
+    """Create the staging table, it lives until the transaction of db ends."""
+    conn = await db.connection()
+    await conn.run_sync(book_import_staging.create)
+
+
+async def copy_book_import_records(db: AsyncSession, records: List[StagingRecord]):
+    """COPY records, ordered as BOOK_IMPORT_COLUMNS, into the staging table."""
+    conn = await db.connection()
+    raw_conn = await conn.get_raw_connection()
+    await raw_conn.driver_connection.copy_records_to_table(
+        book_import_staging.name, records=records, columns=BOOK_IMPORT_COLUMNS
+    )
+
+
+async def apply_book_import(db: AsyncSession, bookstore_id: UUID):
+    """
+    Apply the staging table with two set-based statements:
+    insert the unknown books, then upsert the price and stock of the bookstore.
+    """
+    staging = book_import_staging.c
+    book_columns = ["title", "author", "publisher", "isbn", "category", "series", "publish_date"]
+
+    insert_books = (
+        insert(Book)
+        .from_select(book_columns, select(*[staging[name] for name in book_columns]))
+        .on_conflict_do_nothing(index_elements=[Book.isbn])
+        .returning(Book.book_id)
+    ).cte("inserted_books")
+    result = await db.execute(select(func.count()).select_from(insert_books))
+    created_books = result.scalar_one()
+
+    insert_mappings = insert(BookBookstoreMapping).from_select(
+        ["book_id", "bookstore_id", "price", "store_quantity"],
+        select(Book.book_id, literal(bookstore_id), staging.price, staging.store_quantity).join(
+            book_import_staging, staging.isbn == Book.isbn
+        ),
+    )
+    upsert_mappings = (
+        insert_mappings.on_conflict_do_update(
+            constraint="uc_book_bookstore",
+            set_={
+                "price": insert_mappings.excluded.price,
+                "store_quantity": insert_mappings.excluded.store_quantity,
+            },
+        )
+        # xmax is 0 for freshly inserted rows and set for the updated ones
+        .returning(literal_column("xmax = 0", Boolean).label("created"))
+    ).cte("upserted")
+
+    query = select(
+        func.count().filter(upsert_mappings.c.created),
+        func.count().filter(~upsert_mappings.c.created),
+    )
+    result = await db.execute(query)
+    created_mappings, updated_mappings = result.one()
+
+    await bump_catalog_version(db)
+
+    return created_books, created_mappings, updated_mappings
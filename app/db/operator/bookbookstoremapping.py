@@ -1,10 +1,12 @@
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List, Sequence, Tuple, Set
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, update, insert, delete, or_
+from sqlalchemy import select, and_, update, insert, delete, or_, values, column, func, cast
+from sqlalchemy import Integer, Uuid, bindparam
 from app.db.models.book_bookstore_mapping import BookBookstoreMapping
 from app.db.models.bookstore import Bookstore
 from app.db.models.book import Book
+from app.util.cache import bump_catalog_version, cached, get_catalog_version
 
 
 async def get_book_mapping_by_mapping_id(
@@ -17,16 +19,20 @@ async def get_book_mapping_by_mapping_id(
     return result.scalars().one_or_none()
 
 
+_book_mapping_query = select(BookBookstoreMapping).where(
+    and_(
+        BookBookstoreMapping.book_id == bindparam("book_id"),
+        BookBookstoreMapping.bookstore_id == bindparam("bookstore_id"),
+    )
+)
+
+
 async def get_book_mapping(
     db: AsyncSession, book_id: UUID, bookstore_id: UUID
 ) -> Optional[BookBookstoreMapping]:
-    stmt = select(BookBookstoreMapping).where(
-        and_(
-            BookBookstoreMapping.book_id == book_id,
-            BookBookstoreMapping.bookstore_id == bookstore_id,
-        )
+    result = await db.execute(
+        _book_mapping_query, {"book_id": book_id, "bookstore_id": bookstore_id}
     )
-    result = await db.execute(stmt)
     return result.scalars().first()
 
 
@@ -54,6 +60,8 @@ async def create_book_bookstore_mapping(
 
     result = await db.execute(query)
 
+    await bump_catalog_version(db)
+
     return result.scalar_one()
 
 
@@ -80,9 +88,57 @@ async def update_book_bookstore_mapping(
 
     result = await db.execute(query)
 
+    await bump_catalog_version(db)
+
     return result.scalar_one()
 
 
+async def bulk_update_book_bookstore_mappings(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    updates: List[Tuple[UUID, Optional[int], Optional[int]]],
+) -> Set[UUID]:
+    """
+    Apply (book_bookstore_mapping_id, price, store_quantity) updates with one
+    UPDATE ... FROM (VALUES ...) scoped to the bookstore. None keeps the current value.
+    Return the ids that were updated.
+    """
+    if not updates:
+        return set()
+
+    new_values = values(
+        column("book_bookstore_mapping_id", Uuid),
+        column("price", Integer),
+        column("store_quantity", Integer),
+        name="new_values",
+    ).data(updates)
+
+    query = (
+        update(BookBookstoreMapping)
+        .where(
+            BookBookstoreMapping.book_bookstore_mapping_id
+            == new_values.c.book_bookstore_mapping_id,
+            BookBookstoreMapping.bookstore_id == bookstore_id,
+        )
+        .values(
+            # a column of only NULLs in VALUES is typed as text, cast it back
+            price=func.coalesce(cast(new_values.c.price, Integer), BookBookstoreMapping.price),
+            store_quantity=func.coalesce(
+                cast(new_values.c.store_quantity, Integer), BookBookstoreMapping.store_quantity
+            ),
+        )
+        .returning(BookBookstoreMapping.book_bookstore_mapping_id)
+    )
+
+    result = await db.execute(query)
+    updated_ids = set(result.scalars().all())
+
+    if updated_ids:
+        await bump_catalog_version(db)
+
+    return updated_ids
+
+
 async def delete_book_bookstore_mapping(
     db: AsyncSession,
     book_bookstore_mapping_id: UUID,
@@ -95,6 +151,8 @@ async def delete_book_bookstore_mapping(
 
     result = await db.execute(query)
 
+    await bump_catalog_version(db)
+
     return result.scalars().one()
 
 
@@ -126,6 +184,28 @@ async def get_new_arrivals_with_mappings(db: AsyncSession, limit: int = 10):
     return result.all()  # 回傳 list of (Book, BookBookstoreMapping) tuples
 
 
+async def get_offers_by_book_ids(db: AsyncSession, book_ids: Sequence[UUID]):
+    """Price and stock of the books at every bookstore, in one query for a page of books."""
+    if not book_ids:
+        return []
+
+    stmt = (
+        select(
+            BookBookstoreMapping.book_id,
+            BookBookstoreMapping.book_bookstore_mapping_id,
+            BookBookstoreMapping.bookstore_id,
+            Bookstore.name.label("bookstore_name"),
+            BookBookstoreMapping.price,
+            BookBookstoreMapping.store_quantity,
+        )
+        .join(Bookstore, BookBookstoreMapping.bookstore_id == Bookstore.bookstore_id)
+        .where(BookBookstoreMapping.book_id.in_(book_ids))
+        .order_by(BookBookstoreMapping.book_id, BookBookstoreMapping.price)
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
 async def get_book_display_data(db: AsyncSession, book):
     # 查詢該書的 mapping，依價格低到高排序，取第一筆 (最低價)
     stmt = (
@@ -147,13 +227,28 @@ async def get_book_display_data(db: AsyncSession, book):
     }
 
 
+# 書籍在各書店的販售資訊，回傳欄位而非 ORM instance，結果可以安全地被快取與共用
+_bookstore_book_columns = (
+    Book.book_id,
+    Book.title,
+    Book.author,
+    Book.publisher,
+    Book.isbn,
+    Book.category,
+    Book.publish_date,
+    BookBookstoreMapping.price,
+    Bookstore.bookstore_id,
+    Bookstore.name.label("bookstore_name"),
+)
+
+
 async def search_books_with_bookstore_details(db: AsyncSession, keyword: str):
     """
-    搜尋書籍，並回傳 (Book, Mapping, Bookstore) 的組合。
+    搜尋書籍，並回傳書籍與書店欄位的組合。
     這樣可以顯示同一本書在不同書店的價格與資訊。
     """
     stmt = (
-        select(Book, BookBookstoreMapping, Bookstore)
+        select(*_bookstore_book_columns)
         .join(BookBookstoreMapping, Book.book_id == BookBookstoreMapping.book_id)
         .join(Bookstore, BookBookstoreMapping.bookstore_id == Bookstore.bookstore_id)
         .where(or_(Book.title.ilike(f"%{keyword}%"), Book.author.ilike(f"%{keyword}%")))
@@ -168,7 +263,7 @@ async def get_new_arrivals_with_bookstore_details(db: AsyncSession, limit: int =
     取得最新上架書籍，並包含書店資訊。
     """
     stmt = (
-        select(Book, BookBookstoreMapping, Bookstore)
+        select(*_bookstore_book_columns)
         .join(BookBookstoreMapping, Book.book_id == BookBookstoreMapping.book_id)
         .join(Bookstore, BookBookstoreMapping.bookstore_id == Bookstore.bookstore_id)
         .order_by(Book.publish_date.desc())
@@ -176,3 +271,24 @@ async def get_new_arrivals_with_bookstore_details(db: AsyncSession, limit: int =
     )
     result = await db.execute(stmt)
     return result.all()
+
+
+@cached(ttl=60, stale_ttl=300, version=get_catalog_version)
+async def get_category_counts_by_bookstore(db: AsyncSession, category: str):
+    """
+    各書店在此分類下販售的書籍數量 (bookstore_id, bookstore_name, book_count)。
+    """
+    stmt = (
+        select(
+            Bookstore.bookstore_id,
+            Bookstore.name.label("bookstore_name"),
+            func.count().label("book_count"),
+        )
+        .join(BookBookstoreMapping, Bookstore.bookstore_id == BookBookstoreMapping.bookstore_id)
+        .join(Book, BookBookstoreMapping.book_id == Book.book_id)
+        .where(Book.category == category)
+        .group_by(Bookstore.bookstore_id, Bookstore.name)
+        .order_by(Bookstore.name)
+    )
+    result = await db.execute(stmt)
+    return result.all()
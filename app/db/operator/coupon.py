@@ -10,6 +10,9 @@ from app.db.models.coupon import Coupon
 from app.enum.coupon import CouponType
 from app.enum.user import UserRole
 from app.db.models.staff import Staff
+from app.util.cache import cached, invalidate_on_commit
+
+COUPON_CACHE_TOPIC = "coupon"
 
 
 async def get_coupon_by_id(db: AsyncSession, coupon_id: UUID):
@@ -18,16 +21,29 @@ async def get_coupon_by_id(db: AsyncSession, coupon_id: UUID):
     return result.scalars().one_or_none()
 
 
+@cached(ttl=30, stale_ttl=60, topic=COUPON_CACHE_TOPIC)
 async def get_active_admin_coupons(db: AsyncSession):
+    """
+    Rows of the coupon columns, not Coupon instances: the cached result is shared by every
+    request, an ORM instance would be detached from the session that loaded it.
+    """
     stmt = (
-        select(Coupon)
+        select(
+            Coupon.coupon_id,
+            Coupon.name,
+            Coupon.type,
+            Coupon.discount_percentage,
+            Coupon.start_date,
+            Coupon.end_date,
+            Coupon.admin_account,
+            Coupon.staff_account,
+        )
         .where(Coupon.admin_account.is_not(None))
         .where(Coupon.start_date <= date.today())
         .where((Coupon.end_date.is_(None)) | (Coupon.end_date > date.today()))
-        .options(joinedload(Coupon.admin))
     )
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
 
 
 async def get_active_bookstore_coupons(db: AsyncSession):
@@ -68,6 +84,9 @@ async def create_coupon(
     query = insert(Coupon).values(values).returning(Coupon)
 
     result = await db.execute(query)
+
+    await invalidate_on_commit(db, COUPON_CACHE_TOPIC)
+
     return result.scalars().one()
 
 
@@ -106,5 +125,8 @@ async def get_all_coupons(db: AsyncSession):
 async def delete_coupon(db: AsyncSession, coupon_id: UUID):
     query = delete(Coupon).where(Coupon.coupon_id == coupon_id).returning(Coupon)
     result = await db.execute(query)
+
+    await invalidate_on_commit(db, COUPON_CACHE_TOPIC)
+
     return result.scalars().one_or_none()
 
@@ -2,12 +2,15 @@ from typing import Optional
 from app.db.models.customer import Customer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select, update, delete 
+from sqlalchemy import select, update, delete, bindparam
+
+
+# built once, runs on every customer request through validate_token_by_role
+_customer_by_account_query = select(Customer).where(Customer.account == bindparam("account"))
 
 
 async def get_customer_by_account(db: AsyncSession, account: str):
-    query = select(Customer).where(Customer.account == account)
-    result = await db.execute(query)
+    result = await db.execute(_customer_by_account_query, {"account": account})
     return result.scalars().one()
 
 
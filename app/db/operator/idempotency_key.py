@@ -0,0 +1,83 @@
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.idempotency_key import IdempotencyKey
+
+
+async def claim_idempotency_key(
+    db: AsyncSession, customer_account: str, key: str, endpoint: str, ttl: timedelta
+) -> bool:
+    """
+    Insert the key in the caller's transaction, an expired key is taken over. Return False if
+    the key is already used: a concurrent request with the same key waits on the primary key
+    until the first one commits or rolls back, a rollback releases the key.
+    """
+    query = (
+        insert(IdempotencyKey)
+        .values(customer_account=customer_account, key=key, endpoint=endpoint)
+        .on_conflict_do_update(
+            index_elements=[IdempotencyKey.customer_account, IdempotencyKey.key],
+            set_={
+                "endpoint": endpoint,
+                "status_code": None,
+                "response_location": None,
+                "response_body": None,
+                "created_at": func.now(),
+            },
+            where=IdempotencyKey.created_at < func.now() - ttl,
+        )
+        .returning(IdempotencyKey.key)
+    )
+    result = await db.execute(query)
+    return result.scalar_one_or_none() is not None
+
+
+async def get_idempotency_key(
+    db: AsyncSession, customer_account: str, key: str
+) -> Optional[IdempotencyKey]:
+    query = select(IdempotencyKey).where(
+        IdempotencyKey.customer_account == customer_account, IdempotencyKey.key == key
+    )
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def save_idempotency_response(
+    db: AsyncSession,
+    customer_account: str,
+    key: str,
+    status_code: int,
+    response_location: Optional[str] = None,
+    response_body: Optional[Any] = None,
+) -> None:
+    query = (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.customer_account == customer_account, IdempotencyKey.key == key)
+        .values(
+            status_code=status_code,
+            response_location=response_location,
+            response_body=response_body,
+        )
+    )
+    await db.execute(query)
+
+
+async def delete_expired_idempotency_keys(
+    db: AsyncSession, ttl: timedelta, batch_size: int
+) -> int:
+    """Delete up to batch_size expired keys, the keys locked by a retry are skipped."""
+    expired_keys = (
+        select(IdempotencyKey.customer_account, IdempotencyKey.key)
+        .where(IdempotencyKey.created_at < func.now() - ttl)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    query = delete(IdempotencyKey).where(
+        tuple_(IdempotencyKey.customer_account, IdempotencyKey.key).in_(expired_keys)
+    )
+    result = await db.execute(query)
+    return result.rowcount
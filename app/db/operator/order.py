@@ -1,13 +1,31 @@
+from datetime import date, timedelta
+from typing import AsyncIterator, List, Optional, Sequence
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, insert
+from sqlalchemy import select, update, insert, func, distinct, or_, literal_column, Row
+from sqlalchemy import Text, Uuid, any_, bindparam, literal
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import selectinload, joinedload
 
 from app.db.models.order import Order
 from app.db.models.order_item import OrderItem
+from app.db.models.book import Book
 from app.db.models.book_bookstore_mapping import BookBookstoreMapping
-from app.enum.order import OrderStatus
+from app.db.models.order_status_history import OrderStatusHistory
+from app.db.listener import notify, notify_many
+from app.enum.order import OPEN_ORDER_STATUSES, PREVIOUS_ORDER_STATUS, OrderStatus
+from app.util.order_events import (
+    ORDER_QUEUE_CHANNEL,
+    ORDER_STATUS_CHANNEL,
+    order_queue_payload,
+    order_status_payload,
+)
+
+# inlined status literals instead of bind parameters, otherwise the generic plan of the
+# prepared statement cannot prove the predicate of the partial index ix_order_open
+_open_status_filter = Order.status.in_([literal_column(f"'{s}'") for s in OPEN_ORDER_STATUSES])
+_received_status_filter = Order.status == literal_column(f"'{OrderStatus.RECEIVED}'")
 
 
 async def get_orders_by_customer_account(db: AsyncSession, customer_account: str):
@@ -26,11 +44,13 @@ async def get_orders_by_customer_account(db: AsyncSession, customer_account: str
     )
 
     option_2 = joinedload(Order.coupon)
+    option_3 = selectinload(Order.status_history)
     query = (
         select(Order)
         .where(Order.customer_account == customer_account)
         .options(option_1)
         .options(option_2)
+        .options(option_3)
     )
     result = await db.execute(query)
     return list(result.scalars().all())
@@ -41,29 +61,69 @@ async def create_order(db: AsyncSession, order: Order) -> Order:
 
     await db.flush()
 
+    await db.execute(
+        insert(OrderStatusHistory).values(order_id=order.order_id, to_status=order.status)
+    )
+
+    if order.bookstore_id is not None:
+        await notify(
+            db,
+            ORDER_QUEUE_CHANNEL,
+            order_queue_payload(order.bookstore_id, order.order_id, "created", order.status),
+        )
+
     return order
 
 
 async def create_order_item(
-    db: AsyncSession, order_id: UUID, mapping_id: UUID, quantity: int, price: int
+    db: AsyncSession,
+    order_id: UUID,
+    order_time: date,
+    mapping_id: UUID,
+    quantity: int,
+    price: int,
 ):
     stmt = insert(OrderItem).values(
-        order_id=order_id, book_bookstore_mapping_id=mapping_id, quantity=quantity, price=price
+        order_id=order_id,
+        order_time=order_time,
+        book_bookstore_mapping_id=mapping_id,
+        quantity=quantity,
+        price=price,
     )
     await db.execute(stmt)
 
 
-async def get_orders_by_bookstore_id(db: AsyncSession, bookstore_id: UUID):
+def _order_time_filters(
+    start_date: Optional[date], end_date: Optional[date], order_time=Order.order_time
+) -> list:
+    """
+    Inclusive order_time range, an unset bound is open. order_ and order_item are partitioned
+    on order_time, the bounds prune the partitions outside of the range.
+    """
+    filters = []
 
-    order_ids_cte = (
-        select(OrderItem.order_id)
-        .join(
-            BookBookstoreMapping,
-            OrderItem.book_bookstore_mapping_id == BookBookstoreMapping.book_bookstore_mapping_id,
-        )
-        .where(BookBookstoreMapping.bookstore_id == bookstore_id)
-        .group_by(OrderItem.order_id)
-    ).cte()
+    if start_date is not None:
+        filters.append(order_time >= start_date)
+
+    if end_date is not None:
+        filters.append(order_time <= end_date)
+
+    return filters
+
+
+def _bookstore_order_filters(
+    bookstore_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> list:
+    """WHERE clauses on Order for the orders of a bookstore, optionally within a date range."""
+    return [Order.bookstore_id == bookstore_id, *_order_time_filters(start_date, end_date)]
+
+
+async def get_orders_by_bookstore_id(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
 
     options = (
         # 1. Order.order_items (TO-MANY collection) -> CORRECT: selectinload
@@ -78,12 +138,242 @@ async def get_orders_by_bookstore_id(db: AsyncSession, bookstore_id: UUID):
         )
     )
 
-    query = select(Order).where(Order.order_id.in_(select(order_ids_cte))).options(options)
+    query = (
+        select(Order)
+        .where(*_bookstore_order_filters(bookstore_id, start_date, end_date))
+        .options(options)
+    )
 
     result = await db.execute(query)
     return list(result.scalars().all())
 
 
-async def update_order(db: AsyncSession, order_id: UUID, order_status: OrderStatus):
-    query = update(Order).where(Order.order_id == order_id).values(status=order_status)
-    await db.execute(query)
+async def stream_orders_by_bookstore_id(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield batches of order rows from a server-side cursor."""
+    query = (
+        select(
+            Order.order_id,
+            Order.order_time,
+            Order.status,
+            Order.customer_account,
+            Order.customer_name,
+            Order.customer_phone_number,
+            Order.customer_email,
+            Order.recipient_name,
+            Order.shipping_address,
+            Order.shipping_fee,
+            Order.total_price,
+            Order.coupon_id,
+        )
+        .where(*_bookstore_order_filters(bookstore_id, start_date, end_date))
+        .order_by(Order.order_time, Order.order_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_order_items_by_bookstore_id(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield batches of the bookstore's order item rows from a server-side cursor."""
+    query = (
+        select(
+            Order.order_id,
+            Order.order_time,
+            Order.status,
+            OrderItem.order_item_id,
+            Book.isbn,
+            Book.title,
+            OrderItem.quantity,
+            OrderItem.price,
+            (OrderItem.quantity * OrderItem.price).label("subtotal"),
+        )
+        .join(
+            OrderItem,
+            (OrderItem.order_id == Order.order_id) & (OrderItem.order_time == Order.order_time),
+        )
+        .join(
+            BookBookstoreMapping,
+            OrderItem.book_bookstore_mapping_id == BookBookstoreMapping.book_bookstore_mapping_id,
+        )
+        .join(Book, Book.book_id == BookBookstoreMapping.book_id)
+        .where(
+            BookBookstoreMapping.bookstore_id == bookstore_id,
+            *_order_time_filters(start_date, end_date),
+            # range bounds are not carried over the join, repeated for order_item pruning
+            *_order_time_filters(start_date, end_date, OrderItem.order_time),
+        )
+        .order_by(Order.order_time, Order.order_id, OrderItem.order_item_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_sales_by_bookstore_id(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield batches of the bookstore's daily sales (orders, books sold, revenue)."""
+    query = (
+        select(
+            Order.order_time.label("date"),
+            func.count(distinct(Order.order_id)).label("orders"),
+            func.sum(OrderItem.quantity).label("books_sold"),
+            func.sum(OrderItem.quantity * OrderItem.price).label("revenue"),
+        )
+        .join(
+            OrderItem,
+            (OrderItem.order_id == Order.order_id) & (OrderItem.order_time == Order.order_time),
+        )
+        .join(
+            BookBookstoreMapping,
+            OrderItem.book_bookstore_mapping_id == BookBookstoreMapping.book_bookstore_mapping_id,
+        )
+        .where(
+            BookBookstoreMapping.bookstore_id == bookstore_id,
+            *_order_time_filters(start_date, end_date),
+            *_order_time_filters(start_date, end_date, OrderItem.order_time),
+        )
+        .group_by(Order.order_time)
+        .order_by(Order.order_time)
+        .execution_options(yield_per=batch_size)
+    )
+
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def get_open_orders_by_bookstore_id(db: AsyncSession, bookstore_id: UUID, limit: int = 200):
+    """The bookstore's order queue, oldest first, read from the partial index ix_order_open."""
+    query = (
+        select(Order)
+        .where(Order.bookstore_id == bookstore_id, _open_status_filter)
+        .order_by(Order.order_time, Order.order_id)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def claim_next_order(
+    db: AsyncSession, bookstore_id: UUID, staff_account: str, claim_timeout: timedelta
+) -> Optional[UUID]:
+    """
+    Claim the oldest received order of the bookstore that nobody handles, or whose claim is
+    older than claim_timeout. SKIP LOCKED lets concurrent staff claim different orders
+    instead of waiting on the same row. Return the claimed order id, None if the queue is empty.
+    """
+    next_order_id = (
+        select(Order.order_id)
+        .where(
+            Order.bookstore_id == bookstore_id,
+            _received_status_filter,
+            or_(Order.claimed_by.is_(None), Order.claimed_at < func.now() - claim_timeout),
+        )
+        .order_by(Order.order_time, Order.order_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    query = (
+        update(Order)
+        .where(Order.order_id == next_order_id)
+        .values(claimed_by=staff_account, claimed_at=func.now())
+        .returning(Order.order_id)
+    )
+    result = await db.execute(query)
+    order_id = result.scalar_one_or_none()
+
+    if order_id is not None:
+        await notify(
+            db,
+            ORDER_QUEUE_CHANNEL,
+            order_queue_payload(
+                bookstore_id, order_id, "claimed", OrderStatus.RECEIVED, staff_account
+            ),
+        )
+
+    return order_id
+
+
+async def transition_orders(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    order_ids: Sequence[UUID],
+    to_status: OrderStatus,
+    staff_account: str,
+) -> List[UUID]:
+    """
+    Move the bookstore's orders that are in the status just before to_status, release their
+    claims and append to their history, in a single statement. The other orders (another
+    bookstore, already moved, skipping a step) are left untouched. Return the moved order ids,
+    the customers and the bookstore's staff are notified once db commits.
+    """
+    from_status = PREVIOUS_ORDER_STATUS.get(to_status)
+    if from_status is None:
+        raise Exception(f"No order can be moved to {to_status}.")
+
+    updated = (
+        update(Order)
+        .where(
+            Order.order_id == any_(bindparam("order_ids", list(order_ids), type_=ARRAY(Uuid))),
+            Order.bookstore_id == bookstore_id,
+            Order.status == from_status,
+        )
+        .values(status=to_status, claimed_by=None, claimed_at=None)
+        .returning(Order.order_id, Order.customer_account)
+        .cte("updated")
+    )
+    history = (
+        insert(OrderStatusHistory)
+        .from_select(
+            ["order_id", "from_status", "to_status", "changed_by"],
+            select(
+                updated.c.order_id,
+                literal(from_status, Text),
+                literal(to_status, Text),
+                literal(staff_account, Text),
+            ),
+        )
+        .cte("history")
+    )
+    query = select(updated.c.order_id, updated.c.customer_account).add_cte(history)
+
+    result = await db.execute(query)
+    rows = result.all()
+
+    await notify_many(
+        db,
+        ORDER_STATUS_CHANNEL,
+        [order_status_payload(account, order_id, to_status) for order_id, account in rows],
+    )
+    await notify_many(
+        db,
+        ORDER_QUEUE_CHANNEL,
+        [
+            order_queue_payload(bookstore_id, order_id, "released", to_status)
+            for order_id, _ in rows
+        ],
+    )
+
+    return [order_id for order_id, _ in rows]
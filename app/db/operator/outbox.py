@@ -0,0 +1,75 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.listener import notify
+from app.db.models.outbox_message import OutboxMessage
+
+# wakes the outbox workers up instead of waiting for their next poll
+OUTBOX_CHANNEL = "outbox"
+
+_pending_filter = (OutboxMessage.delivered_at.is_(None), OutboxMessage.failed_at.is_(None))
+
+
+async def create_outbox_message(db: AsyncSession, topic: str, payload: Dict[str, Any]) -> None:
+    """Written in the caller's transaction, delivered only if it commits."""
+    await db.execute(insert(OutboxMessage).values(topic=topic, payload=payload))
+    await notify(db, OUTBOX_CHANNEL, topic)
+
+
+async def claim_outbox_messages(
+    db: AsyncSession, batch_size: int, lease: timedelta
+) -> List[Row]:
+    """
+    Lease up to batch_size due messages by moving their available_at past the lease, the
+    caller commits before delivering. SKIP LOCKED lets several workers claim disjoint
+    batches, a message whose worker died is due again once its lease expires.
+    """
+    due_message_ids = (
+        select(OutboxMessage.message_id)
+        .where(*_pending_filter, OutboxMessage.available_at <= func.now())
+        .order_by(OutboxMessage.available_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    query = (
+        update(OutboxMessage)
+        .where(OutboxMessage.message_id.in_(due_message_ids))
+        .values(available_at=func.now() + lease, attempts=OutboxMessage.attempts + 1)
+        .returning(
+            OutboxMessage.message_id,
+            OutboxMessage.topic,
+            OutboxMessage.payload,
+            OutboxMessage.attempts,
+        )
+    )
+    result = await db.execute(query)
+    return list(result.all())
+
+
+async def mark_outbox_messages_delivered(db: AsyncSession, message_ids: Sequence[UUID]) -> None:
+    query = (
+        update(OutboxMessage)
+        .where(OutboxMessage.message_id.in_(message_ids))
+        .values(delivered_at=func.now(), last_error=None)
+    )
+    await db.execute(query)
+
+
+async def reschedule_outbox_message(
+    db: AsyncSession, message_id: UUID, delay: timedelta, error: str, give_up: bool = False
+) -> None:
+    values: Dict[str, Any] = {"available_at": func.now() + delay, "last_error": error}
+    if give_up:
+        values["failed_at"] = func.now()
+    query = update(OutboxMessage).where(OutboxMessage.message_id == message_id).values(**values)
+    await db.execute(query)
+
+
+async def count_pending_outbox_messages(db: AsyncSession) -> int:
+    query = select(func.count()).select_from(OutboxMessage).where(*_pending_filter)
+    result = await db.execute(query)
+    return result.scalar_one()
@@ -0,0 +1,179 @@
+"""
+Monthly range partitions of order_ and order_item on order_time.
+
+Both tables are partitioned the same way, partition <table>_YYYY_MM holds the rows of that
+month. The partitions are created ahead of time by PartitionMaintainer, rows outside of every
+monthly partition land in the <table>_default partition. Old months are detached and moved to
+the archive schema by archive_partitions, see app/db/archiver/index.py.
+"""
+
+import asyncio
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.db import get_engine
+from app.logging.logger import get_logger
+
+logger = get_logger()
+
+# order_item references order_, so its partitions are created after and detached before
+PARTITIONED_TABLES = ("order_", "order_item")
+ARCHIVE_SCHEMA = "archive"
+
+_PARTITION_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+async def _lock_partitions(conn: AsyncConnection) -> None:
+    # serializes the workers and the archiver, released at the end of the transaction
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('order_partitions'))"))
+
+
+async def create_partitions(conn: AsyncConnection, start: date, end: date) -> List[str]:
+    """Create the missing monthly partitions from the month of start to the month of end."""
+    await _lock_partitions(conn)
+
+    created = []
+    month = month_start(start)
+    while month <= end:
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            exists = await conn.scalar(text("SELECT to_regclass(:name)"), {"name": name})
+            if exists is not None:
+                continue
+            # fails if the default partition already holds rows of the month
+            await conn.exec_driver_sql(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}"'
+                f" FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+            created.append(name)
+        month = add_months(month, 1)
+
+    return created
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[str]:
+    """The monthly partitions of the table, oldest first, without the default partition."""
+    result = await conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+            """
+        ),
+        {"table": table},
+    )
+    names = [name for name in result.scalars() if _PARTITION_SUFFIX.search(name)]
+    return sorted(names)
+
+
+def _partition_month(name: str) -> date:
+    match = _PARTITION_SUFFIX.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+async def archive_partitions(conn: AsyncConnection, before: date, drop: bool = False) -> List[str]:
+    """
+    Detach the monthly partitions of the months ending on or before `before` and move them to
+    the archive schema, or drop them. Detaching takes an ACCESS EXCLUSIVE lock on the
+    partitioned tables, run it off-peak.
+    """
+    await _lock_partitions(conn)
+    await conn.exec_driver_sql(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+
+    months = sorted(
+        {
+            _partition_month(name)
+            for name in await list_partitions(conn, "order_")
+            if add_months(_partition_month(name), 1) <= before
+        }
+    )
+
+    archived = []
+    for month in months:
+        for table in reversed(PARTITIONED_TABLES):
+            name = partition_name(table, month)
+            if await conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is None:
+                continue
+            await conn.exec_driver_sql(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            # the detached order items still reference order_, which blocks detaching the orders
+            foreign_keys = await conn.execute(
+                text(
+                    """
+                    SELECT conname FROM pg_constraint
+                    WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'
+                        AND confrelid = CAST('order_' AS regclass)
+                    """
+                ),
+                {"name": name},
+            )
+            for constraint in foreign_keys.scalars():
+                await conn.exec_driver_sql(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"')
+
+            if drop:
+                await conn.exec_driver_sql(f'DROP TABLE "{name}"')
+            else:
+                await conn.exec_driver_sql(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+            archived.append(name)
+
+    return archived
+
+
+class PartitionMaintainer:
+    """Keeps PARTITION_PREMAKE_MONTHS months of empty partitions ahead of the current month."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def maintain(self) -> List[str]:
+        this_month = month_start(date.today())
+        async with get_engine().begin() as conn:
+            return await create_partitions(
+                conn, this_month, add_months(this_month, settings.PARTITION_PREMAKE_MONTHS)
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created = await self.maintain()
+                if created:
+                    logger.info("Created order partitions: %s", ", ".join(created))
+            except Exception as err:
+                logger.error("Order partition maintenance failed, error: %s", err)
+            await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,191 @@
+"""Connection pool instrumentation, warmup, liveness checks and adaptive overflow."""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.logging.logger import get_logger
+from app.monitoring.metrics import metrics
+
+logger = get_logger()
+
+pool_wait_seconds = metrics.histogram(
+    "db_pool_wait_seconds", "Time a checkout waited for a pooled connection, connecting included."
+)
+pool_checked_out = metrics.gauge("db_pool_checked_out", "Connections in use.")
+pool_overflow = metrics.gauge("db_pool_overflow", "Connections open beyond the pool size.")
+pool_max_overflow = metrics.gauge("db_pool_max_overflow", "Current overflow limit.")
+pool_liveness_failures_total = metrics.counter(
+    "db_pool_liveness_failures_total", "Idle connections found dead by the liveness check."
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Times every checkout and counts the slow ones for the adaptive overflow."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_max_overflow = self._max_overflow
+        self.checkouts = 0
+        self.slow_checkouts = 0
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start_time
+            pool_wait_seconds.observe(waited)
+            self.checkouts += 1
+            if waited * 1000 >= settings.DB_POOL_SLOW_WAIT_MS:
+                self.slow_checkouts += 1
+
+    @property
+    def max_overflow(self) -> int:
+        return self._max_overflow
+
+    def set_max_overflow(self, max_overflow: int) -> None:
+        # read by QueuePool._do_get and _inc_overflow on every checkout, safe to change live
+        with self._overflow_lock:
+            self._max_overflow = max_overflow
+        pool_max_overflow.set(max_overflow)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.set_max_overflow(self.base_max_overflow)
+        pool.base_max_overflow = self.base_max_overflow
+        return pool
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    def _update_usage_gauges(*_) -> None:
+        # engine.pool, the pool is replaced when the engine is disposed
+        pool = engine.sync_engine.pool
+        pool_checked_out.set(pool.checkedout())
+        pool_overflow.set(max(pool.overflow(), 0))
+
+    pool = engine.sync_engine.pool
+    pool_max_overflow.set(getattr(pool, "max_overflow", 0))
+    event.listen(pool, "checkout", _update_usage_gauges)
+    event.listen(pool, "checkin", _update_usage_gauges)
+
+
+async def warm_up_pool(engine: AsyncEngine, size: int) -> None:
+    """Open size connections at once so the first requests after a deploy do not pay for it."""
+    size = min(size, engine.sync_engine.pool.size())
+    if size <= 0:
+        return
+
+    start_time = time.perf_counter()
+    connections = [engine.connect() for _ in range(size)]
+    results = await asyncio.gather(
+        *(connection.start() for connection in connections), return_exceptions=True
+    )
+    # back into the pool, they stay open
+    await asyncio.gather(
+        *(connection.close() for connection in connections), return_exceptions=True
+    )
+
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        logger.warning(
+            "Pool warmup failed for %s/%s connections: %s", len(failures), size, failures[0]
+        )
+    logger.info(
+        "Warmed up %s db connections in %.3fs",
+        size - len(failures),
+        time.perf_counter() - start_time,
+    )
+
+
+class PoolMaintainer:
+    """
+    Replaces pool_pre_ping: idle connections are pinged in the background instead of on every
+    checkout. Optionally raises the overflow limit while checkouts wait, and lowers it back
+    to DB_MAX_OVERFLOW once the extra connections are no longer used.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, get_engine: Callable[[], AsyncEngine]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(get_engine))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _check_idle_connections(self, engine: AsyncEngine) -> None:
+        pool = engine.sync_engine.pool
+        # the queue is FIFO, so checking in and out cycles through every idle connection
+        for _ in range(pool.checkedin()):
+            try:
+                async with engine.connect() as connection:
+                    await connection.exec_driver_sql("SELECT 1")
+            except DBAPIError as err:
+                # a disconnect invalidates the connection, the pool opens a new one on demand
+                pool_liveness_failures_total.inc()
+                logger.warning("Pool liveness check failed, error: %s", err)
+
+    def _adapt_overflow(self, pool: InstrumentedQueuePool) -> None:
+        checkouts, slow_checkouts = pool.checkouts, pool.slow_checkouts
+        pool.checkouts = pool.slow_checkouts = 0
+        if not checkouts:
+            return
+
+        max_overflow = pool.max_overflow
+        step = settings.DB_POOL_ADAPTIVE_STEP
+        if slow_checkouts / checkouts >= 0.05 and max_overflow < settings.DB_POOL_MAX_OVERFLOW_LIMIT:
+            new_max_overflow = min(max_overflow + step, settings.DB_POOL_MAX_OVERFLOW_LIMIT)
+        elif slow_checkouts == 0 and max(pool.overflow(), 0) <= max_overflow - 2 * step:
+            new_max_overflow = max(max_overflow - step, pool.base_max_overflow)
+        else:
+            return
+
+        if new_max_overflow != max_overflow:
+            logger.info(
+                "Pool max_overflow %s -> %s, slow checkouts: %s/%s",
+                max_overflow,
+                new_max_overflow,
+                slow_checkouts,
+                checkouts,
+            )
+            pool.set_max_overflow(new_max_overflow)
+
+    async def _run(self, get_engine: Callable[[], AsyncEngine]) -> None:
+        interval = settings.DB_POOL_ADAPTIVE_INTERVAL_SECONDS
+        last_liveness_check = time.monotonic()
+
+        while True:
+            await asyncio.sleep(interval)
+            engine = get_engine()
+            pool = engine.sync_engine.pool
+            try:
+                if settings.DB_POOL_ADAPTIVE_OVERFLOW and isinstance(pool, InstrumentedQueuePool):
+                    self._adapt_overflow(pool)
+
+                if (
+                    not settings.DB_POOL_PRE_PING
+                    and time.monotonic() - last_liveness_check
+                    >= settings.DB_POOL_HEALTH_CHECK_SECONDS
+                ):
+                    last_liveness_check = time.monotonic()
+                    await self._check_idle_connections(engine)
+            except Exception as err:
+                logger.error("Pool maintenance failed, error: %s", err)
+
+
+pool_maintainer = PoolMaintainer()
@@ -0,0 +1,380 @@
+"""
+Generate a large, reproducible data set for performance work.
+
+Every table is written with COPY in one transaction. The same --seed always produces the
+same rows, book popularity follows a Zipf distribution (a few best sellers, a long tail).
+Run it on a migrated database, generated accounts and isbns must not exist yet.
+
+export PYTHONPATH=$(pwd)
+./.venv/bin/python app/db/seeder/generator.py --bookstores 50 --books 200000 --orders 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from app.db.db import engine
+from app.db.partition import add_months, create_partitions, month_start
+from app.enum.order import OrderStatus
+from app.util.auth import hash_password
+
+COPY_BATCH_SIZE = 10000
+
+CATEGORIES = ("程式設計", "文學小說", "商業理財", "藝術設計", "人文社科", "心理勵志", "醫療保健", "童書")
+ORDER_STATUS_WEIGHTS = (
+    (OrderStatus.RECEIVED, 5),
+    (OrderStatus.PROCESSING, 10),
+    (OrderStatus.SHIPPING, 15),
+    (OrderStatus.CLOSED, 70),
+)
+
+
+@dataclass
+class GeneratorConfig:
+    seed: int = 42
+    bookstores: int = 20
+    books: int = 50000
+    mappings_per_book: int = 3
+    customers: int = 20000
+    orders: int = 200000
+    max_items_per_order: int = 5
+    zipf_s: float = 1.1
+    days: int = 365
+    # last order date, fixed it to reproduce the exact same rows on another day
+    end_date: Optional[date] = None
+    password: str = "123"
+
+
+@dataclass
+class _Store:
+    bookstore_id: uuid.UUID
+    shipping_fee: int
+    # ordered by book popularity, the most popular book first
+    mapping_ids: List[uuid.UUID]
+    prices: List[int]
+
+
+def _uuid4(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def zipf_rank(rng: random.Random, n: int, s: float) -> int:
+    """
+    Draw a 0-based rank in [0, n) with P(rank = k) roughly proportional to 1 / (k + 1) ** s,
+    by inverting the continuous power law CDF, O(1) per draw without a weight table.
+    """
+    u = rng.random()
+    if abs(s - 1.0) < 1e-9:
+        x = (n + 1) ** u
+    else:
+        a = 1.0 - s
+        x = (((n + 1) ** a - 1.0) * u + 1.0) ** (1.0 / a)
+    return min(int(x) - 1, n - 1)
+
+
+def _batched(records: Iterator[tuple], size: int = COPY_BATCH_SIZE) -> Iterator[List[tuple]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DataGenerator:
+    """Builds the rows of each table in foreign key order, reusing one seeded rng."""
+
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.today = config.end_date or date.today()
+        self.stores: List[_Store] = []
+        self.customers: List[Tuple[str, str, str, str, str]] = []
+        self.book_ids: List[uuid.UUID] = []
+
+    def bookstore_rows(self) -> Iterator[tuple]:
+        for i in range(self.config.bookstores):
+            bookstore_id = _uuid4(self.rng)
+            shipping_fee = self.rng.choice((0, 50, 60, 80))
+            self.stores.append(_Store(bookstore_id, shipping_fee, [], []))
+            yield (
+                bookstore_id,
+                f"Generated Bookstore {i}",
+                f"02{i:08d}",
+                f"store{i}@generated.example",
+                f"Generated Road {i}",
+                shipping_fee,
+            )
+
+    def staff_rows(self, hashed_password: str) -> Iterator[tuple]:
+        for i, store in enumerate(self.stores):
+            yield (f"gen_staff_{i}", f"Generated Staff {i}", hashed_password, store.bookstore_id)
+
+    def customer_rows(self, hashed_password: str) -> Iterator[tuple]:
+        for i in range(self.config.customers):
+            customer = (
+                f"gen_customer_{i}",
+                f"Generated Customer {i}",
+                f"09{i % 10**8:08d}",
+                f"customer{i}@generated.example",
+                f"Generated Street {i}",
+            )
+            self.customers.append(customer)
+            account, name, phone_number, email, address = customer
+            yield (account, name, hashed_password, email, phone_number, address)
+
+    def shopping_cart_rows(self) -> Iterator[tuple]:
+        for account, *_ in self.customers:
+            yield (_uuid4(self.rng), account)
+
+    def book_rows(self) -> Iterator[tuple]:
+        # book i is the i-th most popular book
+        for i in range(self.config.books):
+            book_id = _uuid4(self.rng)
+            self.book_ids.append(book_id)
+            yield (
+                book_id,
+                f"Generated Book {i}",
+                f"Author {self.rng.randrange(self.config.books // 10 + 1)}",
+                f"Publisher {self.rng.randrange(200)}",
+                f"979-{i:013d}",
+                self.rng.choice(CATEGORIES),
+                None,
+                self.today - timedelta(days=self.rng.randrange(3650)),
+            )
+
+    def book_bookstore_mapping_rows(self) -> Iterator[tuple]:
+        per_book = min(self.config.mappings_per_book, len(self.stores))
+        for book_id in self.book_ids:
+            base_price = self.rng.randrange(150, 1200, 10)
+            for store in self.rng.sample(self.stores, per_book):
+                mapping_id = _uuid4(self.rng)
+                price = max(base_price + self.rng.randrange(-50, 60, 10), 0)
+                store.mapping_ids.append(mapping_id)
+                store.prices.append(price)
+                yield (mapping_id, price, self.rng.randrange(0, 200), book_id, store.bookstore_id)
+
+    def order_rows(self) -> Iterator[Tuple[tuple, List[tuple]]]:
+        """Yield (order, order items), every order is placed at a single bookstore."""
+        config = self.config
+        statuses = [status for status, _ in ORDER_STATUS_WEIGHTS]
+        status_weights = [weight for _, weight in ORDER_STATUS_WEIGHTS]
+        stores = [store for store in self.stores if store.mapping_ids]
+
+        for _ in range(config.orders):
+            store = self.rng.choice(stores)
+            account, name, phone_number, email, address = self.rng.choice(self.customers)
+            order_id = _uuid4(self.rng)
+
+            items = []
+            chosen = set()
+            for _ in range(self.rng.randint(1, config.max_items_per_order)):
+                rank = zipf_rank(self.rng, len(store.mapping_ids), config.zipf_s)
+                if rank in chosen:
+                    continue
+                chosen.add(rank)
+                items.append(
+                    (
+                        _uuid4(self.rng),
+                        self.rng.choices((1, 2, 3), weights=(80, 15, 5))[0],
+                        store.prices[rank],
+                        order_id,
+                        store.mapping_ids[rank],
+                    )
+                )
+
+            total_price = sum(quantity * price for _, quantity, price, _, _ in items)
+            order_time = self.today - timedelta(days=self.rng.randrange(config.days))
+            order = (
+                order_id,
+                order_time,
+                name,
+                phone_number,
+                email,
+                self.rng.choices(statuses, weights=status_weights)[0],
+                total_price + store.shipping_fee,
+                address,
+                store.shipping_fee,
+                name,
+                None,
+                account,
+                store.bookstore_id,
+            )
+            yield order, [item + (order_time,) for item in items]
+
+
+async def _copy(driver_connection, table: str, columns: Sequence[str], records: Iterator[tuple]):
+    count = 0
+    for batch in _batched(records):
+        await driver_connection.copy_records_to_table(table, records=batch, columns=columns)
+        count += len(batch)
+    print(f"{table}: {count} rows")
+    return count
+
+
+async def generate(config: GeneratorConfig):
+    generator = DataGenerator(config)
+    hashed_password = hash_password(config.password)
+    start_time = time.time()
+
+    async with engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_connection = raw_conn.driver_connection
+
+        async with conn.begin():
+            await conn.exec_driver_sql("SET LOCAL synchronous_commit = off")
+
+            await _copy(
+                driver_connection,
+                "bookstore",
+                ("bookstore_id", "name", "phone_number", "email", "address", "shipping_fee"),
+                generator.bookstore_rows(),
+            )
+            await _copy(
+                driver_connection,
+                "staff",
+                ("account", "name", "password", "bookstore_id"),
+                generator.staff_rows(hashed_password),
+            )
+            await _copy(
+                driver_connection,
+                "customer",
+                ("account", "name", "password", "email", "phone_number", "address"),
+                generator.customer_rows(hashed_password),
+            )
+            await _copy(
+                driver_connection,
+                "shopping_cart",
+                ("cart_id", "customer_account"),
+                generator.shopping_cart_rows(),
+            )
+
+            await _copy(
+                driver_connection,
+                "book",
+                (
+                    "book_id",
+                    "title",
+                    "author",
+                    "publisher",
+                    "isbn",
+                    "category",
+                    "series",
+                    "publish_date",
+                ),
+                generator.book_rows(),
+            )
+            await _copy(
+                driver_connection,
+                "book_bookstore_mapping",
+                ("book_bookstore_mapping_id", "price", "store_quantity", "book_id", "bookstore_id"),
+                generator.book_bookstore_mapping_rows(),
+            )
+
+            order_columns = (
+                "order_id",
+                "order_time",
+                "customer_name",
+                "customer_phone_number",
+                "customer_email",
+                "status",
+                "total_price",
+                "shipping_address",
+                "shipping_fee",
+                "recipient_name",
+                "coupon_id",
+                "customer_account",
+                "bookstore_id",
+            )
+            order_item_columns = (
+                "order_item_id",
+                "quantity",
+                "price",
+                "order_id",
+                "book_bookstore_mapping_id",
+                "order_time",
+            )
+            history_columns = ("order_id", "to_status", "changed_at")
+
+            # COPY into a partitioned table needs the monthly partitions of the whole range
+            first_month = month_start(generator.today - timedelta(days=config.days))
+            await create_partitions(conn, first_month, add_months(month_start(generator.today), 1))
+
+            order_count = order_item_count = 0
+            for batch in _batched(generator.order_rows()):
+                orders = [order for order, _ in batch]
+                order_items = [item for _, items in batch for item in items]
+                # orders first, order_item references them
+                await driver_connection.copy_records_to_table(
+                    "order_", records=orders, columns=order_columns
+                )
+                await driver_connection.copy_records_to_table(
+                    "order_item", records=order_items, columns=order_item_columns
+                )
+                # the history of a generated order starts at its current status
+                await driver_connection.copy_records_to_table(
+                    "order_status_history",
+                    records=[
+                        (
+                            order[0],
+                            order[5],
+                            datetime.combine(order[1], day_time(), tzinfo=timezone.utc),
+                        )
+                        for order in orders
+                    ],
+                    columns=history_columns,
+                )
+                order_count += len(orders)
+                order_item_count += len(order_items)
+            print(f"order_: {order_count} rows")
+            print(f"order_item: {order_item_count} rows")
+
+        # fresh statistics, otherwise the planner still sees the tables as empty
+        async with conn.begin():
+            await conn.exec_driver_sql("ANALYZE")
+
+    await engine.dispose()
+    print(f"Generated data set (seed: {config.seed}) in {time.time() - start_time:.1f}s")
+
+
+def main():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate a large synthetic data set with COPY.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--bookstores", type=int, default=defaults.bookstores)
+    parser.add_argument("--books", type=int, default=defaults.books)
+    parser.add_argument("--mappings-per-book", type=int, default=defaults.mappings_per_book)
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--orders", type=int, default=defaults.orders)
+    parser.add_argument("--max-items-per-order", type=int, default=defaults.max_items_per_order)
+    parser.add_argument(
+        "--zipf-s", type=float, default=defaults.zipf_s, help="popularity skew, 0 is uniform"
+    )
+    parser.add_argument("--days", type=int, default=defaults.days, help="order time range")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        seed=args.seed,
+        bookstores=args.bookstores,
+        books=args.books,
+        mappings_per_book=args.mappings_per_book,
+        customers=args.customers,
+        orders=args.orders,
+        max_items_per_order=args.max_items_per_order,
+        zipf_s=args.zipf_s,
+        days=args.days,
+        end_date=args.end_date,
+    )
+    asyncio.run(generate(config))
+
+
+if __name__ == "__main__":
+    main()
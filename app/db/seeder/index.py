@@ -262,7 +262,7 @@ async def seed_data():
             + bookstore.shipping_fee
         )
 
-        # Order (db/models/order.py) - 依賴 Customer, Coupon
+        # Order (db/models/order.py) - 依賴 Customer, Coupon, Bookstore
         order = Order(
             order_id=ORDER_UUID,
             order_time=date.today(),
@@ -276,6 +276,7 @@ async def seed_data():
             recipient_name="王小明",
             coupon_id=COUPON_UUID,
             customer_account=CUSTOMER_ACCOUNT,
+            bookstore_id=BOOKSTORE_UUID,
         )
 
         order = apply_coupon(coupon=coupon, order=order)
@@ -287,6 +288,7 @@ async def seed_data():
             quantity=cart_item_1.quantity,
             price=bbm_1.price,
             order_id=ORDER_UUID,
+            order_time=order.order_time,
             book_bookstore_mapping_id=BBM_UUID_1,
         )
 
@@ -295,6 +297,7 @@ async def seed_data():
             quantity=cart_item_2.quantity,
             price=bbm_2.price,
             order_id=ORDER_UUID,
+            order_time=order.order_time,
             book_bookstore_mapping_id=BBM_UUID_2,
         )
 
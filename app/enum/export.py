@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+
+class ExportKind(StrEnum):
+    ORDERS = "orders"
+    ORDER_ITEMS = "order_items"
+    SALES = "sales"
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
@@ -6,3 +6,16 @@ class OrderStatus(StrEnum):
     PROCESSING = "processing"
     SHIPPING = "shipping"
     CLOSED = "closed"
+
+
+# the only allowed transitions, RECEIVED -> PROCESSING -> SHIPPING -> CLOSED
+PREVIOUS_ORDER_STATUS = {
+    OrderStatus.PROCESSING: OrderStatus.RECEIVED,
+    OrderStatus.SHIPPING: OrderStatus.PROCESSING,
+    OrderStatus.CLOSED: OrderStatus.SHIPPING,
+}
+# the only status an order can be moved to next, none for closed orders
+NEXT_ORDER_STATUS = {previous: status for status, previous in PREVIOUS_ORDER_STATUS.items()}
+
+# statuses still handled by the staff, covered by the partial index ix_order_open
+OPEN_ORDER_STATUSES = (OrderStatus.RECEIVED, OrderStatus.PROCESSING, OrderStatus.SHIPPING)
@@ -0,0 +1,5 @@
+from enum import StrEnum
+
+
+class OutboxTopic(StrEnum):
+    ORDER_CONFIRMATION = "order_confirmation"
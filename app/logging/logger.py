@@ -1,11 +1,126 @@
+import atexit
+import json
 import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
 from app.core.config import settings
+from app.middleware.request_context import get_request_context
+
+LOGGER_NAME = "logger-0"
+
+_listener: Optional[QueueListener] = None
+_configured = False
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One json object per line, encoded on the listener thread."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+            entry["route"] = getattr(record, "route", None)
+        # the traceback is formatted by ContextQueueHandler.prepare
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Build the message on the logging thread like QueueHandler.prepare, the args may be mutable
+    or ORM objects that must not be read later from the listener thread. Only the json
+    encoding and the I/O are left to the listener. The request context, which the listener
+    cannot see, is copied onto the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            # the traceback holds the frames, do not hand them to the other thread
+            record.exc_info = None
+
+        request_context = get_request_context()
+        if request_context is not None:
+            record.request_id = request_context.request_id
+            record.route = request_context.route
+        return record
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a share of the DEBUG records of the configured loggers."""
 
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
 
-def get_logger() -> logging.Logger:
-    """Get seasalt logger and support additional custom handers in different classes."""
-    logger = logging.getLogger(name="logger-0")
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+def _configure() -> logging.Logger:
+    global _listener, _configured
+
+    logger = logging.getLogger(name=LOGGER_NAME)
     logger.propagate = False
     logger.setLevel(settings.LOG_LEVEL)
 
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+
+    # the event loop only puts records on an unbounded queue, the I/O runs on the listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATES))
+    logger.addHandler(handler)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    _configured = True
+
     return logger
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """
+    Get the app logger, or its child logger-0.<name> whose DEBUG records can be sampled
+    through LOG_DEBUG_SAMPLE_RATES.
+    Log with %-style arguments, the message is only built if the record is emitted.
+    """
+    logger = logging.getLogger(name=LOGGER_NAME)
+    if not _configured:
+        logger = _configure()
+
+    return logger.getChild(name) if name else logger
+
+
+def stop_logging() -> None:
+    """Flush the queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -7,9 +7,21 @@ from fastapi.responses import PlainTextResponse
 from starlette import status
 from app.core.config import settings
 from app.db.init_db import init_db
-from app.router import auth, staff, customer, admin
+from app.db.db import get_engine
+from app.db.listener import pg_listener
+from app.db.partition import partition_maintainer
+from app.db.pool import pool_maintainer, warm_up_pool
+from app.logging.logger import get_logger
+from app.middleware.request_context import RequestContextMiddleware, restore_request_context
+from app.monitoring.loop_lag import loop_monitor
+from app.monitoring.metrics import metrics
+from app.util.idempotency import idempotency_key_sweeper
+from app.util.outbox import outbox_worker
+from app.router import auth, staff, customer, admin, catalog
 from app.router.frontend import frontend
 
+logger = get_logger()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -17,12 +29,29 @@ async def lifespan(app: FastAPI):
     # during the startup.
     if settings.DO_INIT_DB:
         await init_db(app)
+    if settings.PG_LISTENER_ENABLED:
+        await pg_listener.start()
+    await warm_up_pool(get_engine(), settings.DB_POOL_WARMUP_SIZE)
+    pool_maintainer.start(get_engine)
+    loop_monitor.start()
+    if settings.OUTBOX_ENABLED:
+        outbox_worker.start()
+    idempotency_key_sweeper.start()
+    if settings.PARTITION_MAINTENANCE_ENABLED:
+        partition_maintainer.start()
     yield
     # This code will be executed after the application
     # finishes handling requests, right before the shutdown.
+    await partition_maintainer.stop()
+    await idempotency_key_sweeper.stop()
+    await outbox_worker.stop()
+    await loop_monitor.stop()
+    await pool_maintainer.stop()
+    await pg_listener.stop()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 router = APIRouter()
@@ -35,18 +64,27 @@ async def logout():
     return response
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Not Found", status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(router, tags=["main"])
 app.include_router(frontend.router, prefix="/frontend", tags=["frontend"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(staff.router, prefix="/staffs", tags=["staffs"])
 app.include_router(customer.router, prefix="/customers", tags=["customers"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(catalog.router, prefix="/api/v1", tags=["api"])
 
 
 @app.exception_handler(Exception)
 async def custom_exception_handler(request: Request, exc: Exception):
-    # Log the error for debugging purposes (optional but recommended)
-    print(f"Unhandled server error occurred: {exc}")
+    # the traceback and the request id go through the logging pipeline like any other record
+    with restore_request_context(request.scope):
+        logger.exception("Unhandled server error occurred on %s", request.url.path, exc_info=exc)
 
     # Use PlainTextResponse to safely return a string
     return PlainTextResponse(
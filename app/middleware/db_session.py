@@ -1,5 +1,6 @@
 """Database session middleware utilities."""
 
+import logging
 import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -10,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.db import session_factory
 
-logger = get_logger()
+logger = get_logger("db_session")
 
 
 async def get_db_session(
@@ -19,27 +20,27 @@ async def get_db_session(
 ) -> AsyncGenerator[AsyncSession, None]:
     """Return a async database session."""
     start_time = time.time()
-    request_name = (
-        request_name if request_name else request.method + " " + str(request.url) if request else ""
-    )
+    # only built when the debug lines are emitted, this runs on every request
+    if not request_name and request and logger.isEnabledFor(logging.DEBUG):
+        request_name = request.method + " " + str(request.url)
+
     async with session_factory() as session:
         got_db_time = time.time()
         logger.debug(
-            (
-                f"The request {request_name} opened a db session: {id(session)},"
-                f" time elapsed: {got_db_time-start_time:.3f}s"
-            )
+            "The request %s opened a db session: %s, time elapsed: %.3fs",
+            request_name,
+            id(session),
+            got_db_time - start_time,
         )
         try:
             yield session
         finally:
             await session_factory.remove()
             logger.debug(
-                (
-                    f"The request {request_name} "
-                    f"closed the db session: {id(session)} "
-                    f"time elapsed: {time.time() - got_db_time:.3f}s"
-                )
+                "The request %s closed the db session: %s time elapsed: %.3fs",
+                request_name,
+                id(session),
+                time.time() - got_db_time,
             )
 
 
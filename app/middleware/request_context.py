@@ -0,0 +1,98 @@
+"""Per-request context shared with code that has no access to the request, e.g. engine events."""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+QUERY_COUNT_HEADER = b"x-db-query-count"
+REQUEST_ID_HEADER = b"x-request-id"
+# the context is also kept on the scope for the code running after the middleware returned
+SCOPE_KEY = "app.request_context"
+
+
+class RequestContext:
+    __slots__ = ("request_id", "route", "query_count")
+
+    def __init__(self, request_id: str = "", route: str = ""):
+        self.request_id = request_id
+        self.route = route
+        self.query_count = 0
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    return _request_context.get()
+
+
+@contextmanager
+def restore_request_context(scope: Scope) -> Iterator[None]:
+    """
+    Set the request context of scope again, e.g. in the exception handler of unhandled errors
+    which runs outside of RequestContextMiddleware once it has reset the context var.
+    """
+    token = _request_context.set(scope.get(SCOPE_KEY))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    request_context = _request_context.get()
+    if request_context is not None:
+        request_context.query_count += 1
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware, the endpoint runs in the same task so the context var set here
+    is visible to the db session and the engine events of the request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # keep the id of an upstream proxy so the logs of both sides correlate
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        request_context = RequestContext(
+            request_id=request_id[:64] or uuid4().hex, route=f"{scope['method']} {scope['path']}"
+        )
+        token = _request_context.set(request_context)
+        scope[SCOPE_KEY] = request_context
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_context.request_id.encode("latin-1")))
+                if settings.DB_QUERY_COUNT_HEADER:
+                    # queries of a streamed body run after the headers and are not counted
+                    count = str(request_context.query_count).encode()
+                    headers.append((QUERY_COUNT_HEADER, count))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_context.reset(token)
+
+
+def get_task_request_context(task: asyncio.Task) -> Optional[RequestContext]:
+    """The request context a task runs in, also readable from another thread."""
+    return task.get_context().get(_request_context)
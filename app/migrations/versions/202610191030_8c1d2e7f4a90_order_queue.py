@@ -0,0 +1,73 @@
+"""order queue
+
+Revision ID: 8c1d2e7f4a90
+Revises: 55e77db7db0e
+Create Date: 2026-10-19 10:30:41.205317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c1d2e7f4a90"
+down_revision = "55e77db7db0e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("order_", sa.Column("bookstore_id", sa.Uuid(), nullable=True))
+    op.add_column("order_", sa.Column("claimed_by", sa.Text(), nullable=True))
+    op.add_column("order_", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key(
+        "order__bookstore_id_fkey", "order_", "bookstore", ["bookstore_id"], ["bookstore_id"]
+    )
+    # a claim is released when the staff is deleted
+    op.create_foreign_key(
+        "order__claimed_by_fkey",
+        "order_",
+        "staff",
+        ["claimed_by"],
+        ["account"],
+        ondelete="SET NULL",
+    )
+
+    # the bookstore of the existing orders is the bookstore of their items
+    op.execute(
+        """
+        UPDATE order_
+        SET bookstore_id = order_bookstore.bookstore_id
+        FROM (
+            SELECT DISTINCT ON (order_item.order_id)
+                order_item.order_id, book_bookstore_mapping.bookstore_id
+            FROM order_item
+            JOIN book_bookstore_mapping
+                ON book_bookstore_mapping.book_bookstore_mapping_id
+                = order_item.book_bookstore_mapping_id
+            ORDER BY order_item.order_id
+        ) AS order_bookstore
+        WHERE order_.order_id = order_bookstore.order_id
+        """
+    )
+
+    op.create_index(
+        "ix_order_open",
+        "order_",
+        ["bookstore_id", "status", "order_time", "order_id"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('received', 'processing', 'shipping')"),
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_order_open",
+        table_name="order_",
+        postgresql_where=sa.text("status IN ('received', 'processing', 'shipping')"),
+    )
+    op.drop_constraint("order__claimed_by_fkey", "order_", type_="foreignkey")
+    op.drop_constraint("order__bookstore_id_fkey", "order_", type_="foreignkey")
+    op.drop_column("order_", "claimed_at")
+    op.drop_column("order_", "claimed_by")
+    op.drop_column("order_", "bookstore_id")
@@ -0,0 +1,58 @@
+"""order status history
+
+Revision ID: e62a4d8b0c37
+Revises: 5b7e3c9d1f24
+Create Date: 2026-10-19 11:15:52.107364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e62a4d8b0c37"
+down_revision = "5b7e3c9d1f24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "order_status_history",
+        sa.Column(
+            "history_id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("order_id", sa.Uuid(), nullable=False),
+        sa.Column("from_status", sa.Text(), nullable=True),
+        sa.Column("to_status", sa.Text(), nullable=False),
+        sa.Column(
+            "changed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        # no foreign key, the history keeps the account after the staff is deleted
+        sa.Column("changed_by", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["order_.order_id"],
+        ),
+        sa.PrimaryKeyConstraint("history_id"),
+    )
+    op.create_index(
+        "ix_order_status_history_order_id",
+        "order_status_history",
+        ["order_id", "changed_at"],
+        unique=False,
+    )
+
+    # the earlier changes are unknown, start the history of every order at its current status
+    op.execute(
+        """
+        INSERT INTO order_status_history (order_id, from_status, to_status, changed_at)
+        SELECT order_id, NULL, status, order_time
+        FROM order_
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_order_status_history_order_id", table_name="order_status_history")
+    op.drop_table("order_status_history")
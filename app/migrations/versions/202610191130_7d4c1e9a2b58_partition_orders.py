@@ -0,0 +1,274 @@
+"""partition orders
+
+Revision ID: 7d4c1e9a2b58
+Revises: e62a4d8b0c37
+Create Date: 2026-10-19 11:30:27.516083
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7d4c1e9a2b58"
+down_revision = "e62a4d8b0c37"
+branch_labels = None
+depends_on = None
+
+OPEN_STATUS_PREDICATE = "status IN ('received', 'processing', 'shipping')"
+
+# the foreign keys of the tables being replaced, created with the default names
+ORDER_FOREIGN_KEYS = (
+    ("order_item", "order_item_order_id_fkey"),
+    ("order_item", "order_item_book_bookstore_mapping_id_fkey"),
+    ("order_", "order__coupon_id_fkey"),
+    ("order_", "order__customer_account_fkey"),
+    ("order_", "order__bookstore_id_fkey"),
+    ("order_", "order__claimed_by_fkey"),
+)
+ORDER_COLUMN_NAMES = """
+    order_id, order_time, customer_name, customer_phone_number, customer_email, status,
+    total_price, shipping_address, shipping_fee, recipient_name, coupon_id, customer_account,
+    bookstore_id, claimed_by, claimed_at
+"""
+
+
+def _order_columns():
+    return [
+        sa.Column(
+            "order_id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("order_time", sa.Date(), nullable=False),
+        sa.Column("customer_name", sa.Text(), nullable=False),
+        sa.Column("customer_phone_number", sa.CHAR(length=10), nullable=False),
+        sa.Column("customer_email", sa.Text(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("total_price", sa.Integer(), nullable=False),
+        sa.Column("shipping_address", sa.Text(), nullable=False),
+        sa.Column("shipping_fee", sa.Integer(), nullable=False),
+        sa.Column("recipient_name", sa.Text(), nullable=False),
+        sa.Column("coupon_id", sa.Uuid(), nullable=True),
+        sa.Column("customer_account", sa.Text(), nullable=False),
+        sa.Column("bookstore_id", sa.Uuid(), nullable=True),
+        sa.Column("claimed_by", sa.Text(), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("shipping_fee >= 0", name="shipping_fee_non_negative"),
+        sa.CheckConstraint("total_price >= 0", name="total_price_non_negative"),
+        sa.ForeignKeyConstraint(
+            ["coupon_id"],
+            ["coupon.coupon_id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["customer_account"],
+            ["customer.account"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["bookstore_id"],
+            ["bookstore.bookstore_id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["claimed_by"],
+            ["staff.account"],
+            ondelete="SET NULL",
+        ),
+    ]
+
+
+def _order_item_columns():
+    return [
+        sa.Column(
+            "order_item_id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Uuid(), nullable=False),
+        sa.Column("book_bookstore_mapping_id", sa.Uuid(), nullable=False),
+        sa.CheckConstraint("price >= 0", name="price_non_negative"),
+        sa.CheckConstraint("quantity >= 0", name="quantity_non_negative"),
+        sa.ForeignKeyConstraint(
+            ["book_bookstore_mapping_id"],
+            ["book_bookstore_mapping.book_bookstore_mapping_id"],
+        ),
+    ]
+
+
+def _drop_foreign_keys():
+    for table, name in ORDER_FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+
+
+def _rename_to_legacy():
+    op.rename_table("order_", "order_legacy")
+    op.rename_table("order_item", "order_item_legacy")
+    op.execute("ALTER INDEX order__pkey RENAME TO order_legacy_pkey")
+    op.execute("ALTER INDEX order_item_pkey RENAME TO order_item_legacy_pkey")
+    op.execute("ALTER INDEX ix_order_open RENAME TO ix_order_legacy_open")
+
+
+def upgrade():
+    # detaching a partition is refused while other tables reference its rows, the history
+    # keeps a plain order_id column
+    op.drop_constraint(
+        "order_status_history_order_id_fkey", "order_status_history", type_="foreignkey"
+    )
+    _drop_foreign_keys()
+    _rename_to_legacy()
+
+    # the partition key has to be part of the primary key
+    op.create_table(
+        "order_",
+        *_order_columns(),
+        sa.PrimaryKeyConstraint("order_id", "order_time"),
+        postgresql_partition_by="RANGE (order_time)",
+    )
+    op.create_table(
+        "order_item",
+        *_order_item_columns(),
+        sa.Column("order_time", sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["order_id", "order_time"],
+            ["order_.order_id", "order_.order_time"],
+        ),
+        sa.PrimaryKeyConstraint("order_item_id", "order_time"),
+        postgresql_partition_by="RANGE (order_time)",
+    )
+    op.create_index(
+        "ix_order_open",
+        "order_",
+        ["bookstore_id", "status", "order_time", "order_id"],
+        unique=False,
+        postgresql_where=sa.text(OPEN_STATUS_PREDICATE),
+    )
+    op.create_index(
+        "ix_order_bookstore_id", "order_", ["bookstore_id", "order_time"], unique=False
+    )
+    op.create_index(
+        "ix_order_customer_account",
+        "order_",
+        ["customer_account", "order_time"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_order_item_order_id", "order_item", ["order_id", "order_time"], unique=False
+    )
+
+    # one partition per month from the first order to three months ahead, the later ones are
+    # created by app/db/partition.py
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            month date;
+            last_month date := (date_trunc('month', current_date) + interval '3 months')::date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(order_time), current_date))::date
+            INTO month
+            FROM order_legacy;
+
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF order_ FOR VALUES FROM (%L) TO (%L)',
+                    'order__' || to_char(month, 'YYYY_MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF order_item FOR VALUES FROM (%L) TO (%L)',
+                    'order_item_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute("CREATE TABLE order__default PARTITION OF order_ DEFAULT")
+    op.execute("CREATE TABLE order_item_default PARTITION OF order_item DEFAULT")
+
+    op.execute(
+        f"""
+        INSERT INTO order_ ({ORDER_COLUMN_NAMES})
+        SELECT {ORDER_COLUMN_NAMES} FROM order_legacy
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_item (
+            order_item_id, quantity, price, order_id, book_bookstore_mapping_id, order_time
+        )
+        SELECT
+            order_item_legacy.order_item_id,
+            order_item_legacy.quantity,
+            order_item_legacy.price,
+            order_item_legacy.order_id,
+            order_item_legacy.book_bookstore_mapping_id,
+            order_legacy.order_time
+        FROM order_item_legacy
+        JOIN order_legacy ON order_legacy.order_id = order_item_legacy.order_id
+        """
+    )
+    op.drop_table("order_item_legacy")
+    op.drop_table("order_legacy")
+    op.execute("ANALYZE order_")
+    op.execute("ANALYZE order_item")
+
+
+def downgrade():
+    # the partitions moved to the archive schema are left there
+    op.drop_constraint("order_item_order_id_order_time_fkey", "order_item", type_="foreignkey")
+    for table, name in ORDER_FOREIGN_KEYS[1:]:
+        op.drop_constraint(name, table, type_="foreignkey")
+    op.rename_table("order_", "order_partitioned")
+    op.rename_table("order_item", "order_item_partitioned")
+    op.execute("ALTER INDEX order__pkey RENAME TO order_partitioned_pkey")
+    op.execute("ALTER INDEX order_item_pkey RENAME TO order_item_partitioned_pkey")
+    op.execute("ALTER INDEX ix_order_open RENAME TO ix_order_partitioned_open")
+    op.drop_index("ix_order_bookstore_id", table_name="order_partitioned")
+    op.drop_index("ix_order_customer_account", table_name="order_partitioned")
+    op.drop_index("ix_order_item_order_id", table_name="order_item_partitioned")
+
+    op.create_table("order_", *_order_columns(), sa.PrimaryKeyConstraint("order_id"))
+    op.create_table(
+        "order_item",
+        *_order_item_columns(),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["order_.order_id"],
+        ),
+        sa.PrimaryKeyConstraint("order_item_id"),
+    )
+    op.create_index(
+        "ix_order_open",
+        "order_",
+        ["bookstore_id", "status", "order_time", "order_id"],
+        unique=False,
+        postgresql_where=sa.text(OPEN_STATUS_PREDICATE),
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO order_ ({ORDER_COLUMN_NAMES})
+        SELECT {ORDER_COLUMN_NAMES} FROM order_partitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_item (
+            order_item_id, quantity, price, order_id, book_bookstore_mapping_id
+        )
+        SELECT order_item_id, quantity, price, order_id, book_bookstore_mapping_id
+        FROM order_item_partitioned
+        """
+    )
+    op.drop_table("order_item_partitioned")
+    op.drop_table("order_partitioned")
+
+    op.create_foreign_key(
+        "order_status_history_order_id_fkey",
+        "order_status_history",
+        "order_",
+        ["order_id"],
+        ["order_id"],
+    )
@@ -0,0 +1,62 @@
+"""uuid v7 keys
+
+Revision ID: c90b4f2e6a13
+Revises: 7d4c1e9a2b58
+Create Date: 2026-10-19 11:45:08.370921
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c90b4f2e6a13"
+down_revision = "7d4c1e9a2b58"
+branch_labels = None
+depends_on = None
+
+# (table, primary key) inserted on every checkout, cart change or order update
+UUID_V7_KEYS = (
+    ("order_", "order_id"),
+    ("order_item", "order_item_id"),
+    ("order_status_history", "history_id"),
+    ("cart_item", "cart_item_id"),
+    ("book_bookstore_mapping", "book_bookstore_mapping_id"),
+    ("outbox_message", "message_id"),
+)
+
+
+def upgrade():
+    # RFC 9562 version 7: 48 bits of unix time in milliseconds, then the random bits of a v4
+    # uuid with its version set to 7. New keys sort after the older ones, so the inserts go to
+    # the right-most page of the primary key index instead of a random page.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(
+                -- bits 52 and 53 turn the version 4 into 7
+                set_bit(
+                    set_bit(
+                        overlay(uuid_send(gen_random_uuid()) PLACING unix_ms FROM 1 FOR 6), 52, 1
+                    ),
+                    53,
+                    1
+                ),
+                'hex'
+            )::uuid
+            FROM (
+                SELECT substring(
+                    int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3
+                ) AS unix_ms
+            ) AS now_ms
+        $$ LANGUAGE sql VOLATILE PARALLEL SAFE
+        """
+    )
+    # only new rows get v7 keys, the existing keys stay as they are
+    for table, column in UUID_V7_KEYS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT uuid_generate_v7()")
+
+
+def downgrade():
+    for table, column in UUID_V7_KEYS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT gen_random_uuid()")
+    op.execute("DROP FUNCTION uuid_generate_v7()")
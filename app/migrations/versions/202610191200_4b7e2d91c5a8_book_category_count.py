@@ -0,0 +1,110 @@
+"""book category count
+
+Revision ID: 4b7e2d91c5a8
+Revises: c90b4f2e6a13
+Create Date: 2026-10-19 12:00:41.120573
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4b7e2d91c5a8"
+down_revision = "c90b4f2e6a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "book_category_count",
+        sa.Column("category", sa.Text(), nullable=False),
+        sa.Column("book_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("category"),
+    )
+    op.execute(
+        """
+        INSERT INTO book_category_count (category, book_count)
+        SELECT category, count(*) FROM book WHERE category IS NOT NULL GROUP BY category
+        """
+    )
+
+    # statement level triggers, a COPY or a multi-row insert updates every category it touches
+    # once. The categories are upserted in order so concurrent writers lock them in the same
+    # order, a row whose count reaches 0 is kept and skipped by the readers.
+    op.execute(
+        """
+        CREATE FUNCTION book_category_count_refresh() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO book_category_count AS counts (category, book_count)
+                SELECT category, count(*) FROM new_books
+                WHERE category IS NOT NULL
+                GROUP BY category ORDER BY category
+                ON CONFLICT (category)
+                DO UPDATE SET book_count = counts.book_count + EXCLUDED.book_count;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE book_category_count AS counts
+                SET book_count = counts.book_count - deleted.book_count
+                FROM (
+                    SELECT category, count(*) AS book_count FROM old_books GROUP BY category
+                ) AS deleted
+                WHERE counts.category = deleted.category;
+            ELSE
+                INSERT INTO book_category_count AS counts (category, book_count)
+                SELECT category, sum(delta) FROM (
+                    SELECT category, 1 AS delta FROM new_books
+                    UNION ALL
+                    SELECT category, -1 AS delta FROM old_books
+                ) AS changed
+                WHERE category IS NOT NULL
+                GROUP BY category HAVING sum(delta) <> 0 ORDER BY category
+                ON CONFLICT (category)
+                DO UPDATE SET book_count = counts.book_count + EXCLUDED.book_count;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER book_category_count_insert AFTER INSERT ON book
+        REFERENCING NEW TABLE AS new_books
+        FOR EACH STATEMENT EXECUTE FUNCTION book_category_count_refresh()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER book_category_count_update AFTER UPDATE ON book
+        REFERENCING OLD TABLE AS old_books NEW TABLE AS new_books
+        FOR EACH STATEMENT EXECUTE FUNCTION book_category_count_refresh()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER book_category_count_delete AFTER DELETE ON book
+        REFERENCING OLD TABLE AS old_books
+        FOR EACH STATEMENT EXECUTE FUNCTION book_category_count_refresh()
+        """
+    )
+
+    # a category page reads its newest books in index order, the books without publish date
+    # sort last as the oldest date so the keyset of (date, book_id) never compares a null
+    op.execute(
+        """
+        CREATE INDEX ix_book_category_publish_date ON book (
+            category, coalesce(publish_date, DATE '0001-01-01') DESC, book_id DESC
+        )
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_book_category_publish_date", table_name="book")
+    op.execute("DROP TRIGGER book_category_count_delete ON book")
+    op.execute("DROP TRIGGER book_category_count_update ON book")
+    op.execute("DROP TRIGGER book_category_count_insert ON book")
+    op.execute("DROP FUNCTION book_category_count_refresh()")
+    op.drop_table("book_category_count")
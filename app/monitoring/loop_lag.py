@@ -0,0 +1,149 @@
+"""Event loop lag monitor and a watchdog that reports what blocks the loop."""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+from app.logging.logger import get_logger
+from app.middleware.request_context import get_task_request_context
+from app.monitoring.metrics import metrics
+
+logger = get_logger()
+
+loop_lag_seconds = metrics.gauge(
+    "event_loop_lag_seconds", "Delay of the latest lag probe beyond its scheduled time."
+)
+loop_lag_histogram = metrics.histogram(
+    "event_loop_lag_histogram_seconds", "Delay of the lag probes beyond their scheduled time."
+)
+loop_blocked_total = metrics.counter(
+    "event_loop_blocked_total", "Times a callback held the loop longer than the threshold."
+)
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval and measures how late it wakes up,
+    the lateness is the time the loop spent on other callbacks.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start_time = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start_time - self.interval, 0.0)
+            loop_lag_seconds.set(lag)
+            loop_lag_histogram.observe(lag)
+
+
+class SlowCallbackWatchdog(threading.Thread):
+    """
+    Pings the loop from a thread; when a ping is not served within the threshold, the loop
+    is blocked and the stack of the loop thread plus the route of the running task are
+    captured. Unlike asyncio debug mode it costs nothing on the loop itself, and only a
+    sample of the blocking episodes is logged.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float, sample_rate: float):
+        super().__init__(name="slow-callback-watchdog", daemon=True)
+        self.loop = loop
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._loop_thread_id = threading.get_ident()
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _capture(self) -> tuple:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+
+        route = None
+        task = asyncio.current_task(self.loop)
+        if task is not None:
+            request_context = get_task_request_context(task)
+            route = request_context.route if request_context else None
+            route = route or task.get_name()
+        return route, stack
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            served = threading.Event()
+            try:
+                self.loop.call_soon_threadsafe(served.set)
+            except RuntimeError:
+                # the loop is closed
+                return
+
+            start_time = time.monotonic()
+            if not served.wait(self.threshold):
+                sampled = random.random() < self.sample_rate
+                route, stack = self._capture() if sampled else (None, None)
+
+                served.wait()
+                loop_blocked_total.inc()
+                if sampled:
+                    logger.warning(
+                        "Event loop blocked for at least %.3fs by %s, stack:\n%s",
+                        time.monotonic() - start_time,
+                        route or "a callback",
+                        stack,
+                    )
+
+            self._stopping.wait(self.threshold)
+
+
+class LoopMonitor:
+    """Owns the lag monitor task and the optional watchdog thread of a worker."""
+
+    def __init__(self):
+        self._lag_monitor: Optional[LoopLagMonitor] = None
+        self._watchdog: Optional[SlowCallbackWatchdog] = None
+
+    def start(self) -> None:
+        self._lag_monitor = LoopLagMonitor(settings.LOOP_LAG_INTERVAL_SECONDS)
+        self._lag_monitor.start()
+
+        if settings.SLOW_CALLBACK_DEBUG:
+            self._watchdog = SlowCallbackWatchdog(
+                asyncio.get_running_loop(),
+                threshold=settings.SLOW_CALLBACK_THRESHOLD_SECONDS,
+                sample_rate=settings.SLOW_CALLBACK_SAMPLE_RATE,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.stop()
+            self._watchdog = None
+        if self._lag_monitor is not None:
+            await self._lag_monitor.stop()
+            self._lag_monitor = None
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,116 @@
+"""Stack sampling profiler of this worker, idle unless a profile is requested."""
+
+import asyncio
+import concurrent.futures.thread
+import os
+import queue
+import selectors
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+MAX_STACK_DEPTH = 128
+
+# innermost (file, function) of a thread that waits in the stdlib (selector, locks, queues)
+# instead of working, the same names in application code are not idle
+IDLE_FUNCTIONS = frozenset(
+    {
+        (selectors.__file__, "select"),
+        (threading.__file__, "wait"),
+        (threading.__file__, "_wait_for_tstate_lock"),
+        (queue.__file__, "get"),
+        # the idle workers of asyncio.to_thread block in the C get of a SimpleQueue
+        (concurrent.futures.thread.__file__, "_worker"),
+    }
+)
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfileInProgress(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> List[str]:
+    """Frames of a stack, outermost first."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class ProfileResult:
+    def __init__(self, duration: float, interval: float):
+        self.duration = duration
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def collapsed(self) -> str:
+        """One 'thread;outer;...;inner count' line per stack, the input of flamegraph.pl."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 50) -> List[Dict[str, object]]:
+        """Functions by the share of samples they are on top of the stack (self), then on it (total)."""
+        total: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        samples = max(sum(self.stacks.values()), 1)
+        return [
+            {
+                "function": function,
+                "total_percent": round(100 * count / samples, 2),
+                "self_percent": round(100 * own[function] / samples, 2),
+            }
+            for function, count in sorted(
+                total.items(), key=lambda item: (own[item[0]], item[1]), reverse=True
+            )[:limit]
+        ]
+
+
+def _sample(result: ProfileResult, stop_at: float, include_idle: bool) -> None:
+    own_ident = threading.get_ident()
+
+    while time.monotonic() < stop_at:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            code = frame.f_code
+            if not include_idle and (code.co_filename, code.co_name) in IDLE_FUNCTIONS:
+                continue
+            frames = _collapse(frame)
+            thread_name = names.get(ident, str(ident))
+            result.stacks[";".join([thread_name, *frames])] += 1
+        result.samples += 1
+        time.sleep(result.interval)
+
+
+async def profile(duration: float, interval: float, include_idle: bool = False) -> ProfileResult:
+    """
+    Sample the stacks of every thread of the worker, the event loop thread included,
+    from a separate thread for duration seconds. Only one profile runs at a time.
+    """
+    if _profile_lock.locked():
+        raise ProfileInProgress("Another profile is running on this worker")
+
+    async with _profile_lock:
+        result = ProfileResult(duration, interval)
+        await asyncio.to_thread(_sample, result, time.monotonic() + duration, include_idle)
+        return result
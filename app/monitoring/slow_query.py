@@ -0,0 +1,189 @@
+"""Slow query log and per-statement timing table of this worker, a pg_stat_statements-lite."""
+
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.logging.logger import get_logger
+from app.middleware.request_context import get_request_context
+from app.monitoring.metrics import metrics
+
+logger = get_logger()
+
+slow_queries_total = metrics.counter(
+    "db_slow_queries_total", "Statements slower than SLOW_QUERY_THRESHOLD_MS."
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+\b|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """The statement with literals and bind parameters replaced by ?, IN lists collapsed."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _BIND_PARAMETER.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(?, ...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the bind parameters, never their values."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return "()"
+
+
+def _buffered_row_count(cursor) -> int:
+    """
+    Rows of a SELECT on the asyncpg adapter, which only sets rowcount for writes. _rows is the
+    private buffer of sqlalchemy's AsyncAdapt_asyncpg_cursor, other adapters count as 0.
+    """
+    try:
+        return len(cursor._rows)
+    except (AttributeError, TypeError):
+        return 0
+
+
+class QueryStats:
+    __slots__ = ("calls", "total_time", "max_time", "rows", "slow_calls", "last_route")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+        self.last_route: Optional[str] = None
+
+    def merge(self, other: "QueryStats") -> "QueryStats":
+        merged = QueryStats()
+        merged.calls = self.calls + other.calls
+        merged.total_time = self.total_time + other.total_time
+        merged.max_time = max(self.max_time, other.max_time)
+        merged.rows = self.rows + other.rows
+        merged.slow_calls = self.slow_calls + other.slow_calls
+        merged.last_route = self.last_route or other.last_route
+        return merged
+
+
+class SlowQueryLog:
+    """
+    Times every statement of the engines it is installed on. Statements over the threshold
+    are logged, and all of them are aggregated by fingerprint over a rolling window made of
+    the current and the previous period.
+    """
+
+    def __init__(self, max_entries: int, window_seconds: float):
+        self.max_entries = max_entries
+        self.window_seconds = window_seconds
+        self._current: Dict[str, QueryStats] = {}
+        self._previous: Dict[str, QueryStats] = {}
+        self._window_start = time.monotonic()
+        # statements also run in threads, e.g. alembic in init_db
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # kept on the execution context of the statement, a failing statement never reaches
+        # after_cursor_execute and its start time goes away with the context
+        context._slow_query_start_time = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_start_time
+
+        rowcount = cursor.rowcount
+        if rowcount is None or rowcount < 0:
+            rowcount = _buffered_row_count(cursor)
+
+        request_context = get_request_context()
+        route = request_context.route if request_context else None
+        query_fingerprint = fingerprint(statement)
+        slow = elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS
+
+        self._record(query_fingerprint, elapsed, rowcount, route, slow)
+
+        if slow:
+            slow_queries_total.inc()
+            logger.warning(
+                "Slow query %.1fms, rows: %s, route: %s, parameters: %s, statement: %s",
+                elapsed * 1000,
+                rowcount,
+                route,
+                parameter_shape(parameters, executemany),
+                query_fingerprint,
+            )
+
+    def _record(
+        self, query_fingerprint: str, elapsed: float, rows: int, route: Optional[str], slow: bool
+    ) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_seconds:
+                self._previous, self._current = self._current, {}
+                self._window_start = now
+
+            stats = self._current.get(query_fingerprint)
+            if stats is None:
+                if len(self._current) >= self.max_entries:
+                    cheapest = min(self._current, key=lambda key: self._current[key].total_time)
+                    del self._current[cheapest]
+                stats = self._current[query_fingerprint] = QueryStats()
+
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.rows += rows
+            if slow:
+                stats.slow_calls += 1
+            if route:
+                stats.last_route = route
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            merged = dict(self._previous)
+            for key, stats in self._current.items():
+                merged[key] = stats.merge(merged[key]) if key in merged else stats
+
+        ranked = sorted(merged.items(), key=lambda item: item[1].total_time, reverse=True)
+        return [
+            {
+                "fingerprint": key,
+                "calls": stats.calls,
+                "total_ms": round(stats.total_time * 1000, 2),
+                "mean_ms": round(stats.total_time * 1000 / stats.calls, 3),
+                "max_ms": round(stats.max_time * 1000, 2),
+                "rows": stats.rows,
+                "slow_calls": stats.slow_calls,
+                "last_route": stats.last_route,
+            }
+            for key, stats in ranked[:limit]
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._current, self._previous = {}, {}
+            self._window_start = time.monotonic()
+
+
+slow_query_log = SlowQueryLog(
+    max_entries=settings.SLOW_QUERY_MAX_ENTRIES, window_seconds=settings.SLOW_QUERY_WINDOW_SECONDS
+)
@@ -2,7 +2,13 @@ from typing import Tuple, Annotated, Optional
 from uuid import UUID
 from datetime import date
 from fastapi import APIRouter, Depends, Request, status, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.router.template.index import templates
@@ -10,14 +16,20 @@ from app.middleware.db_session import get_db_session
 from app.middleware.depends import validate_token_by_role
 from app.enum.user import UserRole
 from app.enum.coupon import CouponType
+from app.enum.export import ExportFormat, ExportKind
 from app.util.auth import JwtPayload
 from app.db.models.admin import Admin
 from app.db.operator.customer import get_all_customers, update_customer_info, delete_customer
 from app.db.operator.staff import delete_staff
 from app.db.operator.coupon import create_coupon, delete_coupon
+from app.util.export import export_response
+from app.monitoring.profiler import ProfileInProgress, profile
+from app.monitoring.slow_query import slow_query_log
 
 router = APIRouter()
 
+MAX_PROFILE_SECONDS = 60
+
 AdminDep = Tuple[JwtPayload, Admin]
 
 @router.put("/users/{account}")
@@ -117,3 +129,60 @@ async def remove_coupon(
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/exports/{kind}", response_class=StreamingResponse)
+async def export_bookstore(
+    kind: ExportKind,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    user_data: AdminDep = Depends(validate_token_by_role(UserRole.ADMIN))
+):
+    """Admin 匯出任一書店的訂單、訂單明細或每日銷售"""
+    return export_response(
+        kind=kind,
+        export_format=format,
+        bookstore_id=bookstore_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+@router.get("/profile")
+async def profile_worker(
+    seconds: float = 10,
+    interval_ms: float = 10,
+    format: str = "collapsed",
+    include_idle: bool = False,
+    user_data: AdminDep = Depends(validate_token_by_role(UserRole.ADMIN))
+):
+    """Admin 取樣分析目前 worker 的所有執行緒 (collapsed stacks 或 top functions)"""
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+    if format not in ("collapsed", "top"):
+        raise HTTPException(status_code=400, detail="format must be collapsed or top")
+
+    try:
+        result = await profile(seconds, interval_ms / 1000, include_idle=include_idle)
+    except ProfileInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "top":
+        return {"samples": result.samples, "seconds": seconds, "functions": result.top()}
+    return PlainTextResponse(result.collapsed())
+
+
+@router.get("/slow_queries")
+async def get_slow_queries(
+    limit: int = 20,
+    reset: bool = False,
+    user_data: AdminDep = Depends(validate_token_by_role(UserRole.ADMIN))
+):
+    """Admin 查看目前 worker 總耗時最高的 SQL (依 fingerprint 彙總)"""
+    queries = slow_query_log.top(limit=limit)
+    if reset:
+        slow_query_log.reset()
+    return {"window_seconds": slow_query_log.window_seconds, "queries": queries}
@@ -0,0 +1,146 @@
+"""
+Versioned JSON API of the catalog for logged in customers, like the catalog pages. The stock of
+every bookstore is returned, it is not public.
+
+The rows of the operators are serialized by orjson as they are (uuid and date included), the
+handlers return the response themselves so FastAPI skips jsonable_encoder and pydantic.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.operator.book import BOOK_FIELDS, get_all_categories, get_book_fields, list_books_page
+from app.db.operator.bookbookstoremapping import get_offers_by_book_ids
+from app.enum.user import UserRole
+from app.middleware.db_session import get_db_session
+from app.middleware.depends import validate_token_by_role
+from app.util.pagination import decode_cursor, encode_cursor, parse_fields
+
+MAX_PAGE_SIZE = 200
+# offers are read with a second query for the whole page
+BOOK_LIST_FIELDS = (*BOOK_FIELDS, "offers")
+
+validate_customer_token = validate_token_by_role(UserRole.CUSTOMER)
+
+router = APIRouter(
+    default_response_class=ORJSONResponse, dependencies=[Depends(validate_customer_token)]
+)
+
+
+def _error_response(err: Exception) -> ORJSONResponse:
+    return ORJSONResponse({"error": repr(err)}, status_code=400)
+
+
+async def _attach_offers(db: AsyncSession, books: List[Dict[str, Any]]) -> None:
+    offers = defaultdict(list)
+    for row in await get_offers_by_book_ids(db, [book["book_id"] for book in books]):
+        offer = row._asdict()
+        offers[offer.pop("book_id")].append(offer)
+
+    for book in books:
+        book["offers"] = offers.get(book["book_id"], [])
+
+
+async def _books_page(
+    db: AsyncSession,
+    fields: Optional[str],
+    cursor: Optional[str],
+    limit: int,
+    category: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> ORJSONResponse:
+    try:
+        # 1. 解析 fields 與 cursor
+        selected_fields = parse_fields(fields, BOOK_LIST_FIELDS)
+        after_book_id = UUID(decode_cursor(cursor)["book_id"]) if cursor else None
+    except (ValueError, KeyError, TypeError) as err:
+        return _error_response(err)
+
+    # 2. 多查一筆，判斷是否還有下一頁
+    rows = await list_books_page(
+        db=db,
+        fields=[field for field in selected_fields if field != "offers"],
+        after_book_id=after_book_id,
+        limit=limit + 1,
+        category=category,
+        keyword=keyword,
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"book_id": str(rows[-1].book_id)})
+
+    books = [row._asdict() for row in rows]
+    # 3. 一次查出整頁書的各書店價格
+    if "offers" in selected_fields:
+        await _attach_offers(db, books)
+
+    return ORJSONResponse({"data": books, "next_cursor": next_cursor})
+
+
+@router.get("/books")
+async def list_books(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="comma separated, e.g. title,author,offers"),
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_session),
+):
+    return await _books_page(db, fields, cursor, limit, category=category)
+
+
+@router.get("/search")
+async def search_books(
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="comma separated, e.g. title,author,offers"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Books whose title or author contains q."""
+    return await _books_page(db, fields, cursor, limit, keyword=q)
+
+
+@router.get("/books/{book_id}")
+async def get_book(
+    book_id: UUID,
+    fields: Optional[str] = Query(None, description="comma separated, e.g. title,author,offers"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    try:
+        selected_fields = parse_fields(fields, BOOK_LIST_FIELDS)
+    except ValueError as err:
+        return _error_response(err)
+
+    row = await get_book_fields(
+        db=db, book_id=book_id, fields=[field for field in selected_fields if field != "offers"]
+    )
+    if row is None:
+        return ORJSONResponse({"error": f"Book {book_id} not found."}, status_code=404)
+
+    book = row._asdict()
+    if "offers" in selected_fields:
+        await _attach_offers(db, [book])
+
+    return ORJSONResponse({"data": book})
+
+
+@router.get("/books/{book_id}/offers")
+async def get_book_offers(book_id: UUID, db: AsyncSession = Depends(get_db_session)):
+    """Price and stock of the book at every bookstore, cheapest first."""
+    rows = await get_offers_by_book_ids(db=db, book_ids=[book_id])
+    offers = [row._asdict() for row in rows]
+    for offer in offers:
+        del offer["book_id"]
+    return ORJSONResponse({"data": offers})
+
+
+@router.get("/categories")
+async def list_categories(db: AsyncSession = Depends(get_db_session)):
+    categories = await get_all_categories(db=db)
+    return ORJSONResponse({"data": sorted(categories)})
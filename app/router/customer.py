@@ -1,9 +1,9 @@
 from typing import Tuple, Annotated, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, Request, status, Form
+from fastapi import APIRouter, Depends, Header, Request, status, Form
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 
 from app.middleware.depends import validate_token_by_role
 from app.middleware.db_session import get_db_session
@@ -24,8 +24,13 @@ from app.db.operator.shopping_cart import (
     get_cart_item_by_item_id,
 )
 from app.db.operator.coupon import get_coupon_by_id
+from app.db.operator.outbox import create_outbox_message
 from app.enum.order import OrderStatus
+from app.enum.outbox import OutboxTopic
 from app.util.coupon import apply_coupon
+from app.util.idempotency import replay_or_claim, store_response
+from app.util.order_events import iter_sse, order_status_hub
+from app.util.outbox import order_confirmation_payload
 from app.logging.logger import get_logger
 
 logger = get_logger()
@@ -42,12 +47,17 @@ async def add_to_cart(
     book_id: Annotated[UUID, Form()],
     bookstore_id: Annotated[UUID, Form()],
     quantity: Annotated[int, Form()] = 1,
+    idempotency_key: Annotated[Optional[str], Header()] = None,
     login_data: Tuple[JwtPayload, Customer] = Depends(validate_customer_token),
     db: AsyncSession = Depends(get_db_session),
 ):
     token_payload, customer = login_data
 
     try:
+        replay = await replay_or_claim(db, customer.account, idempotency_key, "add_to_cart")
+        if replay is not None:
+            return replay
+
         cart = await get_cart_by_account(db, customer.account)
 
         if not cart:
@@ -66,9 +76,12 @@ async def add_to_cart(
         else:
             await create_cart_item(db, cart.cart_id, mapping.book_bookstore_mapping_id, quantity)
 
+        response = JSONResponse({"message": "Successfully added to cart"})
+        await store_response(db, customer.account, idempotency_key, response)
+
         await db.commit()
 
-        return {"message": "Successfully added to cart"}
+        return response
 
     except Exception as e:
         #  Rollback
@@ -118,12 +131,18 @@ async def create_customer_order(
     recipient_address: Annotated[str, Form()],
     bookstore_id: Annotated[UUID, Form()],
     coupon_id: Annotated[Optional[UUID], Form()] = None,
+    idempotency_key: Annotated[Optional[str], Form()] = None,
     login_data: Tuple[JwtPayload, Customer] = Depends(validate_customer_token),
     db: AsyncSession = Depends(get_db_session),
 ):
     token_payload, customer = login_data
 
     try:
+        # 0. 重送或連點的結帳直接回傳第一次的結果，不再重跑整個流程
+        replay = await replay_or_claim(db, customer.account, idempotency_key, "create_order")
+        if replay is not None:
+            return replay
+
         cart = await get_cart_by_account(db, customer.account)
         if not cart or not cart.cart_items:
             raise Exception("Cart is empty")
@@ -191,6 +210,7 @@ async def create_customer_order(
                     "mapping_id": mapping.book_bookstore_mapping_id,
                     "price": mapping.price,
                     "quantity": item.quantity,
+                    "title": mapping.book.title,
                 }
             )
 
@@ -205,6 +225,7 @@ async def create_customer_order(
             shipping_fee=bookstore.shipping_fee,
             recipient_name=recipient_name,
             status=OrderStatus.RECEIVED.value,
+            bookstore_id=bookstore.bookstore_id,
         )
 
         if coupon:
@@ -227,6 +248,7 @@ async def create_customer_order(
             await create_order_item(
                 db=db,
                 order_id=order.order_id,
+                order_time=order.order_time,
                 mapping_id=data["mapping_id"],
                 quantity=data["quantity"],
                 price=data["price"],
@@ -238,13 +260,31 @@ async def create_customer_order(
             db=db, cart_item_ids=[item.cart_item_id for item in target_cart_items]
         )
 
-        await db.commit()
+        # 6. 確認信由 outbox worker 在 commit 後寄出，不影響結帳時間
+        if order.customer_email:
+            await create_outbox_message(
+                db=db,
+                topic=OutboxTopic.ORDER_CONFIRMATION,
+                payload=order_confirmation_payload(
+                    order=order,
+                    bookstore_name=bookstore.name,
+                    items=[
+                        {key: data[key] for key in ("title", "quantity", "price")}
+                        for data in order_items_data
+                    ],
+                ),
+            )
 
         # 8. 跳轉到訂單列表或成功頁面
-        return RedirectResponse(
+        response = RedirectResponse(
             url="/frontend/customers/orders?checkout_succeeds=true",
             status_code=status.HTTP_303_SEE_OTHER,
         )
+        await store_response(db, customer.account, idempotency_key, response)
+
+        await db.commit()
+
+        return response
 
     except Exception as err:
         logger.error(err)
@@ -278,3 +318,17 @@ async def update_customer_profile(
         url="/frontend/customers/profile",
         status_code=status.HTTP_303_SEE_OTHER,
     )
+
+
+@router.get("/orders/events", response_class=StreamingResponse)
+async def stream_customer_order_events(
+    login_data: Tuple[JwtPayload, Customer] = Depends(validate_customer_token),
+):
+    """Server-sent events of the status changes of the customer's orders."""
+    _, customer = login_data
+
+    return StreamingResponse(
+        iter_sse(order_status_hub, customer.account, "order_status"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,6 @@
+from datetime import date
 from typing import Tuple, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 from fastapi import APIRouter, Depends, Request, status
 from fastapi.responses import RedirectResponse
 
@@ -16,24 +17,30 @@ from app.db.operator.coupon import (
     get_active_bookstore_coupons,
 )
 from app.util.auth import JwtPayload
+from app.util.cache import catalog_cache
+from app.util.pagination import decode_cursor, encode_cursor
 from app.router.template.index import templates
 
-from app.router.schema.sqlalchemy import (
-    BookSchema,
-    BookstoreSchema,
-    CouponSchema,
-    OrderItemSchema,
-    OrderSchema,
+from app.router.schema.mapper import (
+    book_mapper,
+    bookstore_mapper,
+    coupon_mapper,
+    order_item_mapper,
+    order_mapper,
+    order_status_history_mapper,
 )
 from app.db.operator.cart import get_cart_item_count, get_cart_details
-from app.db.operator.book import get_all_categories
+from app.db.operator.book import get_category_counts, list_books_by_category
 from app.db.operator.bookstore import get_bookstore_by_id
 from app.db.operator.bookbookstoremapping import (
     search_books_with_bookstore_details,
     get_new_arrivals_with_bookstore_details,
+    get_category_counts_by_bookstore,
 )
 
 
+CATEGORY_PAGE_SIZE = 24
+
 router = APIRouter()
 
 validate_customer_token = validate_token_by_role(UserRole.CUSTOMER)
@@ -61,20 +68,22 @@ async def get_customer_orders(
         order_dicts = []
 
         for order in orders:
-            order_dict = OrderSchema.from_orm(order).dict()
+            order_dict = order_mapper.dict(order)
             order_dict["order_items"] = []
 
+            order_dict["status_history"] = order_status_history_mapper.dicts(order.status_history)
+
             if hasattr(order, "coupon") and order.coupon:
-                order_dict["coupon"] = CouponSchema.from_orm(order.coupon).dict()
+                order_dict["coupon"] = coupon_mapper.dict(order.coupon)
             else:
                 order_dict["coupon"] = None
 
             order_dicts.append(order_dict)
 
             for item in order.order_items:
-                item_dict = OrderItemSchema.from_orm(item).dict()
-                book = BookSchema.from_orm(item.book_bookstore_mapping.book).dict()
-                bookstore = BookstoreSchema.from_orm(item.book_bookstore_mapping.bookstore).dict()
+                item_dict = order_item_mapper.dict(item)
+                book = book_mapper.dict(item.book_bookstore_mapping.book)
+                bookstore = bookstore_mapper.dict(item.book_bookstore_mapping.bookstore)
                 item_dict["book"] = book
                 item_dict["bookstore"] = bookstore
 
@@ -114,33 +123,38 @@ async def search_books_redirect(
 
 def group_results_by_bookstore(rows) -> dict[str, list[dict[str, any]]]:
     """
-    輸入 rows: List of (Book, Mapping, Bookstore)
+    輸入 rows: 書籍與書店欄位的 rows
     輸出: {"Bookstore Name": [BookDict, ...]}
     """
     grouped = {}
-    for book, mapping, bookstore in rows:
-        bs_name = bookstore.name
+    for row in rows:
+        bs_name = row.bookstore_name
         if bs_name not in grouped:
             grouped[bs_name] = []
 
         grouped[bs_name].append(
             {
-                "book_id": book.book_id,
-                "title": book.title,
-                "author": book.author,
+                "book_id": row.book_id,
+                "title": row.title,
+                "author": row.author,
                 "image_url": "/static/book.png",
-                "price": mapping.price,
-                "bookstore_id": bookstore.bookstore_id,
-                "bookstore_name": bookstore.name,
-                "category": book.category,
-                "publish_date": book.publish_date,
-                "isbn": book.isbn,
-                "publisher": book.publisher,
+                "price": row.price,
+                "bookstore_id": row.bookstore_id,
+                "bookstore_name": row.bookstore_name,
+                "category": row.category,
+                "publish_date": row.publish_date,
+                "isbn": row.isbn,
+                "publisher": row.publisher,
             }
         )
     return grouped
 
 
+async def _load_grouped_new_arrivals(db: AsyncSession):
+    new_rows = await get_new_arrivals_with_bookstore_details(db)
+    return group_results_by_bookstore(new_rows)
+
+
 @router.get("/home")
 async def customer_homepage(
     request: Request,
@@ -178,26 +192,28 @@ async def customer_homepage(
             }
         )
     else:
-        # 首頁模式
-        categories = []
+        # 首頁模式：分類與新書對所有顧客都相同，以 catalog version 快取
+        category_counts = []
         try:
-            categories = await get_all_categories(db)
+            category_counts = await catalog_cache.get_or_load(
+                "home:category_counts", lambda: get_category_counts(db)
+            )
         except Exception:
             pass
 
         # 新書：使用新函式並分組
-        new_rows = []
+        grouped_new_arrivals = {}
         try:
-            new_rows = await get_new_arrivals_with_bookstore_details(db)
+            grouped_new_arrivals = await catalog_cache.get_or_load(
+                "home:grouped_new_arrivals", lambda: _load_grouped_new_arrivals(db)
+            )
         except Exception:
             pass
 
-        grouped_new_arrivals = group_results_by_bookstore(new_rows)
-
         context.update(
             {
                 "is_search_mode": False,
-                "categories": categories,
+                "category_counts": category_counts,
                 "grouped_new_arrivals": grouped_new_arrivals,  # 傳遞分組後的資料
                 # 暫時留空其他區塊
                 "bestsellers": [],
@@ -210,6 +226,77 @@ async def customer_homepage(
     )
 
 
+@router.get("/categories/{category:path}")
+async def browse_category(
+    request: Request,
+    category: str,
+    cursor: Optional[str] = None,
+    bookstore_id: Optional[UUID] = None,
+    login_data: Tuple[JwtPayload, Customer] = Depends(validate_customer_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    _, customer = login_data
+
+    cart_count = 0
+    try:
+        cart_count = await get_cart_item_count(db, customer.account)
+    except Exception:
+        pass
+
+    # 1. 解析 cursor，無效的 cursor 從第一頁開始
+    after = None
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            after = (date.fromisoformat(values["publish_date"]), UUID(values["book_id"]))
+        except (ValueError, KeyError, TypeError):
+            after = None
+
+    # 2. 分類與各書店的書籍數量，以 catalog version 快取
+    category_counts = []
+    bookstore_counts = []
+    try:
+        category_counts = await catalog_cache.get_or_load(
+            "home:category_counts", lambda: get_category_counts(db)
+        )
+        bookstore_counts = await get_category_counts_by_bookstore(db, category)
+    except Exception:
+        pass
+
+    # 3. 多查一筆，判斷是否還有下一頁
+    rows = await list_books_by_category(
+        db=db,
+        category=category,
+        after=after,
+        limit=CATEGORY_PAGE_SIZE + 1,
+        bookstore_id=bookstore_id,
+    )
+    next_cursor = None
+    if len(rows) > CATEGORY_PAGE_SIZE:
+        rows = rows[:CATEGORY_PAGE_SIZE]
+        next_cursor = encode_cursor(
+            {"publish_date": rows[-1].sort_key.isoformat(), "book_id": str(rows[-1].book_id)}
+        )
+
+    context = {
+        "request": request,
+        "cart_count": cart_count,
+        "q": "",
+        "is_search_mode": False,
+        "is_category_mode": True,
+        "category": category,
+        "bookstore_id": bookstore_id,
+        "category_counts": category_counts,
+        "bookstore_counts": bookstore_counts,
+        "category_books": [row._asdict() for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+    return templates.TemplateResponse(
+        "customer/home.jinja", context=context, status_code=status.HTTP_200_OK
+    )
+
+
 @router.get("/carts")
 async def view_cart(
     request: Request,
@@ -425,6 +512,8 @@ async def checkout_page(
         "cart_count": cart_count,
         "customer": customer,
         "available_coupons": available_coupons,
+        # one key per rendered form, resubmitting it replays the first checkout
+        "idempotency_key": uuid4().hex,
     }
 
     return templates.TemplateResponse(
@@ -7,25 +7,25 @@ from sqlalchemy.exc import NoResultFound
 from app.middleware.depends import validate_token_by_role
 from app.middleware.db_session import get_db_session
 from app.enum.user import UserRole
-from app.enum.order import OrderStatus
+from app.enum.order import NEXT_ORDER_STATUS, PREVIOUS_ORDER_STATUS
 from app.enum.coupon import CouponType
 from app.db.models.staff import Staff
 from app.db.operator.bookstore import get_bookstore_by_id
-from app.db.operator.order import get_orders_by_bookstore_id
+from app.db.operator.order import get_orders_by_bookstore_id, get_open_orders_by_bookstore_id
 from app.db.operator.book import list_books_by_bookstore_id
 from app.db.operator.staff import get_staffs_by_bookstore_id
 from app.db.operator.coupon import get_coupon_by_accounts
 
 from app.util.auth import JwtPayload
 from app.router.template.index import templates
-from app.router.schema.sqlalchemy import (
-    BookstoreSchema,
-    OrderSchema,
-    OrderItemSchema,
-    BookSchema,
-    CouponSchema,
-    BookWithMappingInfo,
-    StaffSchema,
+from app.router.schema.mapper import (
+    book_mapper,
+    book_with_mapping_info_mapper,
+    bookstore_mapper,
+    coupon_mapper,
+    order_item_mapper,
+    order_mapper,
+    staff_mapper,
 )
 from app.logging.logger import get_logger
 
@@ -49,7 +49,7 @@ async def get_staff_bookstore(
 
     try:
         bookstore = await get_bookstore_by_id(db=db, bookstore_id=staff.bookstore_id)
-        bookstore_dict = BookstoreSchema.from_orm(bookstore).dict()
+        bookstore_dict = bookstore_mapper.dict(bookstore)
     except NoResultFound:
         bookstore_dict = None
     except Exception as err:
@@ -87,14 +87,14 @@ async def get_staff_orders(
         order_dicts = []
 
         for order in orders:
-            order_dict = OrderSchema.from_orm(order).dict()
+            order_dict = order_mapper.dict(order)
             order_dict["order_items"] = []
             order_dicts.append(order_dict)
 
             for item in order.order_items:
-                item_dict = OrderItemSchema.from_orm(item).dict()
-                book = BookSchema.from_orm(item.book_bookstore_mapping.book).dict()
-                bookstore = BookstoreSchema.from_orm(item.book_bookstore_mapping.bookstore).dict()
+                item_dict = order_item_mapper.dict(item)
+                book = book_mapper.dict(item.book_bookstore_mapping.book)
+                bookstore = bookstore_mapper.dict(item.book_bookstore_mapping.bookstore)
                 item_dict["book"] = book
                 item_dict["bookstore"] = bookstore
 
@@ -110,7 +110,11 @@ async def get_staff_orders(
         "request": request,
         "staff": staff,
         "orders": order_dicts,
-        "order_statuses": [status.value for status in OrderStatus],
+        # only the transitions transition_orders accepts are offered
+        "next_order_statuses": {
+            previous.value: status.value for previous, status in NEXT_ORDER_STATUS.items()
+        },
+        "bulk_order_statuses": [status.value for status in PREVIOUS_ORDER_STATUS],
         "list_order_error": list_order_error,
         "update_order_error": update_order_error,
     }
@@ -120,6 +124,43 @@ async def get_staff_orders(
     )
 
 
+@router.get("/orders/queue")
+async def get_staff_order_queue(
+    request: Request,
+    claimed_order_id: Optional[str] = None,
+    claim_order_error: Optional[str] = None,
+    update_order_error: Optional[str] = None,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    _, staff = login_data
+    list_order_error = None
+
+    try:
+        orders = await get_open_orders_by_bookstore_id(db=db, bookstore_id=staff.bookstore_id)
+        order_dicts = order_mapper.dicts(orders)
+    except Exception as err:
+        order_dicts = []
+        list_order_error = repr(err)
+
+    context = {
+        "request": request,
+        "staff": staff,
+        "orders": order_dicts,
+        "next_order_statuses": {
+            previous.value: status.value for previous, status in NEXT_ORDER_STATUS.items()
+        },
+        "claimed_order_id": claimed_order_id,
+        "list_order_error": list_order_error,
+        "claim_order_error": claim_order_error,
+        "update_order_error": update_order_error,
+    }
+
+    return templates.TemplateResponse(
+        "/staff/order_queue.jinja", context=context, status_code=status.HTTP_200_OK
+    )
+
+
 @router.get("/books")
 async def get_staff_books(
     request: Request,
@@ -137,7 +178,7 @@ async def get_staff_books(
 
     try:
         books = await list_books_by_bookstore_id(db=db, bookstore_id=staff.bookstore_id)
-        book_dicts = [BookWithMappingInfo.from_orm(book).dict() for book in books]
+        book_dicts = book_with_mapping_info_mapper.dicts(books)
 
     except NoResultFound:
         book_dicts = []
@@ -184,10 +225,10 @@ async def get_staff_coupons(
         coupon_dicts = []
 
         for c in coupons:
-            coupon_dict = CouponSchema.from_orm(c).dict()
+            coupon_dict = coupon_mapper.dict(c)
 
             if c.staff:
-                coupon_dict["staff"] = StaffSchema.from_orm(c.staff).dict()
+                coupon_dict["staff"] = staff_mapper.dict(c.staff)
 
             coupon_dicts.append(coupon_dict)
 
@@ -237,22 +278,12 @@ async def get_staff_statistics(
             pass
 
     try:
-        orders = await get_orders_by_bookstore_id(db=db, bookstore_id=staff.bookstore_id)
+        # 日期範圍交給 db 過濾，只會讀到範圍內月份的 partition
+        orders = await get_orders_by_bookstore_id(
+            db=db, bookstore_id=staff.bookstore_id, start_date=filter_start, end_date=filter_end
+        )
 
         for order in orders:
-            if not getattr(order, "order_time", None):
-                continue
-
-            order_date = order.order_time
-            # Ensure it is a date object (in case driver returns datetime)
-            if isinstance(order_date, datetime):
-                order_date = order_date.date()
-
-            if filter_start and order_date < filter_start:
-                continue
-            if filter_end and order_date > filter_end:
-                continue
-
             for item in order.order_items:
                 # Ensure we only count items belonging to this staff's bookstore
                 if item.book_bookstore_mapping.bookstore_id == staff.bookstore_id:
@@ -263,7 +294,7 @@ async def get_staff_statistics(
                     total_books_sold += books_sold
 
     except Exception as err:
-        logger.error(f"Error calculating statistics: {err}")
+        logger.error("Error calculating statistics: %s", err)
 
     context = {
         "request": request,
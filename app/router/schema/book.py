@@ -0,0 +1,16 @@
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class BookMappingUpdate(BaseModel):
+    book_bookstore_mapping_id: UUID
+    price: Optional[int] = None
+    store_quantity: Optional[int] = None
+
+
+class BulkBookMappingUpdate(BaseModel):
+    updates: List[BookMappingUpdate] = Field(
+        ..., title="updates", description="New price and/or store_quantity of each mapping"
+    )
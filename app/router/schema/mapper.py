@@ -0,0 +1,47 @@
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Type
+
+from pydantic import BaseModel
+
+from app.router.schema.sqlalchemy import (
+    BookSchema,
+    BookstoreSchema,
+    BookWithMappingInfo,
+    CouponSchema,
+    OrderItemSchema,
+    OrderSchema,
+    OrderStatusHistorySchema,
+    StaffSchema,
+)
+
+
+class RowMapper:
+    """
+    Turns ORM instances or Rows into dicts of the fields of a schema. The attribute getter of
+    all the fields is built once, a mapping is one C call and a zip, unlike from_orm(...).dict()
+    which validates and copies every field. The values are not validated, only map rows read
+    from db whose types already match the schema.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.fields = tuple(schema.__fields__)
+        getter = attrgetter(*self.fields)
+        # attrgetter of a single attribute returns the value itself, not a tuple
+        self._getter = getter if len(self.fields) > 1 else lambda obj: (getter(obj),)
+
+    def dict(self, obj: Any) -> Dict[str, Any]:
+        return dict(zip(self.fields, self._getter(obj)))
+
+    def dicts(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        fields, getter = self.fields, self._getter
+        return [dict(zip(fields, getter(obj))) for obj in objs]
+
+
+book_mapper = RowMapper(BookSchema)
+bookstore_mapper = RowMapper(BookstoreSchema)
+book_with_mapping_info_mapper = RowMapper(BookWithMappingInfo)
+coupon_mapper = RowMapper(CouponSchema)
+order_mapper = RowMapper(OrderSchema)
+order_item_mapper = RowMapper(OrderItemSchema)
+order_status_history_mapper = RowMapper(OrderStatusHistorySchema)
+staff_mapper = RowMapper(StaffSchema)
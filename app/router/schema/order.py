@@ -0,0 +1,13 @@
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.enum.order import OrderStatus
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    order_ids: List[UUID] = Field(..., title="order_ids", description="Orders to move")
+    status: OrderStatus = Field(
+        ..., title="status", description="New status, the orders must be in the status before it"
+    )
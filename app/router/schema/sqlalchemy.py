@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 
 
@@ -105,6 +105,18 @@ class OrderSchema(BaseModel):
     recipient_name: str
     coupon_id: Optional[UUID] = None
     customer_account: str
+    bookstore_id: Optional[UUID] = None
+    claimed_by: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class OrderStatusHistorySchema(BaseModel):
+    from_status: Optional[str] = None
+    to_status: str
+    changed_at: datetime
 
     class Config:
         orm_mode = True
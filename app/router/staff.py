@@ -1,20 +1,22 @@
 from typing import Tuple, Annotated, Optional
 from uuid import UUID
-from datetime import date
+from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends, Request, status, Form
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Form, UploadFile, File
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.middleware.depends import validate_token_by_role
 from app.middleware.db_session import get_db_session
 from app.enum.user import UserRole
 from app.enum.order import OrderStatus
 from app.enum.coupon import CouponType
+from app.enum.export import ExportFormat, ExportKind
 from app.db.models.staff import Staff
 from app.db.operator.bookstore import create_bookstore
 from app.db.operator.staff import update_staff
-from app.db.operator.order import update_order
+from app.db.operator.order import claim_next_order, transition_orders
 from app.db.operator.book import create_book, get_book_by_isbn
 from app.db.operator.bookbookstoremapping import (
     get_book_mapping,
@@ -22,13 +24,22 @@ from app.db.operator.bookbookstoremapping import (
     get_book_mapping_by_mapping_id,
     update_book_bookstore_mapping,
     delete_book_bookstore_mapping,
+    bulk_update_book_bookstore_mappings,
 )
 from app.db.operator.coupon import create_coupon, delete_coupon
+from app.router.schema.book import BulkBookMappingUpdate
+from app.router.schema.order import BulkOrderStatusUpdate
 from app.util.auth import JwtPayload
+from app.util.book_import import IMPORT_FORMATS, guess_import_format, import_books, iter_lines
+from app.util.export import export_response
+from app.util.order_events import iter_sse, order_queue_hub
 from app.logging.logger import get_logger
 
 logger = get_logger()
 
+# 3 bind parameters per row, asyncpg allows at most 32767 per statement
+MAX_BULK_MAPPING_UPDATES = 10000
+MAX_BULK_ORDER_UPDATES = 1000
 
 router = APIRouter()
 
@@ -73,26 +84,140 @@ async def create_staff_bookstore(
         return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.post("/orders/claim", response_class=RedirectResponse)
+async def claim_staff_order(
+    request: Request,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    _, staff = login_data
+
+    try:
+        if staff.bookstore_id is None:
+            raise Exception("Staff has no bookstore.")
+
+        order_id = await claim_next_order(
+            db=db,
+            bookstore_id=staff.bookstore_id,
+            staff_account=staff.account,
+            claim_timeout=timedelta(minutes=settings.ORDER_CLAIM_TIMEOUT_MINUTES),
+        )
+        if order_id is None:
+            raise Exception("No received order is waiting.")
+
+        await db.commit()
+
+        redirect_url = f"/frontend/staffs/orders/queue?claimed_order_id={order_id}"
+        return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
+    except Exception as err:
+        await db.rollback()
+        redirect_url = f"/frontend/staffs/orders/queue?claim_order_error={repr(err)}"
+        return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
+
+
+@router.get("/orders/events", response_class=StreamingResponse)
+async def stream_staff_order_events(
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+):
+    """Server-sent events of the new, claimed and released orders of the staff's bookstore."""
+    _, staff = login_data
+
+    if staff.bookstore_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No bookstore.")
+
+    return StreamingResponse(
+        iter_sse(order_queue_hub, str(staff.bookstore_id), "order_queue"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/orders/update", response_class=RedirectResponse)
 async def update_staff_order(
     request: Request,
     order_id: Annotated[UUID, Form()],
     order_status: Annotated[OrderStatus, Form()],
+    from_queue: Annotated[bool, Form()] = False,
     login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
     db: AsyncSession = Depends(get_db_session),
 ):
+    _, staff = login_data
+    page_url = "/frontend/staffs/orders/queue" if from_queue else "/frontend/staffs/orders"
+
     try:
-        await update_order(db=db, order_id=order_id, order_status=order_status)
+        updated_ids = await transition_orders(
+            db=db,
+            bookstore_id=staff.bookstore_id,
+            order_ids=[order_id],
+            to_status=order_status,
+            staff_account=staff.account,
+        )
+        if not updated_ids:
+            raise Exception(
+                f"The order is not in this bookstore or cannot be moved to {order_status}."
+            )
+
         await db.commit()
 
-        redirect_url = "/frontend/staffs/orders"
-        return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
+        return RedirectResponse(page_url, status_code=status.HTTP_303_SEE_OTHER)
     except Exception as err:
         await db.rollback()
-        redirect_url = f"/frontend/staffs/orders?update_order_error={repr(err)}"
+        redirect_url = f"{page_url}?update_order_error={repr(err)}"
         return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.post("/orders/bulk_update", response_class=JSONResponse)
+async def bulk_update_staff_orders(
+    request: Request,
+    bulk_update: BulkOrderStatusUpdate,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Move many orders of the bookstore to the next status at once."""
+    _, staff = login_data
+
+    try:
+        if len(bulk_update.order_ids) > MAX_BULK_ORDER_UPDATES:
+            raise Exception(f"At most {MAX_BULK_ORDER_UPDATES} orders per request.")
+
+        updated_ids = set(
+            await transition_orders(
+                db=db,
+                bookstore_id=staff.bookstore_id,
+                order_ids=bulk_update.order_ids,
+                to_status=bulk_update.status,
+                staff_account=staff.account,
+            )
+        )
+
+        await db.commit()
+
+        result_dicts = []
+        for order_id in dict.fromkeys(bulk_update.order_ids):
+            if order_id in updated_ids:
+                result_dicts.append({"order_id": str(order_id), "status": "updated", "error": None})
+            else:
+                result_dicts.append(
+                    {
+                        "order_id": str(order_id),
+                        "status": "skipped",
+                        "error": (
+                            f"The order is not in this bookstore"
+                            f" or cannot be moved to {bulk_update.status}."
+                        ),
+                    }
+                )
+
+        content = {"updated": len(updated_ids), "results": result_dicts}
+        return JSONResponse(content=content, status_code=status.HTTP_200_OK)
+    except Exception as err:
+        await db.rollback()
+        logger.error(err)
+        return JSONResponse(
+            content={"error": repr(err)}, status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
 @router.post("/books/create", response_class=RedirectResponse)
 async def create_staff_book(
     request: Request,
@@ -151,6 +276,48 @@ async def create_staff_book(
         return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
 
 
+async def _iter_upload_chunks(file: UploadFile, chunk_size: int = 64 * 1024):
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+@router.post("/books/import", response_class=JSONResponse)
+async def import_staff_books(
+    request: Request,
+    file: Annotated[UploadFile, File()],
+    file_format: Annotated[Optional[str], Form()] = None,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Bulk import books (csv or ndjson) into the bookstore of the staff."""
+    _, staff = login_data
+
+    try:
+        if staff.bookstore_id is None:
+            raise Exception("Please create a bookstore first.")
+
+        file_format = file_format or guess_import_format(file.filename)
+        if file_format not in IMPORT_FORMATS:
+            raise Exception(f"file_format must be one of {IMPORT_FORMATS}")
+
+        report = await import_books(
+            db=db,
+            bookstore_id=staff.bookstore_id,
+            lines=iter_lines(_iter_upload_chunks(file)),
+            file_format=file_format,
+        )
+
+        await db.commit()
+
+        return JSONResponse(content=report.dict(), status_code=status.HTTP_200_OK)
+    except Exception as err:
+        await db.rollback()
+        logger.error(err)
+        return JSONResponse(
+            content={"error": repr(err)}, status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
 @router.post(
     "/book_bookstore_mappings/{book_bookstore_mapping_id}/update", response_class=RedirectResponse
 )
@@ -196,6 +363,76 @@ async def update_staff_book_mapping(
         return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.post("/book_bookstore_mappings/bulk_update", response_class=JSONResponse)
+async def bulk_update_staff_book_mappings(
+    request: Request,
+    bulk_update: BulkBookMappingUpdate,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Update price and/or store_quantity of many books of the bookstore at once."""
+    _, staff = login_data
+
+    try:
+        if len(bulk_update.updates) > MAX_BULK_MAPPING_UPDATES:
+            raise Exception(f"At most {MAX_BULK_MAPPING_UPDATES} updates per request.")
+
+        results = []
+        valid_updates = []
+        seen_ids = set()
+
+        for update in bulk_update.updates:
+            mapping_id = update.book_bookstore_mapping_id
+            error = None
+
+            if update.price is None and update.store_quantity is None:
+                error = "Nothing to update, please provide price or store_quantity."
+            elif update.price is not None and update.price < 0:
+                error = "Unable to set price to negative value!"
+            elif update.store_quantity is not None and update.store_quantity < 0:
+                error = "Unable to set store_quantity to negative value!"
+            elif mapping_id in seen_ids:
+                error = "Duplicate book_bookstore_mapping_id in this request."
+            else:
+                seen_ids.add(mapping_id)
+                valid_updates.append((mapping_id, update.price, update.store_quantity))
+
+            results.append((mapping_id, error))
+
+        updated_ids = await bulk_update_book_bookstore_mappings(
+            db=db, bookstore_id=staff.bookstore_id, updates=valid_updates
+        )
+
+        await db.commit()
+
+        result_dicts = []
+        for mapping_id, error in results:
+            if error is not None:
+                result_status = "invalid"
+            elif mapping_id in updated_ids:
+                result_status = "updated"
+            else:
+                result_status = "not_found"
+                error = "The book does not exist in this bookstore"
+
+            result_dicts.append(
+                {
+                    "book_bookstore_mapping_id": str(mapping_id),
+                    "status": result_status,
+                    "error": error,
+                }
+            )
+
+        content = {"updated": len(updated_ids), "results": result_dicts}
+        return JSONResponse(content=content, status_code=status.HTTP_200_OK)
+    except Exception as err:
+        await db.rollback()
+        logger.error(err)
+        return JSONResponse(
+            content={"error": repr(err)}, status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
 @router.post(
     "/book_bookstore_mappings/{book_bookstore_mapping_id}/delete", response_class=RedirectResponse
 )
@@ -286,3 +523,28 @@ async def create_staff_coupon(
         await db.rollback()
         redirect_url = f"/frontend/staffs/coupons?create_coupon_error={repr(err)}"
         return RedirectResponse(redirect_url, status_code=status.HTTP_303_SEE_OTHER)
+
+
+@router.get("/exports/{kind}", response_class=StreamingResponse)
+async def export_staff_bookstore(
+    kind: ExportKind,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    login_data: Tuple[JwtPayload, Staff] = Depends(validate_staff_token),
+):
+    """Stream the orders, order items or daily sales of the bookstore of the staff."""
+    _, staff = login_data
+
+    if staff.bookstore_id is None:
+        return JSONResponse(
+            {"detail": "Staff has no bookstore."}, status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    return export_response(
+        kind=kind,
+        export_format=format,
+        bookstore_id=staff.bookstore_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
@@ -1,5 +1,10 @@
 from pathlib import Path
+from uuid import uuid4
+
 from fastapi.templating import Jinja2Templates
 
 current_working_directory: Path = Path.cwd()
 templates = Jinja2Templates(directory=f"{current_working_directory}/app/router/template")
+# an Idempotency-Key per rendered form or button, generated here so it is the same for every
+# retry of it and does not need crypto.randomUUID (only defined in secure contexts)
+templates.env.globals["new_idempotency_key"] = lambda: uuid4().hex
@@ -36,9 +36,11 @@ def generate_jwt(
         iat=int(issued_at.timestamp()),
         exp=int(expired_at.timestamp()),
     )
-    logger.info(
-        f"[generate_jwt] start encoding jwt: payload: {payload},"
-        f" algorithm: {settings.JWT_ALGORITHM}"
+    logger.debug(
+        "[generate_jwt] start encoding jwt of %s: %s, algorithm: %s",
+        role,
+        account,
+        settings.JWT_ALGORITHM,
     )
     return encode_jwt(payload)
 
@@ -84,7 +86,8 @@ def decode_jwt(
 
         return JwtPayload(**payload)
     except jwt.DecodeError as err:
-        logger.error(f"Failed to decode JWT token:{token}, error:{err}")
+        # never log the token itself, it is a bearer credential
+        logger.error("Failed to decode JWT token, error: %s", err)
         raise err
     except (
         jwt.ExpiredSignatureError,
@@ -92,5 +95,5 @@ def decode_jwt(
         jwt.InvalidSignatureError,
         jwt.InvalidTokenError,
     ) as err:
-        logger.error(f"Invalid JWT token:{token}, error:{err}")
+        logger.error("Invalid JWT token, error: %s", err)
         raise err
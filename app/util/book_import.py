@@ -0,0 +1,299 @@
+import codecs
+import csv
+import json
+from collections import deque
+from datetime import date
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.operator.book_import import (
+    BOOK_IMPORT_COLUMNS,
+    apply_book_import,
+    copy_book_import_records,
+    create_book_import_staging,
+)
+from app.logging.logger import get_logger
+
+logger = get_logger()
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+IMPORT_FORMATS = (CSV_FORMAT, NDJSON_FORMAT)
+
+COPY_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+ISBN_MAX_LENGTH = 17
+
+_REQUIRED_TEXT_FIELDS = ("isbn", "title", "author", "publisher")
+_OPTIONAL_TEXT_FIELDS = ("category", "series")
+_ISBN_INDEX = BOOK_IMPORT_COLUMNS.index("isbn")
+
+
+def guess_import_format(filename: Optional[str]) -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return NDJSON_FORMAT
+    return CSV_FORMAT
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a stream of utf-8 byte chunks into lines without buffering the whole stream."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _to_staging_record(line_no: int, raw: Dict[str, Any]) -> tuple:
+    """Validate one uploaded row, raise ValueError with a readable message if invalid."""
+    values: Dict[str, Any] = {"line_no": line_no}
+
+    for field in _REQUIRED_TEXT_FIELDS:
+        value = raw.get(field)
+        value = str(value).strip() if value is not None else ""
+        if not value:
+            raise ValueError(f"{field} is required")
+        values[field] = value
+
+    if len(values["isbn"]) > ISBN_MAX_LENGTH:
+        raise ValueError(f"isbn must be at most {ISBN_MAX_LENGTH} characters")
+
+    for field in _OPTIONAL_TEXT_FIELDS:
+        value = raw.get(field)
+        value = str(value).strip() if value is not None else ""
+        values[field] = value or None
+
+    publish_date = raw.get("publish_date")
+    if publish_date in (None, ""):
+        values["publish_date"] = None
+    else:
+        try:
+            values["publish_date"] = date.fromisoformat(str(publish_date).strip())
+        except ValueError:
+            raise ValueError(f"publish_date: {publish_date} is not a YYYY-MM-DD date")
+
+    for field in ("price", "store_quantity"):
+        value = raw.get(field)
+        try:
+            number = int(str(value).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f"{field}: {value} is not an integer")
+        if number < 0:
+            raise ValueError(f"Unable to set {field} to negative value!")
+        values[field] = number
+
+    return tuple(values[column] for column in BOOK_IMPORT_COLUMNS)
+
+
+def _continues_quoted_field(line: str, in_quotes: bool) -> bool:
+    """
+    Whether a csv record is still inside a quoted field at the end of line, i.e. the field holds
+    a newline and the record goes on with the next line. Follows the quoting of csv.reader: a
+    quote opens a field only at its start and "" inside a quoted field is an escaped quote.
+    """
+    at_field_start = not in_quotes
+    just_closed = False
+    for char in line:
+        if in_quotes:
+            if char == '"':
+                in_quotes = False
+                just_closed = True
+            continue
+        if char == '"' and (at_field_start or just_closed):
+            in_quotes = True
+        just_closed = False
+        at_field_start = char == ","
+    return in_quotes
+
+
+class _CsvRecords:
+    """
+    One csv.reader over the uploaded lines. The lines arrive from an async stream, they are
+    buffered until the record is complete and then read by the reader, so a quoted field may
+    span several lines.
+    """
+
+    def __init__(self):
+        self._lines: Deque[str] = deque()
+        self._in_quotes = False
+        # only advanced when the buffered lines hold a whole record
+        self._reader = csv.reader(self._buffered_lines())
+
+    def _buffered_lines(self) -> Iterator[str]:
+        # never exhausted, the reader is only advanced over a whole buffered record
+        while True:
+            yield self._lines.popleft()
+
+    @property
+    def pending(self) -> bool:
+        """Lines of an unfinished record are buffered."""
+        return bool(self._lines)
+
+    def feed(self, line: str) -> Optional[List[str]]:
+        """The cells of the record ending with line, None if the record goes on."""
+        # the reader keeps the newline of a quoted field only if the line ends with it
+        self._lines.append(line + "\n")
+        self._in_quotes = _continues_quoted_field(line, self._in_quotes)
+        if self._in_quotes:
+            return None
+        try:
+            return next(self._reader)
+        finally:
+            self._lines.clear()
+
+
+async def _iter_rows(
+    lines: AsyncIterator[str], file_format: str
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    (line_no, row, error) of every uploaded row, line_no is the first line of the row and error
+    the reason it could not be parsed. Only NDJSON is parsed line by line.
+    """
+    csv_records = _CsvRecords() if file_format == CSV_FORMAT else None
+    header: Optional[List[str]] = None
+    line_no = 0
+    record_line_no = 0
+
+    async for line in lines:
+        line_no += 1
+
+        if csv_records is None:
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as err:
+                yield line_no, None, str(err)
+                continue
+            if not isinstance(raw, dict):
+                yield line_no, None, "Each line must be a json object"
+                continue
+            yield line_no, raw, None
+            continue
+
+        if not csv_records.pending:
+            if not line.strip():
+                continue
+            record_line_no = line_no
+
+        try:
+            cells = csv_records.feed(line)
+        except csv.Error as err:
+            yield record_line_no, None, str(err)
+            continue
+        if cells is None:
+            continue
+
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            missing = {"isbn", "price", "store_quantity"} - set(header)
+            if missing:
+                raise ValueError(f"Missing columns in csv header: {sorted(missing)}")
+            continue
+
+        yield record_line_no, dict(zip(header, cells)), None
+
+    if csv_records is not None and csv_records.pending:
+        yield record_line_no, None, "Unterminated quoted field at the end of the file"
+
+
+class BookImportReport:
+    def __init__(self):
+        self.total_rows = 0
+        self.imported_rows = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.created_books = 0
+        self.created_mappings = 0
+        self.updated_mappings = 0
+
+    def add_error(self, line_no: int, error: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": error})
+
+    def dict(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported_rows": self.imported_rows,
+            "created_books": self.created_books,
+            "created_mappings": self.created_mappings,
+            "updated_mappings": self.updated_mappings,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+async def import_books(
+    db: AsyncSession,
+    bookstore_id: UUID,
+    lines: AsyncIterator[str],
+    file_format: str = CSV_FORMAT,
+) -> BookImportReport:
+    """
+    Stream rows into a temp staging table with COPY and apply them set-based.
+    Invalid rows are skipped and reported, the caller commits or rolls back db.
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+    report = BookImportReport()
+    seen_isbns: Dict[str, int] = {}
+    batch: List[tuple] = []
+
+    await create_book_import_staging(db)
+
+    async for line_no, raw, error in _iter_rows(lines, file_format):
+        report.total_rows += 1
+
+        if error is not None:
+            report.add_error(line_no, error)
+            continue
+        try:
+            record = _to_staging_record(line_no, raw)
+        except ValueError as err:
+            report.add_error(line_no, str(err))
+            continue
+
+        isbn = record[_ISBN_INDEX]
+        if isbn in seen_isbns:
+            report.add_error(
+                line_no, f"Duplicate isbn: {isbn}, first seen at line {seen_isbns[isbn]}"
+            )
+            continue
+        seen_isbns[isbn] = line_no
+
+        batch.append(record)
+        if len(batch) >= COPY_BATCH_SIZE:
+            await copy_book_import_records(db, batch)
+            report.imported_rows += len(batch)
+            batch = []
+
+    if batch:
+        await copy_book_import_records(db, batch)
+        report.imported_rows += len(batch)
+
+    if report.imported_rows:
+        (
+            report.created_books,
+            report.created_mappings,
+            report.updated_mappings,
+        ) = await apply_book_import(db, bookstore_id)
+
+    logger.info(
+        "Imported %s/%s rows into bookstore: %s",
+        report.imported_rows,
+        report.total_rows,
+        bookstore_id,
+    )
+
+    return report
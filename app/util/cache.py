@@ -0,0 +1,273 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.listener import notify, pg_listener
+from app.logging.logger import get_logger
+from app.util.singleflight import SingleFlight
+
+logger = get_logger()
+
+CACHE_CHANNEL = "app_cache"
+CATALOG_TOPIC = "catalog"
+
+_catalog_version = 0
+
+_topic_handlers: Dict[str, List[Callable[[str], None]]] = {}
+
+
+def get_catalog_version() -> int:
+    return _catalog_version
+
+
+def _bump_catalog_version(*_: Any) -> None:
+    global _catalog_version
+    _catalog_version += 1
+
+
+def on_commit(db: AsyncSession, callback: Callable[[], None], key: Optional[str] = None) -> None:
+    """
+    Run callback after the current transaction of db commits, drop it if it rolls back.
+    If key is given, the callback is registered at most once per transaction.
+    """
+    sync_session = db.sync_session
+
+    if key is not None:
+        if sync_session.info.get(key):
+            return
+        sync_session.info[key] = True
+
+    done = False
+
+    def _finish(session) -> bool:
+        nonlocal done
+        if done:
+            return False
+        done = True
+        if key is not None:
+            session.info.pop(key, None)
+        return True
+
+    def _after_commit(session):
+        if _finish(session):
+            callback()
+
+    event.listen(sync_session, "after_commit", _after_commit)
+    event.listen(sync_session, "after_rollback", _finish)
+
+
+async def invalidate_on_commit(db: AsyncSession, topic: str, key: str = "") -> None:
+    """
+    Evict the cache entries of topic (and key) once db commits, in this worker right away
+    and in every other worker through a NOTIFY sent in the same transaction.
+    """
+    info_key = f"cache_invalidation:{topic}:{key}"
+    if db.sync_session.info.get(info_key):
+        return
+
+    on_commit(db, lambda: _dispatch_invalidation(topic, key), key=info_key)
+    await notify(db, CACHE_CHANNEL, f"{topic}:{key}")
+
+
+async def bump_catalog_version(db: AsyncSession) -> None:
+    """
+    Invalidate every catalog-wide cache entry once db commits.
+    Bumping after the commit keeps readers from caching pre-commit data under the new version.
+    """
+    await invalidate_on_commit(db, CATALOG_TOPIC)
+
+
+def register_cache_topic(topic: str, handler: Callable[[str], None]) -> None:
+    _topic_handlers.setdefault(topic, []).append(handler)
+
+
+def _dispatch_invalidation(topic: str, key: str) -> None:
+    for handler in _topic_handlers.get(topic, []):
+        handler(key)
+
+
+def _handle_cache_notification(payload: str) -> None:
+    topic, _, key = payload.partition(":")
+    _dispatch_invalidation(topic, key)
+
+
+class VersionedCache:
+    """In-process cache whose entries are only valid for the version they were loaded at."""
+
+    def __init__(self, get_version: Callable[[], int]):
+        self._get_version = get_version
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        version, value = entry
+        if version != self._get_version():
+            self._entries.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        self._entries[key] = (version, value)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        # take the version before loading so a bump during the load discards the result
+        version = self._get_version()
+        value = await loader()
+        self.set(key, value, version)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+catalog_cache = VersionedCache(get_catalog_version)
+
+register_cache_topic(CATALOG_TOPIC, _bump_catalog_version)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "loaded_at", "version")
+
+    def __init__(self, value: Any, loaded_at: float, version: Optional[int]):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.version = version
+
+
+_operator_caches: List["OperatorCache"] = []
+
+
+class OperatorCache:
+    """
+    Result cache of one db operator.
+
+    - identical in-flight loads are coalesced into one query by SingleFlight
+    - entries are fresh for ttl seconds, then served stale for stale_ttl more seconds
+      while a single background refresh reloads them with its own db session
+    - at most maxsize entries are kept, least recently used first out
+    - if version is given, entries loaded at another version are never served
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        ttl: float,
+        maxsize: int,
+        stale_ttl: float,
+        version: Optional[Callable[[], int]],
+    ):
+        self.fn = fn
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.version = version
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        # bumped by invalidate() so loads started before it are not stored
+        self._generation = 0
+
+    def _key(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        return (args, tuple(sorted(kwargs.items())))
+
+    async def _load(self, key: Hashable, db: AsyncSession, args, kwargs) -> Any:
+        version = self.version() if self.version else None
+        generation = self._generation
+        value = await self.fn(db, *args, **kwargs)
+
+        if generation != self._generation:
+            return value
+
+        self._entries[key] = _CacheEntry(value, time.monotonic(), version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+        return value
+
+    async def _refresh(self, key: Hashable, args, kwargs) -> None:
+        # imported here, the session middleware depends on modules that import the operators
+        from app.middleware.db_session import get_db_session_context_manager
+
+        try:
+            async with get_db_session_context_manager(
+                request_name=f"refresh cache of {self.fn.__qualname__}"
+            ) as db:
+                await self._flight.do(key, lambda: self._load(key, db, args, kwargs))
+        except Exception as err:
+            logger.error("Failed to refresh cache of %s, error: %s", self.fn.__qualname__, err)
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def __call__(self, db: AsyncSession, *args: Any, **kwargs: Any) -> Any:
+        key = self._key(args, kwargs)
+        entry = self._entries.get(key)
+
+        if entry is not None and (self.version is None or entry.version == self.version()):
+            age = time.monotonic() - entry.loaded_at
+
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                return entry.value
+
+            if age < self.ttl + self.stale_ttl:
+                if key not in self._refreshing and not self._flight.in_flight(key):
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, args, kwargs))
+                self._entries.move_to_end(key)
+                return entry.value
+
+        return await self._flight.do(key, lambda: self._load(key, db, args, kwargs))
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+
+def cached(
+    ttl: float,
+    maxsize: int = 128,
+    stale_ttl: float = 0,
+    version: Optional[Callable[[], int]] = None,
+    topic: Optional[str] = None,
+):
+    """
+    Cache an async operator whose first argument is the db session.
+    The session is not part of the cache key, the other arguments must be hashable.
+    If topic is given, invalidate_on_commit(db, topic) clears the cache in every worker.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> OperatorCache:
+        cache = OperatorCache(fn, ttl=ttl, maxsize=maxsize, stale_ttl=stale_ttl, version=version)
+        functools.update_wrapper(cache, fn)
+        _operator_caches.append(cache)
+        if topic is not None:
+            register_cache_topic(topic, lambda _: cache.invalidate())
+        return cache
+
+    return decorator
+
+
+def invalidate_all_caches() -> None:
+    """Drop every in-process cache entry of this worker."""
+    _bump_catalog_version()
+    catalog_cache.clear()
+    for cache in _operator_caches:
+        cache.invalidate()
+
+
+pg_listener.subscribe(CACHE_CHANNEL, _handle_cache_notification)
+# notifications sent while the listener was disconnected are lost
+pg_listener.on_reconnect(invalidate_all_caches)
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Optional, Sequence
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+
+from app.db.operator.order import (
+    stream_order_items_by_bookstore_id,
+    stream_orders_by_bookstore_id,
+    stream_sales_by_bookstore_id,
+)
+from app.enum.export import ExportFormat, ExportKind
+from app.logging.logger import get_logger
+from app.middleware.db_session import get_db_session_context_manager
+
+logger = get_logger()
+
+_STREAMS = {
+    ExportKind.ORDERS: stream_orders_by_bookstore_id,
+    ExportKind.ORDER_ITEMS: stream_order_items_by_bookstore_id,
+    ExportKind.SALES: stream_sales_by_bookstore_id,
+}
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _encode_batch(rows: Sequence[Row], export_format: ExportFormat, write_header: bool) -> bytes:
+    if export_format == ExportFormat.NDJSON:
+        lines = [json.dumps(row._asdict(), default=str, ensure_ascii=False) for row in rows]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if write_header:
+        writer.writerow(rows[0]._fields)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def _iter_export(
+    kind: ExportKind,
+    export_format: ExportFormat,
+    bookstore_id: UUID,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> AsyncIterator[bytes]:
+    # the request session is closed before the body is streamed, so open our own
+    async with get_db_session_context_manager(request_name=f"export {kind}") as db:
+        write_header = True
+        exported_rows = 0
+
+        async for rows in _STREAMS[kind](
+            db, bookstore_id=bookstore_id, start_date=start_date, end_date=end_date
+        ):
+            if not rows:
+                continue
+            # the server-side cursor only advances once the client has received this batch
+            yield _encode_batch(rows, export_format, write_header)
+            write_header = False
+            exported_rows += len(rows)
+
+        logger.info("Exported %s %s rows of bookstore: %s", exported_rows, kind, bookstore_id)
+
+
+def export_response(
+    kind: ExportKind,
+    export_format: ExportFormat,
+    bookstore_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> StreamingResponse:
+    filename = f"{kind}_{start_date or 'begin'}_{end_date or 'now'}.{export_format}"
+
+    return StreamingResponse(
+        _iter_export(kind, export_format, bookstore_id, start_date, end_date),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
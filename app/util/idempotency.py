@@ -0,0 +1,122 @@
+import asyncio
+import json
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.operator.idempotency_key import (
+    claim_idempotency_key,
+    delete_expired_idempotency_keys,
+    get_idempotency_key,
+    save_idempotency_response,
+)
+from app.logging.logger import get_logger
+from app.middleware.db_session import get_db_session_context_manager
+
+logger = get_logger()
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+async def replay_or_claim(
+    db: AsyncSession, customer_account: str, key: Optional[str], endpoint: str
+) -> Optional[Response]:
+    """
+    Return the stored response of a request already made with the key, or claim the key in
+    the transaction of db and return None: the caller runs the request, stores its response
+    with store_response and commits. Requests without a key always run.
+    """
+    if not key:
+        return None
+
+    if await claim_idempotency_key(db, customer_account, key, endpoint, _ttl()):
+        return None
+
+    # the conflicting row is committed: a concurrent request with the key has finished
+    stored = await get_idempotency_key(db, customer_account, key)
+    if stored is None or stored.status_code is None:
+        raise Exception("No response was stored for the idempotency key.")
+    if stored.endpoint != endpoint:
+        raise Exception("The idempotency key was already used for another request.")
+
+    logger.info("Replayed %s of %s, idempotency key: %s", endpoint, customer_account, key)
+    if stored.response_location is not None:
+        return RedirectResponse(stored.response_location, status_code=stored.status_code)
+    return JSONResponse(stored.response_body, status_code=stored.status_code)
+
+
+async def store_response(
+    db: AsyncSession, customer_account: str, key: Optional[str], response: Response
+) -> None:
+    """Store the redirect or json response of a claimed key, in the transaction of the request."""
+    if not key:
+        return
+
+    if isinstance(response, RedirectResponse):
+        await save_idempotency_response(
+            db,
+            customer_account,
+            key,
+            status_code=response.status_code,
+            response_location=response.headers["location"],
+        )
+    else:
+        await save_idempotency_response(
+            db,
+            customer_account,
+            key,
+            status_code=response.status_code,
+            response_body=json.loads(response.body),
+        )
+
+
+class IdempotencyKeySweeper:
+    """Deletes the expired idempotency keys in the background, in small batches."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def sweep(self) -> int:
+        deleted = 0
+        while True:
+            async with get_db_session_context_manager(request_name="idempotency_sweeper") as db:
+                count = await delete_expired_idempotency_keys(db, _ttl(), SWEEP_BATCH_SIZE)
+                await db.commit()
+            deleted += count
+            if count < SWEEP_BATCH_SIZE:
+                return deleted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    logger.info("Deleted %s expired idempotency keys", deleted)
+            except Exception as err:
+                logger.error("Idempotency key sweep failed, error: %s", err)
+
+
+idempotency_key_sweeper = IdempotencyKeySweeper()
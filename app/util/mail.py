@@ -0,0 +1,77 @@
+import asyncio
+import smtplib
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Optional
+
+from app.core.config import settings
+from app.logging.logger import get_logger
+
+logger = get_logger()
+
+TOPIC_HEADER = "X-Mail-Topic"
+
+
+class MailSink(ABC):
+    """Where the outbox worker delivers emails, pick one with MAIL_SINK."""
+
+    @abstractmethod
+    async def send(self, message: EmailMessage) -> None: ...
+
+
+class LogMailSink(MailSink):
+    """
+    Log the emails instead of sending them, for local development. The address and the content
+    hold the customer's personal data: only the domain of the recipient is logged at INFO, the
+    content at DEBUG.
+    """
+
+    async def send(self, message: EmailMessage) -> None:
+        _, _, domain = str(message["To"]).rpartition("@")
+        logger.info(
+            "Mail %s, topic: %s, to domain: %s",
+            message["Message-ID"],
+            message[TOPIC_HEADER],
+            domain,
+        )
+        logger.debug("Mail %s content:\n%s", message["Message-ID"], message.get_content())
+
+
+class SmtpMailSink(MailSink):
+    """
+    Send through an SMTP server, e.g. the debug server of aiosmtpd on localhost:1025:
+    python -m aiosmtpd -n -l localhost:1025
+    """
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _send(self, message: EmailMessage) -> None:
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+    async def send(self, message: EmailMessage) -> None:
+        # smtplib blocks, keep it off the event loop
+        await asyncio.to_thread(self._send, message)
+
+
+def get_mail_sink() -> MailSink:
+    if settings.MAIL_SINK == "smtp":
+        return SmtpMailSink(settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_TIMEOUT_SECONDS)
+    return LogMailSink()
+
+
+def build_mail(to: str, subject: str, content: str, topic: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.MAIL_SENDER
+    message["To"] = to
+    message["Subject"] = subject
+    # the domain of the sender, make_msgid would look up the fqdn of the host on every mail
+    message["Message-ID"] = make_msgid(domain=settings.MAIL_SENDER.rpartition("@")[2])
+    if topic is not None:
+        message[TOPIC_HEADER] = topic
+    message.set_content(content)
+    return message
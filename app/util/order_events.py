@@ -0,0 +1,109 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.db.listener import pg_listener
+from app.logging.logger import get_logger
+from app.monitoring.metrics import metrics
+
+logger = get_logger()
+
+ORDER_STATUS_CHANNEL = "order_status"
+ORDER_QUEUE_CHANNEL = "order_queue"
+
+# status changes are small and only the latest one matters, a slow client loses the oldest
+SUBSCRIBER_QUEUE_SIZE = 16
+
+# proxies close idle connections, a comment line keeps the stream open
+SSE_KEEPALIVE_SECONDS = 15
+
+order_event_subscribers = metrics.gauge(
+    "order_event_subscribers", "Open order event streams of this worker."
+)
+
+
+class OrderEventHub:
+    """
+    Fans the notifications received by the worker's single LISTEN connection out to the
+    in-memory queues of the subscribers of the payload's `key` field (a customer account or
+    a bookstore id). An idle subscriber is only a queue and a suspended generator, nothing
+    polls the database.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, key: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(key, set()).add(queue)
+        order_event_subscribers.inc()
+        return queue
+
+    def unsubscribe(self, key: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(key)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[key]
+        order_event_subscribers.dec()
+
+    def publish(self, key: str, event: Dict[str, str]) -> None:
+        for queue in self._subscribers.get(key, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def handle_notification(self, payload: str) -> None:
+        event = json.loads(payload)
+        self.publish(event.pop(self.key), event)
+
+
+def order_status_payload(customer_account: str, order_id, status: str) -> str:
+    return json.dumps(
+        {"customer_account": customer_account, "order_id": str(order_id), "status": status}
+    )
+
+
+def order_queue_payload(
+    bookstore_id, order_id, action: str, status: str, staff_account: Optional[str] = None
+) -> str:
+    """action: created, claimed or released."""
+    return json.dumps(
+        {
+            "bookstore_id": str(bookstore_id),
+            "order_id": str(order_id),
+            "action": action,
+            "status": status,
+            "staff_account": staff_account,
+        }
+    )
+
+
+def format_sse(event: str, data: Optional[Dict[str, str]] = None) -> str:
+    return f"event: {event}\ndata: {json.dumps(data or {})}\n\n"
+
+
+async def iter_sse(hub: OrderEventHub, key: str, event_name: str) -> AsyncIterator[str]:
+    """Server-sent events of the hub's notifications for the key, until the client leaves."""
+    queue = hub.subscribe(key)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event_name, event)
+    finally:
+        # also runs when the client disconnects and the response cancels the generator
+        hub.unsubscribe(key, queue)
+
+
+order_status_hub = OrderEventHub(key="customer_account")
+order_queue_hub = OrderEventHub(key="bookstore_id")
+
+pg_listener.subscribe(ORDER_STATUS_CHANNEL, order_status_hub.handle_notification)
+pg_listener.subscribe(ORDER_QUEUE_CHANNEL, order_queue_hub.handle_notification)
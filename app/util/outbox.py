@@ -0,0 +1,203 @@
+import asyncio
+import random
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.db.listener import pg_listener
+from app.db.operator.outbox import (
+    OUTBOX_CHANNEL,
+    claim_outbox_messages,
+    count_pending_outbox_messages,
+    mark_outbox_messages_delivered,
+    reschedule_outbox_message,
+)
+from app.enum.outbox import OutboxTopic
+from app.logging.logger import get_logger
+from app.middleware.db_session import get_db_session_context_manager
+from app.monitoring.metrics import metrics
+from app.util.mail import MailSink, build_mail, get_mail_sink
+
+logger = get_logger()
+
+OutboxHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+outbox_queue_depth = metrics.gauge(
+    "outbox_queue_depth", "Outbox messages waiting for delivery, of every worker."
+)
+outbox_delivered_total = metrics.counter(
+    "outbox_delivered_total", "Outbox messages delivered by this worker."
+)
+outbox_failures_total = metrics.counter(
+    "outbox_failures_total", "Failed outbox delivery attempts of this worker."
+)
+
+
+class OutboxWorker:
+    """
+    Delivers the outbox messages in the background, so a slow or failing delivery never adds
+    to the latency of the request that wrote the message.
+
+    A batch is leased and committed first, delivered without holding a transaction, then
+    marked delivered or rescheduled with exponential backoff. Delivery is at least once: a
+    message is sent again if the worker dies between sending it and marking it delivered.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, OutboxHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake_up = asyncio.Event()
+
+    def register(self, topic: str, handler: OutboxHandler) -> None:
+        self._handlers[topic] = handler
+
+    def wake_up(self, *_: Any) -> None:
+        self._wake_up.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake_up = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _retry_delay(self, attempts: int) -> timedelta:
+        delay = min(
+            settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.OUTBOX_RETRY_MAX_SECONDS,
+        )
+        # jitter, messages failing together are not retried together
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    async def _deliver(self, topic: str, payload: Dict[str, Any]) -> None:
+        handler = self._handlers.get(topic)
+        if handler is None:
+            raise Exception(f"No outbox handler for topic: {topic}")
+        await asyncio.wait_for(handler(payload), timeout=settings.OUTBOX_DELIVERY_TIMEOUT_SECONDS)
+
+    async def process_batch(self) -> int:
+        """Deliver one batch of due messages, return the number of claimed messages."""
+        async with get_db_session_context_manager(request_name="outbox_worker") as db:
+            messages = await claim_outbox_messages(
+                db,
+                batch_size=settings.OUTBOX_BATCH_SIZE,
+                lease=timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+            await db.commit()
+            if not messages:
+                return 0
+
+            results = await asyncio.gather(
+                *(self._deliver(message.topic, message.payload) for message in messages),
+                return_exceptions=True,
+            )
+
+            delivered_ids = []
+            for message, result in zip(messages, results):
+                if not isinstance(result, BaseException):
+                    delivered_ids.append(message.message_id)
+                    outbox_delivered_total.inc(topic=message.topic)
+                    continue
+
+                outbox_failures_total.inc(topic=message.topic)
+                give_up = message.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+                logger.warning(
+                    "Outbox delivery failed, message: %s, topic: %s, attempt: %s, give up: %s,"
+                    " error: %r",
+                    message.message_id,
+                    message.topic,
+                    message.attempts,
+                    give_up,
+                    result,
+                )
+                await reschedule_outbox_message(
+                    db,
+                    message.message_id,
+                    delay=self._retry_delay(message.attempts),
+                    error=repr(result),
+                    give_up=give_up,
+                )
+
+            if delivered_ids:
+                await mark_outbox_messages_delivered(db, delivered_ids)
+            await db.commit()
+            return len(messages)
+
+    async def _update_queue_depth(self) -> None:
+        async with get_db_session_context_manager(request_name="outbox_worker") as db:
+            outbox_queue_depth.set(await count_pending_outbox_messages(db))
+
+    async def _run(self) -> None:
+        while True:
+            claimed = 0
+            try:
+                claimed = await self.process_batch()
+                await self._update_queue_depth()
+            except Exception as err:
+                logger.error("Outbox worker failed, error: %s", err)
+
+            # a full batch means more messages are probably due
+            if claimed < settings.OUTBOX_BATCH_SIZE:
+                self._wake_up.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wake_up.wait(), timeout=settings.OUTBOX_POLL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+def order_confirmation_payload(order, bookstore_name: str, items: list) -> Dict[str, Any]:
+    """items: dicts of title, quantity and price."""
+    return {
+        "order_id": str(order.order_id),
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "recipient_name": order.recipient_name,
+        "shipping_address": order.shipping_address,
+        "shipping_fee": order.shipping_fee,
+        "total_price": order.total_price,
+        "bookstore_name": bookstore_name,
+        "items": items,
+    }
+
+
+def make_order_confirmation_handler(sink: MailSink) -> OutboxHandler:
+    async def send_order_confirmation(payload: Dict[str, Any]) -> None:
+        lines = [f"Hi {payload['customer_name']},", ""]
+        lines.append(f"Thank you for your order at {payload['bookstore_name']}.")
+        lines.append(f"Order ID: {payload['order_id']}")
+        lines.append("")
+        for item in payload["items"]:
+            lines.append(f"  {item['title']} x {item['quantity']}  ${item['price']}")
+        lines.append(f"  Shipping fee  ${payload['shipping_fee']}")
+        lines.append(f"Total: ${payload['total_price']}")
+        lines.append("")
+        lines.append(f"Ship to: {payload['recipient_name']}, {payload['shipping_address']}")
+
+        await sink.send(
+            build_mail(
+                to=payload["customer_email"],
+                subject=f"Order confirmation {payload['order_id']}",
+                content="\n".join(lines),
+                topic=str(OutboxTopic.ORDER_CONFIRMATION),
+            )
+        )
+
+    return send_order_confirmation
+
+
+outbox_worker = OutboxWorker()
+outbox_worker.register(
+    OutboxTopic.ORDER_CONFIRMATION, make_order_confirmation_handler(get_mail_sink())
+)
+
+pg_listener.subscribe(OUTBOX_CHANNEL, outbox_worker.wake_up)
@@ -0,0 +1,32 @@
+import base64
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """An opaque cursor holding the sort key of the last row of a page."""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(values, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """The fields of a comma separated fields= parameter, every allowed field if it is unset."""
+    if not fields:
+        return list(allowed)
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}, allowed: {', '.join(allowed)}")
+    # the order of allowed, a duplicated field is returned once
+    return [field for field in allowed if field in requested]
@@ -51,6 +51,7 @@ CREATE TABLE book_bookstore_mapping (
     PRIMARY KEY (book_bookstore_mapping_id), 
     CONSTRAINT price_non_negative CHECK (price >= 0), 
     CONSTRAINT store_quantity_non_negative CHECK (store_quantity >= 0), 
+    CONSTRAINT uc_book_bookstore UNIQUE (book_id, bookstore_id), 
     FOREIGN KEY(book_id) REFERENCES book (book_id), 
     FOREIGN KEY(bookstore_id) REFERENCES bookstore (bookstore_id)
 );